@@ -160,7 +160,7 @@ def _eliminar_informacion_evento_cerrado(evento):
 @user_passes_test(es_superadmin, login_url='ver_eventos')
 def dashboard(request):
     estados_objetivo = ['pendiente', 'inscripciones cerradas', 'finalizado', 'cerrado']
-    eventos = Evento.objects.filter(eve_estado__in=estados_objetivo)    
+    eventos = Evento.objects.con_estado_efectivo(estados_objetivo)    
     mapa_estados = {
         'pendiente': 'Pendiente',
         'inscripciones cerradas': 'Inscripciones Cerradas',
@@ -169,7 +169,7 @@ def dashboard(request):
     }
     nuevos_por_estado = {v: [] for v in mapa_estados.values()}
     for evento in eventos:
-        estado_raw = evento.eve_estado.lower()
+        estado_raw = evento.estado_efectivo.lower()
         estado_formateado = mapa_estados.get(estado_raw, estado_raw.title())
         if estado_formateado in nuevos_por_estado:
             nuevos_por_estado[estado_formateado].append(evento.eve_id)
@@ -273,7 +273,7 @@ def crear_codigo_invitacion_admin(request):
 @login_required
 @user_passes_test(es_superadmin, login_url='ver_eventos')
 def listar_eventos_estado(request, estado):
-    eventos = Evento.objects.filter(eve_estado=estado.lower()).select_related('eve_administrador_fk')
+    eventos = Evento.objects.con_estado_efectivo([estado.lower()]).select_related('eve_administrador_fk')
     eventos_por_admin = defaultdict(list)
     for evento in eventos:
         admin = evento.eve_administrador_fk
@@ -296,7 +296,7 @@ def detalle_evento_admin(request, eve_id):
         nuevo_estado = request.POST.get('nuevo_estado')
         
         # Si el evento está finalizado y se cambia a cerrado, eliminar toda la información
-        if evento.eve_estado.lower() == 'finalizado' and nuevo_estado.lower() == 'cerrado':
+        if evento.estado_efectivo.lower() == 'finalizado' and nuevo_estado.lower() == 'cerrado':
             try:
                 _eliminar_informacion_evento_cerrado(evento)
                 messages.success(request, 'Evento cerrado y toda la información ha sido eliminada correctamente.')
@@ -330,7 +330,7 @@ def detalle_evento_admin(request, eve_id):
     administrador = get_object_or_404(AdministradorEvento, pk=evento.eve_administrador_fk_id)
     
     # Determinar estados disponibles según el estado actual
-    if evento.eve_estado.lower() == 'finalizado':
+    if evento.estado_efectivo.lower() == 'finalizado':
         estados = ['Cerrado']  # Solo puede cambiar a cerrado
     else:
         estados = ['Pendiente', 'Aprobado', 'Rechazado', 'Inscripciónes Cerradas']
@@ -344,7 +344,7 @@ def detalle_evento_admin(request, eve_id):
 
     # Calcular estadísticas si el evento está aprobado
     estadisticas = None
-    if evento.eve_estado.lower() == 'aprobado':
+    if evento.estado_efectivo.lower() == 'aprobado':
         from app_asistentes.models import AsistenteEvento
         from app_participantes.models import ParticipanteEvento
         from app_evaluadores.models import EvaluadorEvento, Criterio, Calificacion
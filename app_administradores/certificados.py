@@ -0,0 +1,515 @@
+"""
+Generación de certificados en PDF: contexto y HTML del certificado y el procesamiento de los
+lotes, que genera los PDF en un pool de procesos y los deja en la cola de correo o en un ZIP
+para descargar.
+"""
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import timedelta
+from functools import lru_cache
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile, File
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.db.models import Q
+from django.template.defaultfilters import linebreaks_filter
+from django.template.loader import render_to_string
+from django.utils import timezone
+from weasyprint import CSS, HTML
+from pr_eventsoft.recursos_pdf import BASE_URL, url_fetcher
+from app_administradores.models import CertificadoEmitido, CertificadoLote, LoteCertificados
+from app_asistentes.models import AsistenteEvento
+from app_evaluadores.models import EvaluadorEvento
+from app_evaluadores.puntajes import ranking_queryset
+from app_eventos.models import ConfiguracionCertificado
+from app_participantes.models import ParticipanteEvento
+
+# Un lote tomado por un proceso que deja de avanzar (p. ej. murió) vuelve a la cola
+DURACION_BLOQUEO = timedelta(minutes=10)
+MAX_INTENTOS_LOTE = 3
+# Espera antes de reintentar un lote que falló; se duplica en cada intento
+ESPERA_REINTENTO_LOTE = timedelta(minutes=1)
+# Tiempo que se conserva el ZIP de un lote terminado; luego lo borra limpiar_zips_certificados
+VIGENCIA_ZIP = timedelta(hours=24)
+HOJA_CERTIFICADO = os.path.join(os.path.dirname(__file__), 'static', 'app_administradores', 'certificado.css')
+PLANTILLA_CERTIFICADO = os.path.join(os.path.dirname(__file__), 'templates', 'app_administradores', 'certificado_plantilla.html')
+TIEMPO_CACHE_PREVISUALIZACION = 60 * 60 * 24
+MAX_IMAGENES_EN_CACHE = 32
+# Inscripciones que se leen por consulta al recorrer los destinatarios de un evento
+TAMANO_LECTURA = 200
+ROL_CERTIFICADO = {'asistencia': 'asistente', 'participacion': 'participante', 'evaluador': 'evaluador'}
+# Ocupan el lugar del cuerpo y del código de verificación en la plantilla renderizada una vez por lote
+_MARCADOR_CUERPO = 'CUERPO_DEL_CERTIFICADO'
+_MARCADOR_CODIGO = 'CODIGO_DE_VERIFICACION'
+
+_imagenes_en_cache = OrderedDict()
+
+
+def imagen_to_base64(imagen_field):
+    """Convierte un campo de imagen de Django a base64 para usar en PDFs"""
+    if imagen_field and hasattr(imagen_field, 'path'):
+        try:
+            with open(imagen_field.path, 'rb') as image_file:
+                encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
+                # Detectar el formato de la imagen
+                mime_type, _ = mimetypes.guess_type(imagen_field.path)
+                if mime_type:
+                    format_name = mime_type.split('/')[1]
+                else:
+                    # Fallback basado en la extensión
+                    ext = os.path.splitext(imagen_field.path)[1].lower()
+                    if ext in ['.jpg', '.jpeg']:
+                        format_name = 'jpeg'
+                    elif ext == '.png':
+                        format_name = 'png'
+                    elif ext == '.gif':
+                        format_name = 'gif'
+                    else:
+                        format_name = 'jpeg'  # default
+
+                return encoded_string, format_name
+        except Exception as e:
+            print(f"Error al convertir imagen a base64: {e}")
+            return None, None
+    return None, None
+
+
+def datos_certificado(evento, usuario, **extra):
+    """Valores que reemplazan **CLAVE** en el cuerpo del certificado."""
+    return {
+        'NOMBRE': f'{usuario.first_name} {usuario.last_name}',
+        'DOCUMENTO': usuario.documento,
+        'EVENTO': evento.eve_nombre,
+        'FECHA': evento.eve_fecha_inicio.strftime('%d de %B de %Y'),
+        'CIUDAD': evento.eve_ciudad,
+        'LUGAR': evento.eve_lugar,
+        **extra,
+    }
+
+
+def destinatarios_certificado(evento, tipo):
+    """Inscripciones aprobadas y confirmadas que reciben el certificado de asistencia, participación o evaluador."""
+    if tipo == 'asistencia':
+        return AsistenteEvento.objects.filter(
+            evento=evento,
+            confirmado=True,
+            asi_eve_estado='Aprobado'
+        ).select_related('asistente__usuario')
+    if tipo == 'participacion':
+        return ParticipanteEvento.objects.filter(
+            evento=evento,
+            confirmado=True,
+            par_eve_estado='Aprobado'
+        ).select_related('participante__usuario')
+    if tipo == 'evaluador':
+        return EvaluadorEvento.objects.filter(
+            evento=evento,
+            confirmado=True,
+            eva_eve_estado='Aprobado'
+        ).select_related('evaluador__usuario')
+    return AsistenteEvento.objects.none()
+
+
+def certificados_evento(evento, tipo):
+    """
+    (usuario, datos) del certificado `tipo` de cada destinatario del evento (en premiación, cada
+    participante del ranking). Las inscripciones se leen por partes, sin cargarlas todas en memoria.
+    """
+    if tipo == 'premiacion':
+        ranking = ranking_queryset(evento).select_related('participante__usuario')
+        for participante_evento in ranking.iterator(chunk_size=TAMANO_LECTURA):
+            usuario = participante_evento.participante.usuario
+            yield usuario, datos_certificado(
+                evento, usuario,
+                PUESTO=f'{participante_evento.puesto}°',
+                PUNTUACION=str(participante_evento.par_eve_valor),
+            )
+    else:
+        for inscripcion in destinatarios_certificado(evento, tipo).iterator(chunk_size=TAMANO_LECTURA):
+            usuario = getattr(inscripcion, ROL_CERTIFICADO[tipo]).usuario
+            yield usuario, datos_certificado(evento, usuario)
+
+
+def _mtime(imagen_field):
+    try:
+        return os.path.getmtime(imagen_field.path) if imagen_field else None
+    except (OSError, ValueError):
+        return None
+
+
+def imagenes_certificado(configuracion):
+    """
+    Logo y firma en base64, listos para el contexto de certificado_plantilla.html. Se guardan en
+    memoria por configuración y fecha de modificación de los archivos, así que un logo nuevo invalida la entrada.
+    """
+    clave = (
+        configuracion.pk,
+        configuracion.logo.name, _mtime(configuracion.logo),
+        configuracion.firma.name, _mtime(configuracion.firma),
+    )
+    imagenes = _imagenes_en_cache.get(clave)
+    if imagenes is not None:
+        _imagenes_en_cache.move_to_end(clave)
+        return imagenes
+    logo_base64, logo_format = imagen_to_base64(configuracion.logo)
+    firma_base64, firma_format = imagen_to_base64(configuracion.firma)
+    imagenes = {
+        'logo_base64': logo_base64,
+        'logo_format': logo_format,
+        'firma_base64': firma_base64,
+        'firma_format': firma_format,
+    }
+    _imagenes_en_cache[clave] = imagenes
+    if len(_imagenes_en_cache) > MAX_IMAGENES_EN_CACHE:
+        _imagenes_en_cache.popitem(last=False)
+    return imagenes
+
+
+@lru_cache(maxsize=4)
+def _hoja(ruta, mtime):
+    return CSS(filename=ruta, url_fetcher=url_fetcher())
+
+
+def hoja_certificado():
+    """Hoja de estilos del certificado ya analizada por WeasyPrint (una vez por proceso y versión del archivo)."""
+    return _hoja(HOJA_CERTIFICADO, os.path.getmtime(HOJA_CERTIFICADO))
+
+
+def renderizar_cuerpo(configuracion, datos):
+    cuerpo = configuracion.cuerpo
+    for clave, valor in datos.items():
+        cuerpo = cuerpo.replace(f'**{clave}**', valor)
+    return cuerpo
+
+
+def plantilla_certificado(configuracion, es_preview=False):
+    """
+    HTML del certificado con marcas en lugar del cuerpo y del código de verificación. Se renderiza
+    una vez y cada certificado solo reemplaza las marcas (ver html_certificado).
+    """
+    return render_to_string('app_administradores/certificado_plantilla.html', {
+        'configuracion': configuracion,
+        'cuerpo_renderizado': _MARCADOR_CUERPO,
+        'codigo_verificacion': _MARCADOR_CODIGO,
+        'es_preview': es_preview,
+        **imagenes_certificado(configuracion),
+    })
+
+
+def html_certificado(configuracion, datos, es_preview=False, plantilla=None, codigo=None):
+    """
+    HTML del certificado con los datos del destinatario y, si se indica, su código de verificación;
+    `plantilla` reutiliza una de plantilla_certificado.
+    """
+    if plantilla is None:
+        plantilla = plantilla_certificado(configuracion, es_preview)
+    return plantilla.replace(
+        linebreaks_filter(_MARCADOR_CUERPO),
+        linebreaks_filter(renderizar_cuerpo(configuracion, datos)),
+        1,
+    ).replace(_MARCADOR_CODIGO, f'Código de verificación: {codigo}' if codigo else '', 1)
+
+
+def generar_pdf(html):
+    """
+    Renderiza el HTML con WeasyPrint. Las URL relativas y de STATIC_URL/MEDIA_URL se leen del disco,
+    nunca por HTTP. No consulta la base de datos, así que puede correr en otro proceso.
+    """
+    return HTML(string=html, base_url=BASE_URL, url_fetcher=url_fetcher()).write_pdf(stylesheets=[hoja_certificado()])
+
+
+def pdf_previsualizacion(configuracion, html):
+    """PDF de vista previa en caché mientras no cambien la configuración, sus imágenes ni la hoja de estilos."""
+    version = hashlib.sha256(html.encode()).hexdigest()
+    clave = f'previsualizacion_certificado:{configuracion.pk}:{version}:{os.path.getmtime(HOJA_CERTIFICADO)}'
+    pdf = cache.get(clave)
+    if pdf is None:
+        pdf = generar_pdf(html)
+        cache.set(clave, pdf, TIEMPO_CACHE_PREVISUALIZACION)
+    return pdf
+
+
+class _ZipLote:
+    """
+    Destino de un lote con entrega 'zip': los PDF se agregan a un ZIP temporal en disco que al
+    terminar se guarda en lote.archivo. Los certificados con error se listan en errores.txt.
+    """
+
+    def __init__(self, lote):
+        self.lote = lote
+        self.temporal = tempfile.TemporaryFile()
+        # Los PDF ya vienen comprimidos; se guardan sin volver a comprimir
+        self.zip = zipfile.ZipFile(self.temporal, 'w', zipfile.ZIP_STORED)
+        self.nombres = set()
+
+    def agregar(self, datos, pdf):
+        base = f'certificado_{self.lote.tipo}_{datos["DOCUMENTO"]}'
+        nombre, n = f'{base}.pdf', 1
+        while nombre in self.nombres:
+            n += 1
+            nombre = f'{base}_{n}.pdf'
+        self.nombres.add(nombre)
+        self.zip.writestr(nombre, pdf)
+
+    def guardar(self):
+        errores = [
+            f'{datos["NOMBRE"]} ({datos["DOCUMENTO"]}): {error}'
+            for datos, error in self.lote.certificados.filter(estado='Error').order_by('pk').values_list('datos', 'error')
+        ]
+        if errores:
+            self.zip.writestr('errores.txt', '\n'.join(errores) + '\n')
+        self.zip.close()
+        self.temporal.seek(0)
+        anterior = self.lote.archivo.name
+        self.lote.archivo.save(
+            f'certificados_{self.lote.tipo}_{self.lote.evento_id}_{self.lote.pk}.zip', File(self.temporal), save=False
+        )
+        LoteCertificados.objects.filter(pk=self.lote.pk).update(archivo=self.lote.archivo.name)
+        if anterior and anterior != self.lote.archivo.name:
+            self.lote.archivo.storage.delete(anterior)
+
+    def cerrar(self):
+        self.zip.close()
+        self.temporal.close()
+
+
+def eliminar_zips_vencidos(vigencia=VIGENCIA_ZIP):
+    """Borra los ZIP de los lotes terminados hace más de `vigencia` y vacía su archivo. Retorna cuántos."""
+    vencidos = LoteCertificados.objects.filter(
+        entrega='zip', terminado__lt=timezone.now() - vigencia
+    ).exclude(archivo='').only('pk', 'archivo')
+    eliminados = 0
+    for lote in vencidos.iterator():
+        lote.archivo.storage.delete(lote.archivo.name)
+        eliminados += LoteCertificados.objects.filter(pk=lote.pk, archivo=lote.archivo.name).update(archivo='')
+    return eliminados
+
+
+def correo_certificado(evento, tipo, email, datos, pdf, codigo=None):
+    """Correo con el certificado adjunto, con los mismos textos del envío uno a uno."""
+    verificacion = f'\n\nCódigo de verificación del certificado: {codigo}' if codigo else ''
+    if tipo == 'premiacion':
+        asunto = f'Certificado de Premiación - {evento.eve_nombre}'
+        cuerpo = f'Estimado/a {datos["NOMBRE"]},\n\n¡Felicitaciones! Adjuntamos su certificado de premiación del evento "{evento.eve_nombre}" donde obtuvo el {datos["PUESTO"]} lugar con una puntuación de {datos["PUNTUACION"]} puntos.{verificacion}\n\nSaludos cordiales.'
+    else:
+        asunto = f'Certificado de {tipo.title()} - {evento.eve_nombre}'
+        cuerpo = f'Estimado/a {datos["NOMBRE"]},\n\nAdjuntamos su certificado de {tipo} del evento "{evento.eve_nombre}".{verificacion}\n\nSaludos cordiales.'
+    email_obj = EmailMessage(
+        subject=asunto,
+        body=cuerpo,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email],
+    )
+    email_obj.attach(f'certificado_{tipo}_{datos["DOCUMENTO"]}.pdf', pdf, 'application/pdf')
+    return email_obj
+
+
+def crear_lote(evento, tipo, certificados, entrega='correo'):
+    """
+    Registra el lote con un certificado por destinatario [(usuario, datos)]. Si se envían por correo,
+    los destinatarios sin correo quedan de una vez con error. No genera nada: de eso se encarga
+    generar_certificados.
+    """
+    sin_correo = {'estado': 'Error', 'error': 'El destinatario no tiene correo registrado.'}
+    with transaction.atomic():
+        lote = LoteCertificados.objects.create(evento=evento, tipo=tipo, entrega=entrega)
+        CertificadoLote.objects.bulk_create([
+            CertificadoLote(
+                lote=lote,
+                usuario=usuario,
+                email=usuario.email or '',
+                datos=datos,
+                **({} if usuario.email or entrega == 'zip' else sin_correo)
+            )
+            for usuario, datos in certificados
+        ], batch_size=1000)
+    return lote
+
+
+def reclamar_lote(bloqueo=DURACION_BLOQUEO, max_intentos=MAX_INTENTOS_LOTE):
+    """
+    Toma el lote pendiente más antiguo (o uno con el bloqueo vencido) y lo marca 'En proceso'. Los
+    lotes cuyo proceso murió `max_intentos` veces sin terminarlos quedan en 'Error'.
+    """
+    ahora = timezone.now()
+    LoteCertificados.objects.filter(estado='En proceso', bloqueado_hasta__lt=ahora, intentos__gte=max_intentos).update(
+        estado='Error', bloqueado_hasta=None, terminado=ahora,
+        error=f'El proceso de generación se interrumpió {max_intentos} veces sin terminar el lote.',
+    )
+    with transaction.atomic():
+        # En un lote 'Pendiente', bloqueado_hasta es la hora del próximo reintento
+        lote = LoteCertificados.objects.select_for_update(skip_locked=True).filter(
+            Q(estado='Pendiente', bloqueado_hasta__isnull=True) |
+            Q(estado__in=['Pendiente', 'En proceso'], bloqueado_hasta__lt=ahora)
+        ).select_related('evento').order_by('creado').first()
+        if lote is not None:
+            lote.estado = 'En proceso'
+            lote.bloqueado_hasta = ahora + bloqueo
+            lote.intentos += 1
+            lote.save(update_fields=['estado', 'bloqueado_hasta', 'intentos'])
+    return lote
+
+
+def registrar_fallo_lote(lote, error, max_intentos=MAX_INTENTOS_LOTE):
+    """
+    Guarda el error con el que falló el procesamiento del lote. Vuelve a 'Pendiente' para
+    reintentarlo tras una espera creciente, o queda en 'Error' si ya se intentó `max_intentos`
+    veces. Retorna el estado.
+    """
+    ahora = timezone.now()
+    if lote.intentos >= max_intentos:
+        estado, reintento, terminado = 'Error', None, ahora
+    else:
+        estado, reintento, terminado = 'Pendiente', ahora + ESPERA_REINTENTO_LOTE * 2 ** (lote.intentos - 1), None
+    LoteCertificados.objects.filter(pk=lote.pk).update(
+        estado=estado, bloqueado_hasta=reintento, error=str(error)[:2000], terminado=terminado,
+    )
+    return estado
+
+
+def huella_certificado(configuracion, datos, codigo):
+    """Hash de todo lo que define el PDF: configuración, imágenes, plantilla, hoja de estilos, datos y código."""
+    partes = [
+        configuracion.tipo, configuracion.titulo, configuracion.cuerpo, configuracion.plantilla,
+        configuracion.logo.name, _mtime(configuracion.logo),
+        configuracion.firma.name, _mtime(configuracion.firma),
+        os.path.getmtime(PLANTILLA_CERTIFICADO), os.path.getmtime(HOJA_CERTIFICADO),
+        datos, codigo,
+    ]
+    return hashlib.sha256(json.dumps(partes, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def pdf_emitido(emitido, huella):
+    """PDF guardado del certificado emitido si corresponde a la huella; None si hay que generarlo."""
+    if not emitido.archivo or emitido.huella != huella:
+        return None
+    try:
+        with emitido.archivo.open('rb') as archivo:
+            return archivo.read()
+    except OSError:
+        return None
+
+
+def guardar_emitido(emitido, huella, datos, pdf):
+    """Guarda el PDF como <huella>.pdf y borra el de la emisión anterior."""
+    anterior = emitido.archivo.name
+    emitido.archivo.save(f'{huella}.pdf', ContentFile(pdf), save=False)
+    emitido.huella = huella
+    emitido.datos = datos
+    emitido.save(update_fields=['archivo', 'huella', 'datos', 'actualizado'])
+    if anterior and anterior != emitido.archivo.name:
+        emitido.archivo.storage.delete(anterior)
+
+
+def _registrar(lote, certificado, futuro, conexion, emitido, huella, guardar, destino_zip=None):
+    try:
+        pdf = futuro.result()
+        if destino_zip is not None:
+            destino_zip.agregar(certificado.datos, pdf)
+            CertificadoLote.objects.filter(pk=certificado.pk).update(estado='Enviado', error='', procesado=timezone.now())
+            return
+        if guardar:
+            guardar_emitido(emitido, huella, certificado.datos, pdf)
+        # El correo queda en la cola y el certificado como enviado, o ninguno de los dos
+        with transaction.atomic():
+            conexion.send_messages([correo_certificado(
+                lote.evento, lote.tipo, certificado.email, certificado.datos, pdf,
+                codigo=emitido.codigo if emitido else None,
+            )])
+            CertificadoLote.objects.filter(pk=certificado.pk).update(estado='Enviado', error='', procesado=timezone.now())
+    except Exception as e:
+        CertificadoLote.objects.filter(pk=certificado.pk).update(estado='Error', error=str(e)[:2000], procesado=timezone.now())
+
+
+def _emitidos(lote, certificados):
+    """CertificadoEmitido de cada usuario del lote por usuario_id; los que faltan se crean en bloque."""
+    usuarios = {certificado.usuario_id for certificado in certificados if certificado.usuario_id}
+    emitidos = CertificadoEmitido.objects.filter(evento_id=lote.evento_id, tipo=lote.tipo, usuario_id__in=usuarios)
+    faltantes = usuarios - set(emitidos.values_list('usuario_id', flat=True))
+    if faltantes:
+        CertificadoEmitido.objects.bulk_create([
+            CertificadoEmitido(evento_id=lote.evento_id, tipo=lote.tipo, usuario_id=usuario_id)
+            for usuario_id in faltantes
+        ], ignore_conflicts=True)
+    return {emitido.usuario_id: emitido for emitido in emitidos}
+
+
+def procesar_lote(lote, procesos=None, bloqueo=DURACION_BLOQUEO):
+    """
+    Genera los PDF pendientes del lote en un pool de `procesos` procesos (por defecto, uno por
+    núcleo) y deja cada correo en la cola, o el PDF en el ZIP del lote, en cuanto está listo.
+    Nunca hay más de dos PDF por proceso en curso, así que la memoria no crece con el tamaño del
+    lote. Cada certificado enviado por correo queda registrado como CertificadoEmitido; si ya se
+    había emitido sin cambios, se reutiliza su PDF.
+    """
+    configuracion = ConfiguracionCertificado.objects.filter(evento_id=lote.evento_id, tipo=lote.tipo).first()
+    if configuracion is None:
+        LoteCertificados.objects.filter(pk=lote.pk).update(
+            estado='Error', error='El certificado no está configurado.', terminado=timezone.now()
+        )
+        return
+    destino_zip = None
+    if lote.entrega == 'zip':
+        # Un ZIP a medio escribir no se puede retomar: si el lote se reanuda, se genera completo
+        lote.certificados.exclude(estado='Pendiente').update(estado='Pendiente', error='', procesado=None)
+        destino_zip = _ZipLote(lote)
+    pendientes = list(lote.certificados.filter(estado='Pendiente').order_by('pk'))
+    # El ZIP es una descarga para el administrador, no una emisión registrada para cada usuario
+    emitidos = {} if destino_zip else _emitidos(lote, pendientes)
+    pendientes = iter(pendientes)
+    plantilla = plantilla_certificado(configuracion)
+    procesos = procesos or os.cpu_count() or 1
+    conexion = get_connection()
+    # Los procesos hijos heredan la hoja de estilos ya analizada, pero no las conexiones a la base de datos
+    hoja_certificado()
+    connections.close_all()
+    try:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            en_curso = {}
+
+            def llenar():
+                while len(en_curso) < 2 * procesos:
+                    certificado = next(pendientes, None)
+                    if certificado is None:
+                        return
+                    emitido = emitidos.get(certificado.usuario_id)
+                    huella = pdf = None
+                    if emitido is not None:
+                        huella = huella_certificado(configuracion, certificado.datos, emitido.codigo)
+                        pdf = pdf_emitido(emitido, huella)
+                    if pdf is None:
+                        html = html_certificado(
+                            configuracion, certificado.datos, plantilla=plantilla,
+                            codigo=emitido.codigo if emitido else None,
+                        )
+                        futuro = pool.submit(generar_pdf, html)
+                    else:
+                        # Ya emitido sin cambios: no se vuelve a generar
+                        futuro = Future()
+                        futuro.set_result(pdf)
+                    en_curso[futuro] = (certificado, emitido, huella, emitido is not None and pdf is None)
+
+            llenar()
+            while en_curso:
+                hechos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in hechos:
+                    certificado, emitido, huella, guardar = en_curso.pop(futuro)
+                    _registrar(lote, certificado, futuro, conexion, emitido, huella, guardar, destino_zip)
+                LoteCertificados.objects.filter(pk=lote.pk).update(bloqueado_hasta=timezone.now() + bloqueo)
+                llenar()
+        if destino_zip is not None:
+            destino_zip.guardar()
+    finally:
+        if destino_zip is not None:
+            destino_zip.cerrar()
+    LoteCertificados.objects.filter(pk=lote.pk).update(
+        estado='Terminado', bloqueado_hasta=None, error='', terminado=timezone.now()
+    )
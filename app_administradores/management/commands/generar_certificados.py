@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand
+from app_administradores.certificados import MAX_INTENTOS_LOTE, procesar_lote, reclamar_lote, registrar_fallo_lote
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera en paralelo los PDF de los lotes de certificados pendientes y deja los correos en la '
+        'cola de envío. Con --continuo queda atendiendo nuevos lotes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=None, help='Procesos de generación (por defecto, uno por núcleo).')
+        parser.add_argument('--continuo', action='store_true', help='Mantiene el proceso activo revisando lotes pendientes.')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos entre revisiones en modo continuo.')
+        parser.add_argument('--max-intentos', type=int, default=MAX_INTENTOS_LOTE, help='Intentos antes de marcar un lote con error.')
+
+    def handle(self, *args, **options):
+        while True:
+            lote = reclamar_lote(max_intentos=options['max_intentos'])
+            if lote is not None:
+                inicio = time.perf_counter()
+                try:
+                    procesar_lote(lote, procesos=options['procesos'])
+                except Exception as e:
+                    estado = registrar_fallo_lote(lote, e, options['max_intentos'])
+                    self.stderr.write(self.style.ERROR(
+                        f'Lote {lote.pk}: error al generar certificados (intento {lote.intentos}, queda {estado}): {e}'
+                    ))
+                else:
+                    resumen = lote.resumen()
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Lote {lote.pk}: {resumen['Enviado']} certificados en cola, {resumen['Error']} con error "
+                        f"en {time.perf_counter() - inicio:.1f} s"
+                    ))
+                continue
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
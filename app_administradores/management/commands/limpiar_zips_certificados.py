@@ -0,0 +1,24 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from app_administradores.certificados import VIGENCIA_ZIP, eliminar_zips_vencidos
+
+
+class Command(BaseCommand):
+    help = (
+        'Borra los ZIP de certificados de los lotes terminados hace más de --horas horas. '
+        'Con --continuo repite la limpieza cada --intervalo segundos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horas', type=float, default=VIGENCIA_ZIP.total_seconds() / 3600, help='Horas que se conserva cada ZIP.')
+        parser.add_argument('--continuo', action='store_true', help='Mantiene el proceso activo limpiando periódicamente.')
+        parser.add_argument('--intervalo', type=float, default=3600, help='Segundos entre limpiezas en modo continuo.')
+
+    def handle(self, *args, **options):
+        while True:
+            eliminados = eliminar_zips_vencidos(timedelta(hours=options['horas']))
+            self.stdout.write(self.style.SUCCESS(f'ZIP de certificados eliminados: {eliminados}'))
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
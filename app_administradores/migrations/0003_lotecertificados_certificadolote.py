@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_administradores', '0002_initial'),
+        ('app_eventos', '0004_remove_evento_inscripciones_habilitadas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoteCertificados',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=20)),
+                ('estado', models.CharField(choices=[('Pendiente', 'Pendiente'), ('En proceso', 'En proceso'), ('Terminado', 'Terminado'), ('Error', 'Error')], default='Pendiente', max_length=12)),
+                ('bloqueado_hasta', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('terminado', models.DateTimeField(blank=True, null=True)),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lotes_certificados', to='app_eventos.evento')),
+            ],
+            options={
+                'ordering': ['-creado'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CertificadoLote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('datos', models.JSONField()),
+                ('estado', models.CharField(choices=[('Pendiente', 'Pendiente'), ('Enviado', 'Enviado'), ('Error', 'Error')], default='Pendiente', max_length=10)),
+                ('error', models.TextField(blank=True, default='')),
+                ('procesado', models.DateTimeField(blank=True, null=True)),
+                ('lote', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='certificados', to='app_administradores.lotecertificados')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['lote', 'estado'], name='app_adminis_lote_id_a429a1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:42
+
+import app_administradores.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_administradores', '0003_lotecertificados_certificadolote'),
+        ('app_eventos', '0004_remove_evento_inscripciones_habilitadas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificadolote',
+            name='usuario',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='CertificadoEmitido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('asistencia', 'Asistencia'), ('participacion', 'Participación'), ('evaluador', 'Evaluador'), ('premiacion', 'Premiación')], max_length=20)),
+                ('codigo', models.CharField(default=app_administradores.models._codigo_verificacion, editable=False, max_length=12, unique=True)),
+                ('huella', models.CharField(blank=True, default='', max_length=64)),
+                ('datos', models.JSONField(default=dict)),
+                ('archivo', models.FileField(blank=True, upload_to='certificados/emitidos/')),
+                ('emitido', models.DateTimeField(auto_now_add=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='certificados_emitidos', to='app_eventos.evento')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='certificados', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-emitido'],
+                'unique_together': {('evento', 'tipo', 'usuario')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_administradores', '0004_certificadolote_usuario_certificadoemitido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lotecertificados',
+            name='archivo',
+            field=models.FileField(blank=True, upload_to='certificados/zip/'),
+        ),
+        migrations.AddField(
+            model_name='lotecertificados',
+            name='entrega',
+            field=models.CharField(choices=[('correo', 'Correo'), ('zip', 'ZIP')], default='correo', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_administradores', '0005_lotecertificados_archivo_lotecertificados_entrega'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lotecertificados',
+            name='intentos',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
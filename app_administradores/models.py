@@ -1,5 +1,6 @@
 import uuid
 from django.utils import timezone
+from django.utils.crypto import get_random_string
 from django.db import models
 from app_usuarios.models import Usuario
 class AdministradorEvento(models.Model):
@@ -62,4 +63,106 @@ class CodigoInvitacionEvento(models.Model):
     
     class Meta:
         verbose_name = "Código de Invitación a Evento"
-        verbose_name_plural = "Códigos de Invitación a Eventos"
\ No newline at end of file
+        verbose_name_plural = "Códigos de Invitación a Eventos"
+
+class LoteCertificados(models.Model):
+    """
+    Certificados de un tipo para varios destinatarios. Lo procesa el comando generar_certificados:
+    genera los PDF en paralelo y los deja en la cola de correo o, con entrega 'zip', en un ZIP descargable.
+    """
+    ESTADOS = [
+        ('Pendiente', 'Pendiente'),
+        ('En proceso', 'En proceso'),
+        ('Terminado', 'Terminado'),
+        ('Error', 'Error'),
+    ]
+    ENTREGAS = [
+        ('correo', 'Correo'),
+        ('zip', 'ZIP'),
+    ]
+    evento = models.ForeignKey('app_eventos.Evento', on_delete=models.CASCADE, related_name='lotes_certificados')
+    tipo = models.CharField(max_length=20)
+    entrega = models.CharField(max_length=10, choices=ENTREGAS, default='correo')
+    archivo = models.FileField(upload_to='certificados/zip/', blank=True)
+    estado = models.CharField(max_length=12, choices=ESTADOS, default='Pendiente')
+    bloqueado_hasta = models.DateTimeField(null=True, blank=True)
+    # Veces que un proceso tomó el lote; tras MAX_INTENTOS_LOTE fallidos queda en 'Error'
+    intentos = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    creado = models.DateTimeField(auto_now_add=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-creado']
+
+    def __str__(self):
+        return f"Certificados de {self.tipo} - {self.evento.eve_nombre} ({self.estado})"
+
+    def resumen(self):
+        """Número de certificados por estado, con el total y el porcentaje ya procesado."""
+        conteos = dict(self.certificados.values_list('estado').annotate(n=models.Count('pk')))
+        resumen = {estado: conteos.get(estado, 0) for estado, _ in CertificadoLote.ESTADOS}
+        total = sum(resumen.values())
+        return {
+            **resumen,
+            'total': total,
+            'porcentaje': round(100 * (total - resumen['Pendiente']) / total) if total else 100,
+            'estado': self.estado,
+        }
+
+
+class CertificadoLote(models.Model):
+    """Certificado de un destinatario dentro de un lote, con los datos que reemplazan **CLAVE** en el cuerpo."""
+    ESTADOS = [
+        ('Pendiente', 'Pendiente'),
+        ('Enviado', 'Enviado'),
+        ('Error', 'Error'),
+    ]
+    lote = models.ForeignKey(LoteCertificados, on_delete=models.CASCADE, related_name='certificados')
+    usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, blank=True)
+    email = models.EmailField()
+    datos = models.JSONField()
+    estado = models.CharField(max_length=10, choices=ESTADOS, default='Pendiente')
+    error = models.TextField(blank=True, default='')
+    procesado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['lote', 'estado'])]
+
+    def __str__(self):
+        return f"{self.datos.get('NOMBRE', self.email)} ({self.estado})"
+
+
+def _codigo_verificacion():
+    # Sin caracteres que se confunden al copiarlos del PDF (0/O, 1/I)
+    return get_random_string(12, 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789')
+
+
+class CertificadoEmitido(models.Model):
+    """
+    Certificado ya generado de un usuario, con su código de verificación público. El PDF se guarda
+    con el nombre de su huella (hash de la configuración y los datos): si al volver a emitirlo la
+    huella no cambió, se reutiliza el archivo en lugar de generarlo de nuevo.
+    """
+    TIPOS = [
+        ('asistencia', 'Asistencia'),
+        ('participacion', 'Participación'),
+        ('evaluador', 'Evaluador'),
+        ('premiacion', 'Premiación'),
+    ]
+    evento = models.ForeignKey('app_eventos.Evento', on_delete=models.CASCADE, related_name='certificados_emitidos')
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='certificados')
+    codigo = models.CharField(max_length=12, unique=True, default=_codigo_verificacion, editable=False)
+    huella = models.CharField(max_length=64, blank=True, default='')
+    datos = models.JSONField(default=dict)
+    archivo = models.FileField(upload_to='certificados/emitidos/', blank=True)
+    emitido = models.DateTimeField(auto_now_add=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-emitido']
+        unique_together = (('evento', 'tipo', 'usuario'),)
+
+    def __str__(self):
+        return f"Certificado de {self.tipo} - {self.evento.eve_nombre} ({self.codigo})"
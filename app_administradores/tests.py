@@ -1,3 +1,109 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from app_eventos.models import Evento
+from app_usuarios.models import Usuario
+from .certificados import MAX_INTENTOS_LOTE, VIGENCIA_ZIP, eliminar_zips_vencidos, reclamar_lote, registrar_fallo_lote
+from .models import AdministradorEvento, LoteCertificados
 
-# Create your tests here.
+
+class LoteCertificadosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        usuario = Usuario.objects.create_user(username='admin', email='admin@example.com', password='x')
+        cls.evento = Evento.objects.create(
+            eve_nombre='Congreso', eve_descripcion='', eve_ciudad='Manizales', eve_lugar='Centro',
+            eve_fecha_inicio=date(2026, 5, 1), eve_fecha_fin=date(2026, 5, 2), eve_estado='Aprobado',
+            eve_capacidad=100, eve_tienecosto='No',
+            eve_administrador_fk=AdministradorEvento.objects.create(usuario=usuario),
+        )
+
+    def crear_lote(self):
+        return LoteCertificados.objects.create(evento=self.evento, tipo='asistencia')
+
+    def vencer(self, lote):
+        LoteCertificados.objects.filter(pk=lote.pk).update(bloqueado_hasta=timezone.now() - timedelta(seconds=1))
+
+    def test_reclamar_lote_toma_el_mas_antiguo_y_lo_bloquea(self):
+        primero, segundo = self.crear_lote(), self.crear_lote()
+        lote = reclamar_lote()
+        self.assertEqual(lote, primero)
+        lote.refresh_from_db()
+        self.assertEqual((lote.estado, lote.intentos), ('En proceso', 1))
+        self.assertGreater(lote.bloqueado_hasta, timezone.now())
+        self.assertEqual(reclamar_lote(), segundo)
+        self.assertIsNone(reclamar_lote())
+
+    def test_bloqueo_vencido_se_retoma(self):
+        lote = self.crear_lote()
+        reclamar_lote()
+        self.vencer(lote)
+        lote = reclamar_lote()
+        self.assertEqual(lote.intentos, 2)
+
+    def test_fallo_espera_antes_de_reintentar(self):
+        lote = self.crear_lote()
+        self.assertEqual(registrar_fallo_lote(reclamar_lote(), RuntimeError('sin disco')), 'Pendiente')
+        lote.refresh_from_db()
+        self.assertEqual((lote.estado, lote.error), ('Pendiente', 'sin disco'))
+        self.assertIsNone(reclamar_lote())
+        self.vencer(lote)
+        self.assertEqual(reclamar_lote(), lote)
+
+    def test_tras_max_intentos_queda_en_error(self):
+        lote = self.crear_lote()
+        for intento in range(1, MAX_INTENTOS_LOTE + 1):
+            estado = registrar_fallo_lote(reclamar_lote(), RuntimeError(f'fallo {intento}'))
+            self.vencer(lote)
+        self.assertEqual(estado, 'Error')
+        lote.refresh_from_db()
+        self.assertEqual((lote.estado, lote.error), ('Error', f'fallo {MAX_INTENTOS_LOTE}'))
+        self.assertIsNotNone(lote.terminado)
+        self.assertIsNone(reclamar_lote())
+
+    def test_proceso_interrumpido_max_intentos_queda_en_error(self):
+        lote = self.crear_lote()
+        for _ in range(MAX_INTENTOS_LOTE):
+            reclamar_lote()
+            self.vencer(lote)
+        self.assertIsNone(reclamar_lote())
+        lote.refresh_from_db()
+        self.assertEqual(lote.estado, 'Error')
+        self.assertIn('se interrumpió', lote.error)
+
+    def test_comando_registra_el_error_del_lote(self):
+        lote = self.crear_lote()
+        with mock.patch(
+            'app_administradores.management.commands.generar_certificados.procesar_lote',
+            side_effect=RuntimeError('plantilla rota'),
+        ):
+            call_command('generar_certificados', '--max-intentos', '1', stdout=StringIO(), stderr=StringIO())
+        lote.refresh_from_db()
+        self.assertEqual((lote.estado, lote.intentos, lote.error), ('Error', 1, 'plantilla rota'))
+
+    def test_zips_vencidos_se_eliminan(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        with override_settings(MEDIA_ROOT=media):
+            vencido, vigente = self.crear_lote(), self.crear_lote()
+            for lote, terminado in ((vencido, VIGENCIA_ZIP + timedelta(minutes=1)), (vigente, timedelta(minutes=1))):
+                lote.entrega, lote.estado, lote.terminado = 'zip', 'Terminado', timezone.now() - terminado
+                lote.archivo.save(f'lote_{lote.pk}.zip', ContentFile(b'PK'))
+            ruta_vencido, ruta_vigente = vencido.archivo.path, vigente.archivo.path
+
+            call_command('limpiar_zips_certificados', stdout=StringIO())
+
+            vencido.refresh_from_db()
+            vigente.refresh_from_db()
+            self.assertEqual(vencido.archivo.name, '')
+            self.assertFalse(os.path.exists(ruta_vencido))
+            self.assertTrue(vigente.archivo)
+            self.assertTrue(os.path.exists(ruta_vigente))
+            self.assertEqual(eliminar_zips_vencidos(), 0)
@@ -14,6 +14,7 @@ urlpatterns = [
     path('cerrar-inscripciones/<int:eve_id>/', views.cerrar_inscripciones, name='cerrar_inscripcion_evento'),
     path('reabrir-inscripciones/<int:eve_id>/', views.reabrir_inscripciones, name='reabrir_inscripcion_evento'),
     path('ver-inscripciones/<int:eve_id>/', views.ver_inscripciones, name='ver_inscripciones_evento'),
+    path('control-ingreso/<int:eve_id>/', views.control_ingreso, name='control_ingreso'),
     path('ver-asistentes/<int:eve_id>/', views.gestion_asistentes, name='ver_asistentes_evento'),
     path('detalle-asistente/<int:eve_id>/<int:asistente_id>/', views.detalle_asistente, name='detalle_asistente_evento'),
     path('ver-participantes/<int:eve_id>/', views.gestion_participantes, name='ver_participantes_evento'),
@@ -22,9 +23,13 @@ urlpatterns = [
     path('estadisticas-evento/<int:eve_id>/', views.estadisticas_evento, name='estadisticas_evento'),
     path('estaditicas-generales/', views.estadisticas_generales, name='estadisticas_generales'),
     path('dashboard-evaluacion/<int:eve_id>/', views.dashboard_evaluacion, name='dashboard_evaluacion_administrador'),
+    path('progreso-evaluacion/<int:eve_id>/', views.progreso_evaluacion_administrador, name='progreso_evaluacion_administrador'),
+    path('progreso-evaluacion/<int:eve_id>/json/', views.progreso_evaluacion_json, name='progreso_evaluacion_json'),
     path('gestion-item-administrador/<int:eve_id>/', views.gestion_item_administrador, name='gestion_item_administrador_evento'),
     path('agregar-item-administrador/<int:eve_id>/', views.agregar_item_administrador, name='agregar_item_administrador_evento'),
     path('editar-item-administrador/<int:criterio_id>/', views.editar_item_administrador, name='editar_item_administrador_evento'),
+    path('progreso-recalculo-administrador/<int:eve_id>/', views.progreso_recalculo_administrador, name='progreso_recalculo_administrador'),
+    path('simular-pesos-administrador/<int:eve_id>/', views.simular_pesos_administrador, name='simular_pesos_administrador'),
     path('eliminar-item-administrador/<int:criterio_id>/', views.eliminar_item_administrador, name='eliminar_item_administrador_evento'),
     path('tabla-posiciones-administrador/<int:eve_id>/', views.ver_tabla_posiciones, name='tabla_posiciones_administrador'),
     path('descargar-tabla-posiciones-pdf/<int:eve_id>/', views.descargar_tabla_posiciones_pdf_admin, name='descargar_tabla_posiciones_pdf_admin'),
@@ -39,6 +44,9 @@ urlpatterns = [
     path('detalle-evaluador/<int:eve_id>/<int:evaluador_id>/', views.detalle_evaluador, name='detalle_evaluador_evento'),
     path('descargar-documento-evaluador/<int:eve_id>/<int:evaluador_id>/', views.descargar_documento_evaluador, name='descargar_documento_evaluador_evento'),
     path('gestionar-notificaciones/', views.gestionar_notificaciones, name='gestionar_notificaciones'),
+    path('notificaciones/campana/<int:campana_id>/', views.progreso_campana_notificacion, name='progreso_campana_notificacion'),
+    path('notificaciones/campana/<int:campana_id>/json/', views.progreso_campana_json, name='progreso_campana_json'),
+    path('notificaciones/campana/<int:campana_id>/reenviar-fallidos/', views.reenviar_fallidos_campana, name='reenviar_fallidos_campana'),
     
     # URLs para gestión de archivos del evento
     path('gestionar-archivos/<int:eve_id>/', views.gestionar_archivos_evento, name='gestionar_archivos_evento'),
@@ -52,6 +60,10 @@ urlpatterns = [
     # URL específica para premiación debe ir antes que la URL general
     path('certificados/<int:eve_id>/premiacion/enviar/', views.enviar_certificados_premiacion, name='enviar_certificados_premiacion'),
     path('certificados/<int:eve_id>/<str:tipo>/enviar/', views.enviar_certificados, name='enviar_certificados'),
+    path('certificados/<int:eve_id>/<str:tipo>/descargar/', views.descargar_certificados_zip, name='descargar_certificados_zip'),
+    path('certificados/lote/<int:lote_id>/', views.progreso_lote_certificados, name='progreso_lote_certificados'),
+    path('certificados/lote/<int:lote_id>/json/', views.progreso_lote_certificados_json, name='progreso_lote_certificados_json'),
+    path('certificados/lote/<int:lote_id>/zip/', views.descargar_zip_lote, name='descargar_zip_lote'),
 
     path('evento/<int:eve_id>/restriccion_rubrica/', views.restriccion_rubrica, name='restriccion_rubrica'),
 
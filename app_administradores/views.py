@@ -1,6 +1,5 @@
 from django.http import HttpResponse
-from weasyprint import HTML
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.urls import reverse
@@ -22,11 +21,25 @@ from django.shortcuts import redirect
 from .models import AdministradorEvento, CodigoInvitacionAdminEvento, CodigoInvitacionEvento
 from app_eventos.models import Evento
 from app_eventos.models import EventoCategoria
+from app_eventos.qr import adjuntar_qr
+from app_eventos.ingresos import nueva_clave, revocar_dispositivo
+from app_eventos.models import DispositivoIngreso, Ingreso
 from app_areas.models import Area, Categoria
 from app_participantes.models import ParticipanteEvento, Participante
 from app_asistentes.models import AsistenteEvento
-from app_evaluadores.models import Criterio, Calificacion
+from app_evaluadores.models import Criterio, Calificacion, RecalculoPuntajes
 from app_evaluadores.models import EvaluadorEvento, Evaluador
+from app_evaluadores.analitica import tabla_posiciones_normalizada, pesos_candidatos, simular_ranking
+from app_evaluadores.puntajes import tabla_posiciones, ranking_queryset
+from app_evaluadores.matriz import MatrizCalificaciones
+from app_evaluadores.progreso import progreso_evaluacion
+from app_notificaciones.campanas import crear_campana, reenviar_fallidos
+from app_administradores.certificados import (
+    ROL_CERTIFICADO, VIGENCIA_ZIP, certificados_evento, crear_lote, datos_certificado, destinatarios_certificado,
+    html_certificado, pdf_previsualizacion, renderizar_cuerpo,
+)
+from app_administradores.models import LoteCertificados
+from app_notificaciones.models import CampanaNotificacion
 from app_usuarios.models import Usuario
 from app_asistentes.models import Asistente, AsistenteEvento
 from app_participantes.models import Participante, ParticipanteEvento
@@ -36,7 +49,6 @@ from app_eventos.models import ConfiguracionCertificado, EventoCategoria
 from app_usuarios.models import RolUsuario
 from django.contrib.auth.decorators import login_required, user_passes_test
 from app_usuarios.permisos import es_administrador_evento
-import qrcode
 import io
 import mimetypes
 import os
@@ -367,7 +379,7 @@ def _eliminar_informacion_evento_completo(evento):
 @login_required
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
 def cerrar_inscripciones(request, eve_id):
-    evento = Evento.objects.filter(eve_id=eve_id, eve_estado='aprobado').first()
+    evento = Evento.objects.con_estado_efectivo(['aprobado']).filter(eve_id=eve_id).first()
     if evento:
         evento.eve_estado = 'Inscripciones Cerradas'
         evento.save()
@@ -379,7 +391,7 @@ def cerrar_inscripciones(request, eve_id):
 @login_required
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
 def reabrir_inscripciones(request, eve_id):
-    evento = Evento.objects.filter(eve_id=eve_id, eve_estado='inscripciones cerradas').first()
+    evento = Evento.objects.con_estado_efectivo(['inscripciones cerradas']).filter(eve_id=eve_id).first()
     if evento:
         evento.eve_estado = 'Aprobado'
         evento.save()
@@ -394,6 +406,54 @@ def ver_inscripciones(request, eve_id):
     evento = get_object_or_404(Evento, eve_id=eve_id)
     return render(request, 'ver_inscripciones.html', {'evento': evento})
 
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def control_ingreso(request, eve_id):
+    """
+    Dispositivos de la puerta (agregar, rotar la clave o revocar) y conteo de ingresos del día. La
+    clave de un dispositivo solo se muestra al crearla.
+    """
+    evento = get_object_or_404(Evento, eve_id=eve_id)
+    if evento.eve_administrador_fk != request.user.administrador:
+        messages.error(request, "No tienes permisos para gestionar este evento.")
+        return redirect('listar_eventos')
+    if request.method == 'POST':
+        accion = request.POST.get('accion')
+        if accion == 'agregar':
+            nombre = request.POST.get('nombre', '').strip()[:50]
+            if not nombre:
+                messages.error(request, "Debes indicar el nombre del dispositivo.")
+            elif DispositivoIngreso.objects.filter(evento=evento, nombre=nombre).exists():
+                messages.error(request, f"Ya existe un dispositivo llamado {nombre}.")
+            else:
+                clave = nueva_clave(DispositivoIngreso(evento=evento, nombre=nombre))
+                messages.success(request, f"Clave de {nombre}: {clave} — cópiala ahora, no se volverá a mostrar.")
+        elif accion in ('rotar', 'revocar'):
+            try:
+                dispositivo_id = int(request.POST.get('dispositivo_id', ''))
+            except ValueError:
+                raise Http404
+            dispositivo = get_object_or_404(DispositivoIngreso, pk=dispositivo_id, evento=evento, revocado__isnull=True)
+            if accion == 'rotar':
+                clave = nueva_clave(dispositivo)
+                messages.success(request, f"Nueva clave de {dispositivo.nombre}: {clave} — la anterior dejó de funcionar.")
+            else:
+                revocar_dispositivo(dispositivo)
+                messages.success(request, f"El dispositivo {dispositivo.nombre} fue revocado.")
+        return redirect('control_ingreso', eve_id=eve_id)
+    ingresos_hoy = Ingreso.objects.filter(evento=evento, dia=timezone.localdate())
+    conteo = dict(ingresos_hoy.order_by().values_list('tipo').annotate(total=Count('id')))
+    return render(request, 'control_ingreso.html', {
+        'evento': evento,
+        'url_ingreso': request.build_absolute_uri(reverse('ingreso_evento', args=[evento.eve_id])),
+        'url_manifiesto': request.build_absolute_uri(reverse('manifiesto_ingreso', args=[evento.eve_id])),
+        'url_sincronizar': request.build_absolute_uri(reverse('sincronizar_ingresos', args=[evento.eve_id])),
+        'dispositivos': evento.dispositivos_ingreso.all(),
+        'conteo': [(nombre, conteo.get(tipo, 0)) for tipo, nombre in Ingreso.TIPO_CHOICES],
+        'total_hoy': sum(conteo.values()),
+        'ultimos': ingresos_hoy[:20],
+    })
+
 @login_required
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
 def gestion_asistentes(request, eve_id):
@@ -422,25 +482,12 @@ def detalle_asistente(request, eve_id, asistente_id):
     if request.method == 'POST':
         nuevo_estado = request.POST.get('estado')
         estado_actual = asistente_evento.asi_eve_estado
-        enviar_qr = False
-        qr_buffer = None
 
         if nuevo_estado == "Aprobado":
             if estado_actual == "Pendiente":
                 evento.eve_capacidad = max(evento.eve_capacidad - 1, 0)
 
-            if not asistente_evento.asi_eve_qr:
-                
-                data_qr = f"Asistente: {asistente_evento.asistente.usuario.get_full_name()} - Evento: {evento.eve_nombre}"
-                img = qrcode.make(data_qr)
-                qr_buffer = io.BytesIO()
-                img.save(qr_buffer, format='PNG')
-                filename = f"qr_asistente_{asistente_id}_evento_{evento.eve_id}.png"
-                asistente_evento.asi_eve_qr.save(filename, ContentFile(qr_buffer.getvalue()), save=False)
-                enviar_qr = True
-            else:
-                enviar_qr = True
-
+            # El QR se genera al pedirlo a partir del token de la inscripción (app_eventos.qr)
             asistente_evento.asi_eve_estado = nuevo_estado
             evento.save()
             asistente_evento.save()
@@ -491,10 +538,9 @@ def detalle_asistente(request, eve_id, asistente_id):
                 to=[usuario_asistente.email],
             )
             email.content_subtype = 'html'
-            if nuevo_estado == "Aprobado" and asistente_evento.asi_eve_qr:
+            if nuevo_estado == "Aprobado":
                 # Adjuntar QR
-                qr_path = asistente_evento.asi_eve_qr.path
-                email.attach_file(qr_path)
+                adjuntar_qr(email, asistente_evento)
             email.send(fail_silently=True)
 
         return redirect('ver_asistentes_evento', eve_id=eve_id)
@@ -533,20 +579,8 @@ def detalle_participante(request, eve_id, participante_id):
         nuevo_estado = request.POST.get('estado')
         if nuevo_estado:
             usuario = participante.usuario
-            enviar_qr = False
 
             if nuevo_estado == 'Aprobado':
-                if not participante_evento.par_eve_qr:
-                    data_qr = f"Participante: {usuario.first_name} {usuario.last_name} - Evento: {evento.eve_nombre}"
-                    img = qrcode.make(data_qr)
-                    buffer = io.BytesIO()
-                    img.save(buffer, format='PNG')
-                    file_name = f"qr_{get_random_string(8)}.png"
-                    participante_evento.par_eve_qr.save(file_name, ContentFile(buffer.getvalue()), save=False)
-                    enviar_qr = True
-                else:
-                    enviar_qr = True
-
                 participante_evento.par_eve_estado = nuevo_estado
                 participante_evento.save()
 
@@ -565,15 +599,6 @@ def detalle_participante(request, eve_id, participante_id):
                     
                     for integrante in integrantes_grupo:
                         if integrante.par_eve_estado != 'Aprobado':  # Solo actualizar si no está ya aprobado
-                            # Generar QR para cada integrante
-                            if not integrante.par_eve_qr:
-                                data_qr_int = f"Participante: {integrante.participante.usuario.first_name} {integrante.participante.usuario.last_name} - Evento: {evento.eve_nombre}"
-                                img_int = qrcode.make(data_qr_int)
-                                buffer_int = io.BytesIO()
-                                img_int.save(buffer_int, format='PNG')
-                                file_name_int = f"qr_{get_random_string(8)}.png"
-                                integrante.par_eve_qr.save(file_name_int, ContentFile(buffer_int.getvalue()), save=False)
-                            
                             integrante.par_eve_estado = nuevo_estado
                             integrante.save()
                             
@@ -590,9 +615,7 @@ def detalle_participante(request, eve_id, participante_id):
                                     to=[integrante.participante.usuario.email],
                                 )
                                 email.content_subtype = 'html'
-                                if integrante.par_eve_qr:
-                                    qr_path = integrante.par_eve_qr.path
-                                    email.attach_file(qr_path)
+                                adjuntar_qr(email, integrante)
                                 email.send(fail_silently=True)
                     
                     messages.success(request, f"Inscripción aprobada junto con {integrantes_grupo.count()} integrantes más del proyecto grupal")
@@ -715,9 +738,8 @@ def detalle_participante(request, eve_id, participante_id):
                     to=[usuario_participante.email],
                 )
                 email.content_subtype = 'html'
-                if nuevo_estado == 'Aprobado' and participante_evento.par_eve_qr:
-                    qr_path = participante_evento.par_eve_qr.path
-                    email.attach_file(qr_path)
+                if nuevo_estado == 'Aprobado':
+                    adjuntar_qr(email, participante_evento)
                 email.send(fail_silently=True)
 
             return redirect('detalle_participante_evento', eve_id=eve_id, participante_id=participante_id)
@@ -772,18 +794,7 @@ def detalle_evaluador(request, eve_id, evaluador_id):
     if request.method == 'POST':
         nuevo_estado = request.POST.get('estado')
         if nuevo_estado:
-            enviar_qr = False
             if nuevo_estado == 'Aprobado':
-                if not evaluador_evento.eva_eve_qr:
-                    data_qr = f"Evaluador: {usuario.first_name} {usuario.last_name} - Evento: {evento.eve_nombre}"
-                    img = qrcode.make(data_qr)
-                    buffer = io.BytesIO()
-                    img.save(buffer, format='PNG')
-                    file_name = f"qr_{get_random_string(8)}.png"
-                    evaluador_evento.eva_eve_qr.save(file_name, ContentFile(buffer.getvalue()), save=False)
-                    enviar_qr = True
-                else:
-                    enviar_qr = True
                 evaluador_evento.eva_eve_estado = nuevo_estado
                 evaluador_evento.save()
                 messages.success(request, "Inscripción aprobada")
@@ -820,9 +831,8 @@ def detalle_evaluador(request, eve_id, evaluador_id):
                     to=[usuario_evaluador.email],
                 )
                 email.content_subtype = 'html'
-                if nuevo_estado == 'Aprobado' and evaluador_evento.eva_eve_qr:
-                    qr_path = evaluador_evento.eva_eve_qr.path
-                    email.attach_file(qr_path)
+                if nuevo_estado == 'Aprobado':
+                    adjuntar_qr(email, evaluador_evento)
                 email.send(fail_silently=True)
 
             return redirect('detalle_evaluador_evento', eve_id=eve_id, evaluador_id=evaluador_id)
@@ -862,7 +872,7 @@ def descargar_documento_evaluador(request, eve_id, evaluador_id):
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
 def estadisticas_evento(request, eve_id):
     evento = get_object_or_404(Evento, pk=eve_id)
-    if evento.eve_estado.lower() != 'aprobado':
+    if evento.estado_efectivo.lower() != 'aprobado':
         messages.error(request, "Solo puedes ver estadísticas de eventos aprobados.")
         return redirect('listar_eventos')
     asistentes_aprobados = AsistenteEvento.objects.filter(evento=evento, asi_eve_estado='Aprobado').count()
@@ -909,7 +919,7 @@ def estadisticas_generales(request):
     datos_eventos = []
 
     for evento in eventos:
-        estado = evento.eve_estado
+        estado = evento.estado_efectivo
         resumen[estado] = resumen.get(estado, 0) + 1
 
         asistentes_aprobados = AsistenteEvento.objects.filter(
@@ -960,7 +970,7 @@ def dashboard_evaluacion(request, eve_id):
     if evento.eve_administrador_fk != administrador:
         messages.error(request, "No tienes permisos para acceder a este evento.")
         return redirect('listar_eventos')
-    if evento.eve_estado.lower() != 'aprobado':
+    if evento.estado_efectivo.lower() != 'aprobado':
         messages.error(request, "Solo puedes acceder a esta función si el evento está aprobado.")
         return redirect('listar_eventos')
     context = {
@@ -969,11 +979,34 @@ def dashboard_evaluacion(request, eve_id):
     return render(request, 'dashboard_evaluacion.html', context)
 
 
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def progreso_evaluacion_administrador(request, eve_id):
+    evento = get_object_or_404(Evento, pk=eve_id)
+    if evento.eve_administrador_fk != request.user.administrador:
+        messages.error(request, "No tienes permisos para acceder a este evento.")
+        return redirect('listar_eventos')
+    return render(request, 'progreso_evaluacion.html', {
+        'evento': evento,
+        'progreso': progreso_evaluacion(evento),
+    })
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def progreso_evaluacion_json(request, eve_id):
+    """Mismo avance de progreso_evaluacion_administrador en JSON (estados: completo, parcial, pendiente)."""
+    evento = get_object_or_404(Evento, pk=eve_id)
+    if evento.eve_administrador_fk != request.user.administrador:
+        return JsonResponse({'success': False, 'error': 'No tienes permisos para este evento.'}, status=403)
+    return JsonResponse({'success': True, **progreso_evaluacion(evento)})
+
+
 @login_required
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
 def gestion_item_administrador(request, eve_id):
     evento = get_object_or_404(Evento, pk=eve_id)
-    if evento.eve_estado.lower() != 'aprobado':
+    if evento.estado_efectivo.lower() != 'aprobado':
         messages.error(request, "Solo puedes acceder a esta función si el evento está aprobado.")
         return redirect('listar_eventos')
     criterios = Criterio.objects.filter(cri_evento_fk=evento)
@@ -982,6 +1015,7 @@ def gestion_item_administrador(request, eve_id):
         'evento': evento,
         'criterios': criterios,
         'peso_total_actual': peso_total_actual,
+        'recalculo': RecalculoPuntajes.objects.filter(evento=evento).exclude(estado='Terminado').first(),
     }
     return render(request, 'gestion_items.html', context)
 
@@ -990,7 +1024,7 @@ def gestion_item_administrador(request, eve_id):
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
 def agregar_item_administrador(request, eve_id):
     evento = get_object_or_404(Evento, pk=eve_id)
-    if evento.eve_estado.lower() != 'aprobado':
+    if evento.estado_efectivo.lower() != 'aprobado':
         messages.error(request, "Solo puedes acceder a esta función si el evento está aprobado.")
         return redirect('listar_eventos')
     if request.method == 'POST':
@@ -1030,7 +1064,7 @@ def agregar_item_administrador(request, eve_id):
 def editar_item_administrador(request, criterio_id):
     criterio = get_object_or_404(Criterio, pk=criterio_id)
     evento = criterio.cri_evento_fk
-    if evento.eve_estado.lower() != 'aprobado':
+    if evento.estado_efectivo.lower() != 'aprobado':
         messages.error(request, "Solo puedes acceder a esta función si el evento está aprobado.")
         return redirect('listar_eventos')
     criterios_evento = Criterio.objects.filter(cri_evento_fk=evento)
@@ -1060,6 +1094,40 @@ def editar_item_administrador(request, criterio_id):
     return render(request, 'editar_item.html', context)
 
 
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def simular_pesos_administrador(request, eve_id):
+    """Ranking que resultaría con los pesos `peso_<cri_id>` recibidos, sin guardar nada."""
+    evento = get_object_or_404(Evento, pk=eve_id)
+    if evento.eve_administrador_fk != request.user.administrador:
+        return JsonResponse({'success': False, 'error': 'No tienes permisos para este evento.'}, status=403)
+    try:
+        pesos = pesos_candidatos(request.GET)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, 'ranking': simular_ranking(evento, pesos)})
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def progreso_recalculo_administrador(request, eve_id):
+    """Estado del recálculo de puntajes del evento tras un cambio de rúbrica."""
+    evento = get_object_or_404(Evento, pk=eve_id)
+    if evento.eve_administrador_fk != request.user.administrador:
+        return JsonResponse({'success': False, 'error': 'No tienes permisos para este evento.'}, status=403)
+    recalculo = RecalculoPuntajes.objects.filter(evento=evento).first()
+    if not recalculo:
+        return JsonResponse({'success': True, 'estado': 'Terminado', 'procesados': 0, 'total': 0, 'porcentaje': 100})
+    return JsonResponse({
+        'success': True,
+        'estado': recalculo.estado,
+        'procesados': recalculo.procesados,
+        'total': recalculo.total,
+        'porcentaje': recalculo.porcentaje,
+        'error': recalculo.error,
+    })
+
+
 @login_required
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
 def eliminar_item_administrador(request, criterio_id):
@@ -1073,7 +1141,7 @@ def eliminar_item_administrador(request, criterio_id):
 @user_passes_test(es_administrador_evento, login_url='login')
 def restriccion_rubrica(request, eve_id):
     evento = get_object_or_404(Evento, pk=eve_id)
-    if evento.eve_estado.lower() not in ['aprobado', 'inscripciones cerradas']:
+    if evento.estado_efectivo.lower() not in ['aprobado', 'inscripciones cerradas']:
         messages.warning(request, "Solo se puede gestionar rúbricas en eventos aprobados o con inscripciones cerradas.")
         return redirect('listar_eventos')
 
@@ -1100,54 +1168,23 @@ def restriccion_rubrica(request, eve_id):
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
 def ver_tabla_posiciones(request, eve_id):
     evento = get_object_or_404(Evento, pk=eve_id)
-    if evento.eve_estado.lower() != 'aprobado':
+    if evento.estado_efectivo.lower() != 'aprobado':
         messages.error(request, "Solo puedes acceder a esta función si el evento está aprobado.")
         return redirect('listar_eventos')
 
-    criterios = Criterio.objects.filter(cri_evento_fk=evento)
-    peso_total = sum(c.cri_peso for c in criterios) or 1
-
-    # Obtener participantes aprobados y cargar proyecto
-    participantes_evento = ParticipanteEvento.objects.filter(
-        evento=evento,
-        par_eve_estado='Aprobado'
-    ).select_related('participante', 'proyecto')  # 👈 Agregar 'proyecto'
-
-    posiciones = []
-    for pe in participantes_evento:
-        participante = pe.participante
-        
-        # Si ya tenemos la nota guardada, la usamos; si no, la calculamos
-        if pe.par_eve_valor is not None:
-            puntaje_ponderado = pe.par_eve_valor
-        else:
-            calificaciones = Calificacion.objects.filter(
-                participante=participante,
-                criterio__cri_evento_fk=evento
-            ).select_related('criterio')
-            evaluadores_ids = set(c.evaluador_id for c in calificaciones)
-            num_evaluadores = len(evaluadores_ids)
-            if num_evaluadores > 0:
-                puntaje_ponderado = sum(
-                    c.cal_valor * c.criterio.cri_peso for c in calificaciones
-                ) / (peso_total * num_evaluadores)
-                puntaje_ponderado = round(puntaje_ponderado, 2)
-                pe.par_eve_valor = puntaje_ponderado
-                pe.save()
-            else:
-                puntaje_ponderado = 0
-
-        posiciones.append({
-            'participante': participante,
-            'puntaje': puntaje_ponderado,
-            'proyecto': pe.proyecto  # 👈 Guardar el proyecto
-        })
-
-    posiciones.sort(key=lambda x: x['puntaje'], reverse=True)
+    posiciones = tabla_posiciones(evento)
+    # Modo opcional que corrige la severidad de cada evaluador (z-score por evaluador)
+    modo = request.GET.get('modo')
+    analisis = None
+    if modo == 'normalizado':
+        posiciones, analisis = tabla_posiciones_normalizada(evento, posiciones)
 
     return render(request, 'tabla_posiciones.html', {
         'evento': evento,
-        'posiciones': posiciones
+        'posiciones': posiciones,
+        'modo': modo,
+        'analisis': analisis,
+        'recalculo': RecalculoPuntajes.objects.filter(evento=evento).exclude(estado='Terminado').first(),
     })
 
 @login_required
@@ -1159,11 +1196,7 @@ def descargar_tabla_posiciones_pdf_admin(request, eve_id):
         return redirect('dashboard_adminevento')
 
     # Obtener participantes calificados y ordenados
-    participantes_evento = ParticipanteEvento.objects.filter(
-        evento=evento,
-        par_eve_estado='Aprobado',
-        par_eve_valor__isnull=False
-    ).select_related('participante__usuario', 'proyecto').order_by('-par_eve_valor')
+    posiciones = [p for p in tabla_posiciones(evento) if p['calificado']]
 
     # Crear la respuesta HTTP con el contenido PDF
     response = HttpResponse(content_type='application/pdf')
@@ -1198,11 +1231,12 @@ def descargar_tabla_posiciones_pdf_admin(request, eve_id):
     # Preparar datos para la tabla
     data = [["Posición", "Nombre del Participante", "Correo", "Proyecto Grupal / Individual", "Puntaje"]]
 
-    for i, pe in enumerate(participantes_evento, start=1):
-        nombre = f"{pe.participante.usuario.first_name} {pe.participante.usuario.last_name}"
-        correo = pe.participante.usuario.email
-        proyecto = pe.proyecto.titulo if pe.proyecto else "Individual"
-        puntaje = f"{pe.par_eve_valor:.2f}"
+    for i, posicion in enumerate(posiciones, start=1):
+        usuario = posicion['participante'].usuario
+        nombre = f"{usuario.first_name} {usuario.last_name}"
+        correo = usuario.email
+        proyecto = posicion['proyecto'].titulo if posicion['proyecto'] else "Individual"
+        puntaje = f"{posicion['puntaje']:.2f}"
 
         data.append([str(i), nombre, correo, Paragraph(proyecto, styles['Normal']), puntaje])
 
@@ -1296,38 +1330,29 @@ def info_detallada_admin(request, eve_id):
     if evento.eve_administrador_fk != administrador:
         messages.error(request, "No tienes permisos para acceder a este evento.")
         return redirect('listar_eventos')
-    if evento.eve_estado.lower() != 'aprobado':
+    if evento.estado_efectivo.lower() != 'aprobado':
         messages.error(request, "Solo puedes acceder a esta función si el evento está aprobado.")
         return redirect('listar_eventos')
-    criterios = Criterio.objects.filter(cri_evento_fk=evento)
-    participantes_evento = ParticipanteEvento.objects.filter(
+    criterios = list(Criterio.objects.filter(cri_evento_fk=evento).order_by('cri_id'))
+    participantes_evento = list(ParticipanteEvento.objects.filter(
         evento=evento,
         par_eve_estado='Aprobado'
-    ).select_related('participante')
+    ).select_related('participante__usuario'))
+    # Todas las calificaciones del evento en una consulta; los agregados salen de la matriz
+    matriz = MatrizCalificaciones.del_evento(evento, [pe.participante_id for pe in participantes_evento], criterios=criterios)
+    evaluadores = Evaluador.objects.select_related('usuario').in_bulk(list(matriz.evaluadores))
     participantes_info = []
     for pe in participantes_evento:
         participante = pe.participante
-        calificaciones = Calificacion.objects.select_related('criterio').filter(
-            participante=participante,
-            criterio__cri_evento_fk=evento
-        )
-        evaluadores = {c.evaluador_id for c in calificaciones}
-        num_evaluadores = len(evaluadores)
-        criterios_evaluados = {c.criterio_id for c in calificaciones}
-        total_criterios = criterios.count()
-        if num_evaluadores > 0:
-            total = sum([
-                (c.cal_valor * c.criterio.cri_peso) / 100 for c in calificaciones
-            ])
-            promedio_ponderado = round(total / num_evaluadores, 2)
-        else:
-            promedio_ponderado = None
         participantes_info.append({
             'participante': participante,
-            'evaluados': len(criterios_evaluados),
-            'total_criterios': total_criterios,
-            'calificaciones': calificaciones,
-            'promedio_ponderado': promedio_ponderado,
+            'evaluados': matriz.criterios_evaluados(participante.pk),
+            'total_criterios': len(criterios),
+            'calificaciones': [
+                {'evaluador': evaluadores[evaluador_id], 'criterio': criterio, 'cal_valor': valor}
+                for evaluador_id, criterio, valor in matriz.calificaciones(participante.pk)
+            ],
+            'promedio_ponderado': matriz.promedio_ponderado(participante.pk),
         })
     context = {
         'evento': evento,
@@ -1340,7 +1365,7 @@ def info_detallada_admin(request, eve_id):
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
 def gestionar_notificaciones(request):
     administrador = request.user.administrador
-    eventos = Evento.objects.filter(eve_administrador_fk=administrador, eve_estado__iexact='Aprobado')
+    eventos = Evento.objects.con_estado_efectivo(['Aprobado']).filter(eve_administrador_fk=administrador)
     tipo = request.GET.get('tipo', 'asistentes')
     evento_id = request.GET.get('evento')
     filtro_nombre = request.GET.get('nombre', '').strip()
@@ -1399,54 +1424,31 @@ def gestionar_notificaciones(request):
         asunto = request.POST.get('asunto', '').strip()
         mensaje = request.POST.get('mensaje', '').strip()
         seleccionados = request.POST.getlist('seleccionados')
-        if not asunto or not mensaje or not seleccionados:
+        if not asunto or not mensaje or not seleccionados or not evento_id:
             messages.error(request, 'Debes completar el asunto, mensaje y seleccionar al menos un destinatario.')
         else:
-            enviados = 0
+            evento = get_object_or_404(Evento, pk=evento_id, eve_administrador_fk=administrador)
             if tipo == 'asistentes':
-                qs = AsistenteEvento.objects.select_related('asistente__usuario').filter(pk__in=seleccionados)
-                for ae in qs:
-                    usuario = ae.asistente.usuario
-                    if usuario.email:
-                        email = EmailMessage(
-                            subject=asunto,
-                            body=mensaje,
-                            to=[usuario.email],
-                        )
-                        email.content_subtype = 'html'
-                        email.send(fail_silently=True)
-                        enviados += 1
+                qs = AsistenteEvento.objects.filter(evento=evento, pk__in=seleccionados)
+                usuario = 'asistente__usuario__'
             elif tipo == 'participantes':
-                qs = ParticipanteEvento.objects.select_related('participante__usuario').filter(pk__in=seleccionados)
-                for pe in qs:
-                    usuario = pe.participante.usuario
-                    if usuario.email:
-                        email = EmailMessage(
-                            subject=asunto,
-                            body=mensaje,
-                            to=[usuario.email],
-                        )
-                        email.content_subtype = 'html'
-                        email.send(fail_silently=True)
-                        enviados += 1
-            elif tipo == 'evaluadores':
-                qs = EvaluadorEvento.objects.select_related('evaluador__usuario').filter(pk__in=seleccionados)
-                for ee in qs:
-                    usuario = ee.evaluador.usuario
-                    if usuario.email:
-                        email = EmailMessage(
-                            subject=asunto,
-                            body=mensaje,
-                            to=[usuario.email],
-                        )
-                        email.content_subtype = 'html'
-                        email.send(fail_silently=True)
-                        enviados += 1
-            messages.success(request, f'Notificaciones enviadas a {enviados} destinatario(s).')
-            return redirect('gestionar_notificaciones')
+                qs = ParticipanteEvento.objects.filter(evento=evento, pk__in=seleccionados)
+                usuario = 'participante__usuario__'
+            else:
+                tipo = 'evaluadores'
+                qs = EvaluadorEvento.objects.filter(evento=evento, pk__in=seleccionados)
+                usuario = 'evaluador__usuario__'
+            # El envío lo hace el comando enviar_campanas; aquí solo se registra la campaña
+            campana = crear_campana(evento, tipo, asunto, mensaje, [
+                (email, f'{nombre} {apellido}')
+                for email, nombre, apellido in qs.values_list(usuario + 'email', usuario + 'first_name', usuario + 'last_name')
+            ])
+            messages.success(request, f'Notificación en cola para {campana.destinatarios.count()} destinatario(s).')
+            return redirect('progreso_campana_notificacion', campana_id=campana.pk)
 
     return render(request, 'gestionar_notificaciones.html', {
         'eventos': eventos,
+        'campanas': CampanaNotificacion.objects.filter(evento__eve_administrador_fk=administrador).select_related('evento')[:10],
         'tipo': tipo,
         'evento_id': evento_id,
         'destinatarios': destinatarios,
@@ -1460,6 +1462,47 @@ def gestionar_notificaciones(request):
     })
 
 
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def progreso_campana_notificacion(request, campana_id):
+    campana = get_object_or_404(
+        CampanaNotificacion.objects.select_related('evento'),
+        pk=campana_id, evento__eve_administrador_fk=request.user.administrador
+    )
+    return render(request, 'progreso_campana.html', {
+        'campana': campana,
+        'resumen': campana.resumen(),
+        'fallidos': campana.destinatarios.filter(estado='Fallido').order_by('email'),
+    })
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def progreso_campana_json(request, campana_id):
+    """Avance de la campaña: destinatarios por estado, total, porcentaje procesado y estado de la campaña."""
+    campana = CampanaNotificacion.objects.filter(
+        pk=campana_id, evento__eve_administrador_fk=request.user.administrador
+    ).first()
+    if campana is None:
+        return JsonResponse({'success': False, 'error': 'Campaña no encontrada.'}, status=404)
+    return JsonResponse({'success': True, **campana.resumen()})
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+@require_http_methods(['POST'])
+def reenviar_fallidos_campana(request, campana_id):
+    campana = get_object_or_404(
+        CampanaNotificacion, pk=campana_id, evento__eve_administrador_fk=request.user.administrador
+    )
+    reenviados = reenviar_fallidos(campana)
+    if reenviados:
+        messages.success(request, f'{reenviados} destinatario(s) fallidos vuelven a la cola de envío.')
+    else:
+        messages.info(request, 'La campaña no tiene destinatarios fallidos.')
+    return redirect('progreso_campana_notificacion', campana_id=campana.pk)
+
+
 @login_required
 @user_passes_test(es_administrador_evento, login_url='ver_eventos')
 def gestionar_archivos_evento(request, eve_id):
@@ -1540,35 +1583,6 @@ def eliminar_archivo_evento(request, eve_id):
 # FUNCIONES HELPER
 # ===============================
 
-def imagen_to_base64(imagen_field):
-    """Convierte un campo de imagen de Django a base64 para usar en PDFs"""
-    if imagen_field and hasattr(imagen_field, 'path'):
-        try:
-            with open(imagen_field.path, 'rb') as image_file:
-                encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
-                # Detectar el formato de la imagen
-                mime_type, _ = mimetypes.guess_type(imagen_field.path)
-                if mime_type:
-                    format_name = mime_type.split('/')[1]
-                else:
-                    # Fallback basado en la extensión
-                    ext = os.path.splitext(imagen_field.path)[1].lower()
-                    if ext in ['.jpg', '.jpeg']:
-                        format_name = 'jpeg'
-                    elif ext == '.png':
-                        format_name = 'png'
-                    elif ext == '.gif':
-                        format_name = 'gif'
-                    else:
-                        format_name = 'jpeg'  # default
-                
-                return encoded_string, format_name
-        except Exception as e:
-            print(f"Error al convertir imagen a base64: {e}")
-            return None, None
-    return None, None
-
-
 # ===============================
 # GESTIÓN DE CERTIFICADOS
 # ===============================
@@ -1720,28 +1734,13 @@ def previsualizar_certificado(request, eve_id, tipo):
         datos_ejemplo['PUNTUACION'] = '95'
     
     # Renderizar el cuerpo con datos de ejemplo
-    cuerpo_con_datos = configuracion.cuerpo
-    for clave, valor in datos_ejemplo.items():
-        cuerpo_con_datos = cuerpo_con_datos.replace(f'**{clave}**', valor)
+    cuerpo_con_datos = renderizar_cuerpo(configuracion, datos_ejemplo)
     
     if request.GET.get('formato') == 'pdf':
-        # Convertir imágenes a base64 para el PDF
-        logo_base64, logo_format = imagen_to_base64(configuracion.logo)
-        firma_base64, firma_format = imagen_to_base64(configuracion.firma)
-        
         # Generar PDF de previsualización
-        html_content = render_to_string('certificado_plantilla.html', {
-            'configuracion': configuracion,
-            'cuerpo_renderizado': cuerpo_con_datos,
-            'datos': datos_ejemplo,
-            'es_preview': True,
-            'logo_base64': logo_base64,
-            'logo_format': logo_format,
-            'firma_base64': firma_base64,
-            'firma_format': firma_format,
-        })
+        html_content = html_certificado(configuracion, datos_ejemplo, es_preview=True)
         
-        pdf_file = HTML(string=html_content, base_url=request.build_absolute_uri()).write_pdf()
+        pdf_file = pdf_previsualizacion(configuracion, html_content)
         response = HttpResponse(pdf_file, content_type='application/pdf')
         response['Content-Disposition'] = f'inline; filename="preview_certificado_{tipo}.pdf"'
         return response
@@ -1772,107 +1771,22 @@ def enviar_certificados(request, eve_id, tipo):
         return redirect('configurar_certificado', eve_id=eve_id, tipo=tipo)
     
     # Obtener destinatarios según el tipo
-    destinatarios = []
-    if tipo == 'asistencia':
-        destinatarios = AsistenteEvento.objects.filter(
-            evento=evento, 
-            confirmado=True,
-            asi_eve_estado='Aprobado'
-        ).select_related('asistente__usuario')
-    elif tipo == 'participacion':
-        destinatarios = ParticipanteEvento.objects.filter(
-            evento=evento, 
-            confirmado=True,
-            par_eve_estado='Aprobado'
-        ).select_related('participante__usuario')
-    elif tipo == 'evaluador':
-        destinatarios = EvaluadorEvento.objects.filter(
-            evento=evento, 
-            confirmado=True,
-            eva_eve_estado='Aprobado'
-        ).select_related('evaluador__usuario')
+    destinatarios = destinatarios_certificado(evento, tipo)
     
     if request.method == 'POST':
-        
-        destinatarios_seleccionados = request.POST.getlist('destinatarios')
-
-        if not destinatarios_seleccionados:
+        seleccionados = set(request.POST.getlist('destinatarios'))
+        rol = ROL_CERTIFICADO.get(tipo)
+        certificados = [
+            (usuario, datos_certificado(evento, usuario))
+            for usuario in (getattr(d, rol).usuario for d in destinatarios if str(d.pk) in seleccionados)
+        ]
+        if not certificados:
             messages.error(request, "Debe seleccionar al menos un destinatario.")
         else:
-            # Procesar envío de certificados
-            enviados = 0
-            errores = []
-            
-            for dest_id in destinatarios_seleccionados:
-                try:
-                    # Buscar destinatario según el tipo
-                    if tipo == 'asistencia':
-                        dest_obj = AsistenteEvento.objects.get(id=dest_id)
-                        usuario = dest_obj.asistente.usuario
-                    elif tipo == 'participacion':
-                        dest_obj = ParticipanteEvento.objects.get(id=dest_id)
-                        usuario = dest_obj.participante.usuario
-                    elif tipo == 'evaluador':
-                        dest_obj = EvaluadorEvento.objects.get(id=dest_id)
-                        usuario = dest_obj.evaluador.usuario
-                    
-                    # Preparar datos del certificado
-                    datos_certificado = {
-                        'NOMBRE': f'{usuario.first_name} {usuario.last_name}',
-                        'DOCUMENTO': usuario.documento,
-                        'EVENTO': evento.eve_nombre,
-                        'FECHA': evento.eve_fecha_inicio.strftime('%d de %B de %Y'),
-                        'CIUDAD': evento.eve_ciudad,
-                        'LUGAR': evento.eve_lugar,
-                    }
-                    
-                    # Renderizar el cuerpo del certificado
-                    cuerpo_con_datos = configuracion.cuerpo
-                    for clave, valor in datos_certificado.items():
-                        cuerpo_con_datos = cuerpo_con_datos.replace(f'**{clave}**', valor)
-                    
-                    # Convertir imágenes a base64 para el PDF
-                    logo_base64, logo_format = imagen_to_base64(configuracion.logo)
-                    firma_base64, firma_format = imagen_to_base64(configuracion.firma)
-                    
-                    # Generar PDF del certificado
-                    html_content = render_to_string('app_administradores/certificado_plantilla.html', {
-                        'configuracion': configuracion,
-                        'cuerpo_renderizado': cuerpo_con_datos,
-                        'datos': datos_certificado,
-                        'es_preview': False,
-                        'logo_base64': logo_base64,
-                        'logo_format': logo_format,
-                        'firma_base64': firma_base64,
-                        'firma_format': firma_format,
-                    })
-                    
-                    pdf_file = HTML(string=html_content, base_url=request.build_absolute_uri()).write_pdf()
-                    
-                    # Enviar por correo electrónico
-                    email = EmailMessage(
-                        subject=f'Certificado de {tipo.title()} - {evento.eve_nombre}',
-                        body=f'Estimado/a {datos_certificado["NOMBRE"]},\n\nAdjuntamos su certificado de {tipo} del evento "{evento.eve_nombre}".\n\nSaludos cordiales.',
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        to=[usuario.email],
-                    )
-                    
-                    filename = f'certificado_{tipo}_{usuario.documento}.pdf'
-                    email.attach(filename, pdf_file, 'application/pdf')
-                    email.send()
-                    
-                    enviados += 1
-                    
-                except Exception as e:
-                    errores.append(f'{usuario.email}: {str(e)}')
-            
-            if enviados > 0:
-                messages.success(request, f"Se enviaron {enviados} certificados correctamente.")
-            
-            if errores:
-                messages.warning(request, f"Errores en el envío: {', '.join(errores)}")
-            
-            return redirect('enviar_certificados', eve_id=eve_id, tipo=tipo)
+            # Los PDF se generan en segundo plano (comando generar_certificados)
+            lote = crear_lote(evento, tipo, certificados)
+            messages.success(request, f"Se están generando {len(certificados)} certificados; se enviarán a medida que estén listos.")
+            return redirect('progreso_lote_certificados', lote_id=lote.pk)
     
     # Verificar advertencias para mostrar en el template
     advertencias = []
@@ -1886,7 +1800,8 @@ def enviar_certificados(request, eve_id, tipo):
         'tipo': tipo,
         'configuracion': configuracion,
         'destinatarios': destinatarios,
-        'advertencias': advertencias
+        'advertencias': advertencias,
+        'lotes': LoteCertificados.objects.filter(evento=evento, tipo=tipo)[:5],
     })
 
 
@@ -1908,19 +1823,11 @@ def enviar_certificados_premiacion(request, eve_id):
         messages.error(request, "Debe configurar el certificado de premiación primero.")
         return redirect('configurar_certificado', eve_id=eve_id, tipo='premiacion')
     
-    # Obtener participantes con calificación final usando par_eve_valor
-    participantes_con_puntuacion = []
-    
-    # Obtener todos los participantes confirmados del evento que tienen calificación
-    participantes_evento = ParticipanteEvento.objects.filter(
-        evento=evento, 
-        confirmado=True,
-        par_eve_estado='Aprobado',
-        par_eve_valor__isnull=False
-    ).select_related('participante__usuario').order_by('-par_eve_valor')
-    
-    for participante_evento in participantes_evento:
-        participantes_con_puntuacion.append({
+    # Ranking con empates (RANK) calculado en la base de datos sobre par_eve_valor
+    participantes_evento = ranking_queryset(evento).select_related('participante__usuario')
+
+    participantes_ranking = [
+        {
             'id': participante_evento.id,
             'participante_evento': participante_evento,
             'participante': participante_evento.participante,
@@ -1928,100 +1835,29 @@ def enviar_certificados_premiacion(request, eve_id):
             'documento': participante_evento.participante.usuario.documento,
             'email': participante_evento.participante.usuario.email,
             'estado': participante_evento.par_eve_estado,
-            'puntuacion_total': participante_evento.par_eve_valor
-        })
-    
-    # Asignar puestos considerando empates basados en par_eve_valor
-    participantes_ranking = []
-    puesto_actual = 1
-    
-    for i, participante in enumerate(participantes_con_puntuacion):
-        # Si no es el primero y tiene la misma puntuación que el anterior, mantiene el puesto
-        if i > 0 and participante['puntuacion_total'] == participantes_con_puntuacion[i-1]['puntuacion_total']:
-            participante['puesto'] = participantes_ranking[i-1]['puesto']
-        else:
-            participante['puesto'] = puesto_actual
-        
-        participantes_ranking.append(participante)
-        puesto_actual = i + 2  # Siguiente puesto disponible
+            'puntuacion_total': participante_evento.par_eve_valor,
+            'puesto': participante_evento.puesto,
+        }
+        for participante_evento in participantes_evento
+    ]
     
     if request.method == 'POST':
-        participantes_seleccionados = request.POST.getlist('participantes')  
-        if not participantes_seleccionados:
+        seleccionados = set(request.POST.getlist('participantes'))
+        certificados = [
+            (p['participante'].usuario, datos_certificado(
+                evento, p['participante'].usuario,
+                PUESTO=f"{p['puesto']}°",
+                PUNTUACION=str(p['puntuacion_total']),
+            ))
+            for p in participantes_ranking if str(p['id']) in seleccionados
+        ]
+        if not certificados:
             messages.error(request, "Debe seleccionar al menos un participante.")
         else:
-            # Procesar envío de certificados
-            enviados = 0
-            errores = []
-            
-            # Crear diccionario para acceso rápido por ID
-            participantes_dict = {str(p['id']): p for p in participantes_ranking}
-            
-            for part_id in participantes_seleccionados:
-                try:
-                    participante_data = participantes_dict[part_id]
-                    participante_evento = participante_data['participante_evento']
-                    usuario = participante_data['participante'].usuario
-                    
-                    # Preparar datos del certificado incluyendo PUESTO
-                    datos_certificado = {
-                        'NOMBRE': f'{usuario.first_name} {usuario.last_name}',
-                        'DOCUMENTO': usuario.documento,
-                        'EVENTO': evento.eve_nombre,
-                        'FECHA': evento.eve_fecha_inicio.strftime('%d de %B de %Y'),
-                        'CIUDAD': evento.eve_ciudad,
-                        'LUGAR': evento.eve_lugar,
-                        'PUESTO': f"{participante_data['puesto']}°",
-                        'PUNTUACION': str(participante_data['puntuacion_total'])
-                    }
-                    
-                    # Renderizar el cuerpo del certificado
-                    cuerpo_con_datos = configuracion.cuerpo
-                    for clave, valor in datos_certificado.items():
-                        cuerpo_con_datos = cuerpo_con_datos.replace(f'**{clave}**', valor)
-                    
-                    # Convertir imágenes a base64 para el PDF
-                    logo_base64, logo_format = imagen_to_base64(configuracion.logo)
-                    firma_base64, firma_format = imagen_to_base64(configuracion.firma)
-                    
-                    # Generar PDF del certificado
-                    html_content = render_to_string('app_administradores/certificado_plantilla.html', {
-                        'configuracion': configuracion,
-                        'cuerpo_renderizado': cuerpo_con_datos,
-                        'datos': datos_certificado,
-                        'es_preview': False,
-                        'logo_base64': logo_base64,
-                        'logo_format': logo_format,
-                        'firma_base64': firma_base64,
-                        'firma_format': firma_format,
-                    })
-                    
-                    pdf_file = HTML(string=html_content, base_url=request.build_absolute_uri()).write_pdf()
-                    
-                    # Enviar por correo electrónico
-                    email = EmailMessage(
-                        subject=f'Certificado de Premiación - {evento.eve_nombre}',
-                        body=f'Estimado/a {datos_certificado["NOMBRE"]},\n\n¡Felicitaciones! Adjuntamos su certificado de premiación del evento "{evento.eve_nombre}" donde obtuvo el {datos_certificado["PUESTO"]} lugar con una puntuación de {datos_certificado["PUNTUACION"]} puntos.\n\nSaludos cordiales.',
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        to=[usuario.email],
-                    )
-                    
-                    filename = f'certificado_premiacion_{usuario.documento}.pdf'
-                    email.attach(filename, pdf_file, 'application/pdf')
-                    email.send()
-                    
-                    enviados += 1
-                    
-                except Exception as e:
-                    errores.append(f'{participante_data["email"]}: {str(e)}')
-            
-            if enviados > 0:
-                messages.success(request, f"Se enviaron {enviados} certificados de premiación correctamente.")
-            
-            if errores:
-                messages.warning(request, f"Errores en el envío: {', '.join(errores)}")
-            
-            return redirect('enviar_certificados_premiacion', eve_id=eve_id)
+            # Los PDF se generan en segundo plano (comando generar_certificados)
+            lote = crear_lote(evento, 'premiacion', certificados)
+            messages.success(request, f"Se están generando {len(certificados)} certificados de premiación; se enviarán a medida que estén listos.")
+            return redirect('progreso_lote_certificados', lote_id=lote.pk)
     
     # Verificar advertencias para mostrar en el template
     advertencias = []
@@ -2034,10 +1870,96 @@ def enviar_certificados_premiacion(request, eve_id):
         'evento': evento,
         'configuracion': configuracion,
         'participantes_ranking': participantes_ranking,
-        'advertencias': advertencias
+        'advertencias': advertencias,
+        'lotes': LoteCertificados.objects.filter(evento=evento, tipo='premiacion')[:5],
+    })
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def descargar_certificados_zip(request, eve_id, tipo):
+    """
+    Pide un ZIP con el certificado de cada destinatario del tipo. Lo genera el comando
+    generar_certificados y se descarga desde la página de avance del lote.
+    """
+    evento = get_object_or_404(Evento, eve_id=eve_id)
+    
+    # Verificar que el usuario sea el administrador del evento
+    if evento.eve_administrador_fk != request.user.administrador:
+        messages.error(request, "No tienes permisos para gestionar certificados de este evento.")
+        return redirect('gestionar_certificados')
+    
+    if tipo not in ['asistencia', 'participacion', 'evaluador', 'premiacion']:
+        messages.error(request, "Tipo de certificado no válido.")
+        return redirect('seleccionar_tipo_certificado', eve_id=eve_id)
+    
+    if request.method != 'POST':
+        if tipo == 'premiacion':
+            return redirect('enviar_certificados_premiacion', eve_id=eve_id)
+        return redirect('enviar_certificados', eve_id=eve_id, tipo=tipo)
+    
+    if not ConfiguracionCertificado.objects.filter(evento=evento, tipo=tipo).exists():
+        messages.error(request, "Debe configurar el certificado primero.")
+        return redirect('configurar_certificado', eve_id=eve_id, tipo=tipo)
+    
+    # Si ya hay un ZIP de este tipo en preparación, se muestra ese en lugar de generar otro
+    lote = LoteCertificados.objects.filter(
+        evento=evento, tipo=tipo, entrega='zip', estado__in=['Pendiente', 'En proceso']
+    ).first()
+    if lote is None:
+        certificados = list(certificados_evento(evento, tipo))
+        if not certificados:
+            messages.error(request, "No hay destinatarios para este certificado.")
+            if tipo == 'premiacion':
+                return redirect('enviar_certificados_premiacion', eve_id=eve_id)
+            return redirect('enviar_certificados', eve_id=eve_id, tipo=tipo)
+        lote = crear_lote(evento, tipo, certificados, entrega='zip')
+        messages.success(request, f"Se está preparando el ZIP con {len(certificados)} certificados; podrás descargarlo aquí cuando esté listo.")
+    return redirect('progreso_lote_certificados', lote_id=lote.pk)
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def descargar_zip_lote(request, lote_id):
+    """ZIP ya generado de un lote con entrega 'zip'."""
+    lote = get_object_or_404(
+        LoteCertificados, pk=lote_id, entrega='zip', evento__eve_administrador_fk=request.user.administrador
+    )
+    if not lote.archivo:
+        raise Http404("El ZIP aún no está listo o ya venció")
+    return FileResponse(
+        lote.archivo.open('rb'), as_attachment=True,
+        filename=f'certificados_{lote.tipo}_{lote.evento_id}.zip', content_type='application/zip',
+    )
+
+
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def progreso_lote_certificados(request, lote_id):
+    lote = get_object_or_404(
+        LoteCertificados.objects.select_related('evento'),
+        pk=lote_id, evento__eve_administrador_fk=request.user.administrador
+    )
+    return render(request, 'progreso_lote_certificados.html', {
+        'lote': lote,
+        'resumen': lote.resumen(),
+        'zip_disponible_hasta': lote.terminado + VIGENCIA_ZIP if lote.archivo and lote.terminado else None,
+        'errores': lote.certificados.filter(estado='Error').order_by('pk'),
     })
 
 
+@login_required
+@user_passes_test(es_administrador_evento, login_url='ver_eventos')
+def progreso_lote_certificados_json(request, lote_id):
+    """Avance del lote: certificados por estado, total, porcentaje procesado y estado del lote."""
+    lote = LoteCertificados.objects.filter(
+        pk=lote_id, evento__eve_administrador_fk=request.user.administrador
+    ).first()
+    if lote is None:
+        return JsonResponse({'success': False, 'error': 'Lote no encontrado.'}, status=404)
+    return JsonResponse({'success': True, **lote.resumen()})
+
+
 # ===============================
 # GESTIÓN DE CÓDIGOS DE INVITACIÓN
 # ===============================
@@ -2049,9 +1971,8 @@ def crear_codigo_invitacion(request):
     administrador = request.user.administrador
     
     # Obtener solo eventos aprobados del administrador
-    eventos_aprobados = Evento.objects.filter(
-        eve_administrador_fk=administrador,
-        eve_estado__iexact='Aprobado'
+    eventos_aprobados = Evento.objects.con_estado_efectivo(['Aprobado']).filter(
+        eve_administrador_fk=administrador
     ).order_by('-eve_fecha_inicio')
     
     if request.method == 'POST':
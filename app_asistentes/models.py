@@ -1,5 +1,6 @@
 from django.db import models
 from app_eventos.models import Evento
+from app_eventos.qr import url_qr
 from app_usuarios.models import Usuario
 
 class Asistente(models.Model):
@@ -18,4 +19,9 @@ class AsistenteEvento(models.Model):
     confirmado = models.BooleanField(default=False)
 
     class Meta:
-        unique_together = (('asistente', 'evento'),)
\ No newline at end of file
+        unique_together = (('asistente', 'evento'),)
+
+    @property
+    def qr_url(self):
+        """URL del QR de acceso, generado al pedirlo; solo las inscripciones aprobadas tienen QR."""
+        return url_qr(self) if self.asi_eve_estado == 'Aprobado' else None
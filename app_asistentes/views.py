@@ -5,6 +5,7 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.urls import reverse
 from app_usuarios.permisos import es_asistente
 from app_asistentes.models import AsistenteEvento
+from app_administradores.models import CertificadoEmitido
 from app_eventos.models import Evento
 import mimetypes
 import os
@@ -21,7 +22,7 @@ def dashboard_asistente(request):
         'total': relaciones.count(),
         'pendientes': relaciones.filter(asi_eve_estado='Pendiente').count(),
         'aprobados': relaciones.filter(asi_eve_estado='Aprobado').count(),
-        'con_qr': relaciones.filter(asi_eve_qr__isnull=False).count(),
+        'con_qr': relaciones.filter(asi_eve_estado='Aprobado').count(),
     }
 
     # Agregar información sobre memorias disponibles para cada relación
@@ -38,7 +39,8 @@ def dashboard_asistente(request):
     return render(request, 'app_asistentes/dashboard_asistente.html', {
         'relaciones': relaciones,
         'relaciones_con_memorias': relaciones_con_memorias,
-        'estadisticas': estadisticas
+        'estadisticas': estadisticas,
+        'certificados': CertificadoEmitido.objects.filter(usuario=request.user, tipo__in=['asistencia']).exclude(archivo='').select_related('evento'),
     })
 
 @login_required
@@ -0,0 +1,246 @@
+"""
+Analítica de calificaciones con NumPy sobre el tensor participante × evaluador × criterio.
+
+Corrige la severidad de cada evaluador normalizando sus puntajes (z-score) y mide qué tan
+de acuerdo están los evaluadores (alfa de Krippendorff, métrica de intervalo). Todo se calcula
+vectorizado, sin recorrer participantes en Python.
+"""
+import numpy as np
+from django.core.cache import cache
+from app_evaluadores.models import Calificacion, Criterio
+from app_evaluadores.puntajes import notas_proyectos, version_puntajes
+from app_participantes.models import ParticipanteEvento
+
+# Las claves llevan la versión de puntajes del evento, igual que el ranking en caché
+TIEMPO_CACHE_SIMULACION = 60 * 60
+
+
+def cargar_tensor(evento, criterios=None):
+    """
+    Carga en una consulta las calificaciones de los participantes aprobados del evento.
+    Retorna (tensor int8 P×E×C con 0 = sin calificar, ids de participantes, ids de evaluadores, criterios).
+    """
+    criterios = list(criterios if criterios is not None else Criterio.objects.filter(cri_evento_fk=evento).order_by('cri_id'))
+    aprobados = ParticipanteEvento.objects.filter(evento=evento, par_eve_estado='Aprobado').values('participante_id')
+    filas = np.array(
+        Calificacion.objects.filter(
+            criterio__cri_evento_fk=evento,
+            participante_id__in=aprobados
+        ).values_list('participante_id', 'evaluador_id', 'criterio_id', 'cal_valor'),
+        dtype=np.int64,
+    ).reshape(-1, 4)
+    participantes_ids, p = np.unique(filas[:, 0], return_inverse=True)
+    evaluadores_ids, e = np.unique(filas[:, 1], return_inverse=True)
+    criterios_ids = np.array([c.cri_id for c in criterios], dtype=np.int64)
+    c = np.searchsorted(criterios_ids, filas[:, 2]) if len(criterios_ids) else filas[:, 2]
+    tensor = np.zeros((len(participantes_ids), len(evaluadores_ids), len(criterios_ids)), dtype=np.int8)
+    tensor[p, e, c] = filas[:, 3]
+    return tensor, participantes_ids.tolist(), evaluadores_ids.tolist(), criterios
+
+
+def puntajes_por_evaluador(tensor, pesos):
+    """Puntaje ponderado de cada evaluador a cada participante (P×E) y la máscara de quién calificó a quién."""
+    pesos = np.asarray(pesos, dtype=np.float64)
+    mascara = tensor.any(axis=2)
+    puntajes = tensor.astype(np.float64) @ pesos / (pesos.sum() or 1)
+    return puntajes, mascara
+
+
+def normalizar_por_evaluador(puntajes, mascara):
+    """
+    Z-score de cada puntaje respecto a los demás puntajes que dio el mismo evaluador, promediado
+    por participante y devuelto en la escala original (media y desviación globales). NaN si nadie lo calificó.
+    """
+    n = mascara.sum(axis=0)
+    media = np.divide((puntajes * mascara).sum(axis=0), n, out=np.zeros(n.shape), where=n > 0)
+    desviacion = np.sqrt(np.divide((((puntajes - media) ** 2) * mascara).sum(axis=0), n, out=np.zeros(n.shape), where=n > 0))
+    z = np.divide(puntajes - media, desviacion, out=np.zeros(puntajes.shape), where=mascara & (desviacion > 0))
+    evaluadores = mascara.sum(axis=1)
+    z_participante = np.divide((z * mascara).sum(axis=1), evaluadores, out=np.full(evaluadores.shape, np.nan), where=evaluadores > 0)
+    calificados = puntajes[mascara]
+    if not calificados.size:
+        return z_participante
+    return calificados.mean() + z_participante * calificados.std()
+
+
+def varianza_por_criterio(tensor):
+    """Varianza de las notas de cada criterio sobre todas las celdas calificadas (NaN si no hay notas)."""
+    mascara = tensor > 0
+    valores = tensor.astype(np.float64)
+    n = mascara.sum(axis=(0, 1))
+    media = np.divide(valores.sum(axis=(0, 1)), n, out=np.full(n.shape, np.nan), where=n > 0)
+    return np.divide((((valores - media) ** 2) * mascara).sum(axis=(0, 1)), n, out=np.full(n.shape, np.nan), where=n > 0)
+
+
+def acuerdo_evaluadores(puntajes, mascara):
+    """
+    Alfa de Krippendorff (intervalo) con participantes como unidades y evaluadores como jueces;
+    admite que cada participante tenga distintos evaluadores. 1 es acuerdo total, 0 el esperado al azar.
+    None si no hay participantes con al menos dos evaluadores.
+    """
+    m = mascara.sum(axis=1)
+    emparejables = m >= 2
+    if not emparejables.any():
+        return None
+    valores = np.where(mascara, puntajes, 0.0)[emparejables]
+    m = m[emparejables]
+    s1 = valores.sum(axis=1)
+    s2 = (valores ** 2).sum(axis=1)
+    n = m.sum()
+    # Suma de (vi - vj)^2 sobre pares ordenados: 2 * (m * Σv² - (Σv)²)
+    observado = (2 * (m * s2 - s1 ** 2) / (m - 1)).sum()
+    esperado = 2 * (n * s2.sum() - s1.sum() ** 2)
+    if esperado <= 0:
+        return 1.0
+    return float(1 - (n - 1) * observado / esperado)
+
+
+def analizar_evento(evento):
+    """Tensor del evento y sus métricas: puntaje normalizado por participante, varianzas y acuerdo."""
+    tensor, participantes_ids, evaluadores_ids, criterios = cargar_tensor(evento)
+    puntajes, mascara = puntajes_por_evaluador(tensor, [c.cri_peso for c in criterios])
+    normalizados = normalizar_por_evaluador(puntajes, mascara)
+    varianzas = varianza_por_criterio(tensor)
+    return {
+        'normalizados': {
+            pk: round(float(valor), 2)
+            for pk, valor in zip(participantes_ids, normalizados) if not np.isnan(valor)
+        },
+        'criterios': [
+            {'criterio': criterio, 'varianza': None if np.isnan(varianza) else round(float(varianza), 2)}
+            for criterio, varianza in zip(criterios, varianzas)
+        ],
+        'acuerdo': acuerdo_evaluadores(puntajes, mascara),
+        'num_evaluadores': len(evaluadores_ids),
+    }
+
+
+def tabla_posiciones_normalizada(evento, posiciones):
+    """
+    Reordena las filas de tabla_posiciones por el puntaje normalizado por evaluador. Cada fila
+    recibe `puntaje_normalizado`; las no calificadas quedan al final. Retorna (filas, análisis).
+    """
+    analisis = analizar_evento(evento)
+    normalizados = analisis['normalizados']
+    # Como con par_eve_valor, los integrantes de un proyecto comparten la nota del proyecto
+    por_proyecto = notas_proyectos(
+        [(posicion['participante'].pk, posicion['proyecto'].pk if posicion['proyecto'] else None) for posicion in posiciones],
+        normalizados,
+    )
+    for posicion in posiciones:
+        proyecto_id = posicion['proyecto'].pk if posicion['proyecto'] else None
+        posicion['puntaje_normalizado'] = por_proyecto.get(proyecto_id, normalizados.get(posicion['participante'].pk))
+    posiciones = sorted(
+        posiciones,
+        key=lambda p: (p['puntaje_normalizado'] is None, -(p['puntaje_normalizado'] or 0)),
+    )
+    return posiciones, analisis
+
+
+def matriz_simulacion(evento):
+    """
+    Suma de notas por participante aprobado y criterio (N×C), número de evaluadores y grupo de
+    proyecto de cada participante. Con esto el puntaje para cualquier juego de pesos es un producto
+    matriz-vector. Se guarda en caché por versión de puntajes del evento.
+    """
+    clave = f'simulacion:{evento.pk}:{version_puntajes(evento)}'
+    datos = cache.get(clave)
+    if datos is not None:
+        return datos
+    tensor, participantes_ids, _, criterios = cargar_tensor(evento)
+    participaciones = list(ParticipanteEvento.objects.filter(
+        evento=evento,
+        par_eve_estado='Aprobado'
+    ).select_related('participante__usuario').order_by('pk'))
+    fila = {pk: i for i, pk in enumerate(participantes_ids)}
+    indices = np.array([fila.get(pe.participante_id, -1) for pe in participaciones], dtype=np.int64)
+    calificados = indices >= 0
+    sumas = np.zeros((len(participaciones), len(criterios)))
+    evaluadores = np.zeros(len(participaciones), dtype=np.int64)
+    sumas[calificados] = tensor.sum(axis=1, dtype=np.float64)[indices[calificados]]
+    evaluadores[calificados] = tensor.any(axis=2).sum(axis=1)[indices[calificados]]
+    proyectos = np.array([pe.proyecto_id or 0 for pe in participaciones], dtype=np.int64)
+    _, grupos = np.unique(proyectos, return_inverse=True)
+    datos = {
+        'participantes': [
+            {
+                'participante_id': pe.participante_id,
+                'nombre': f'{pe.participante.usuario.first_name} {pe.participante.usuario.last_name}',
+            }
+            for pe in participaciones
+        ],
+        'criterios_ids': [c.cri_id for c in criterios],
+        'pesos': np.array([c.cri_peso for c in criterios], dtype=np.float64),
+        'sumas': sumas,
+        'evaluadores': evaluadores,
+        'grupos': np.where(proyectos > 0, grupos, -1),
+    }
+    cache.set(clave, datos, TIEMPO_CACHE_SIMULACION)
+    return datos
+
+
+def _notas(datos, pesos):
+    """Notas con los pesos dados, con la misma fórmula que PuntajeParticipante.calcular_puntaje."""
+    evaluadores = datos['evaluadores']
+    notas = np.divide(
+        datos['sumas'] @ pesos, (pesos.sum() or 1) * evaluadores,
+        out=np.full(evaluadores.shape, np.nan), where=evaluadores > 0,
+    )
+    # Los integrantes de un proyecto comparten la nota del proyecto, con la misma regla que par_eve_valor
+    grupos = datos['grupos']
+    en_grupo = np.flatnonzero(grupos >= 0)
+    if en_grupo.size:
+        # El grupo 0 es válido, pero notas_proyectos ignora los proyectos con id 0
+        por_fila = {int(i): None if np.isnan(notas[i]) else float(notas[i]) for i in en_grupo}
+        por_grupo = notas_proyectos([(int(i), int(grupos[i]) + 1) for i in en_grupo], por_fila)
+        notas = notas.copy()
+        for i in en_grupo:
+            nota = por_grupo[int(grupos[i]) + 1]
+            notas[i] = np.nan if nota is None else nota
+    return np.round(notas, 2)
+
+
+def _puestos(notas):
+    """RANK de cada nota (los empates comparten puesto); NaN para las notas vacías."""
+    validas = np.sort(notas[~np.isnan(notas)])
+    mayores = len(validas) - np.searchsorted(validas, notas, side='right')
+    return np.where(np.isnan(notas), np.nan, mayores + 1)
+
+
+def pesos_candidatos(parametros):
+    """Lee los pesos `peso_<cri_id>=valor` de los parámetros del request. ValueError si alguno no es válido."""
+    pesos = {}
+    for nombre, valor in parametros.items():
+        if not nombre.startswith('peso_'):
+            continue
+        peso = float(valor)
+        if not np.isfinite(peso) or peso < 0:
+            raise ValueError(f'Peso inválido para el criterio {nombre[5:]}.')
+        pesos[int(nombre[5:])] = peso
+    return pesos
+
+
+def simular_ranking(evento, pesos):
+    """
+    Ranking del evento si los criterios tuvieran los pesos dados ({cri_id: peso}; los criterios
+    omitidos conservan su peso actual). No escribe en la base de datos. Cada fila trae el puntaje
+    y puesto simulados junto a los actuales.
+    """
+    datos = matriz_simulacion(evento)
+    candidatos = datos['pesos'].copy()
+    for i, cri_id in enumerate(datos['criterios_ids']):
+        if cri_id in pesos:
+            candidatos[i] = pesos[cri_id]
+    notas, actuales = _notas(datos, candidatos), _notas(datos, datos['pesos'])
+    puestos, puestos_actuales = _puestos(notas), _puestos(actuales)
+    orden = np.lexsort((np.arange(len(notas)), np.nan_to_num(puestos, nan=np.inf)))
+    return [
+        {
+            **datos['participantes'][i],
+            'puntaje': float(notas[i]),
+            'puesto': int(puestos[i]),
+            'puntaje_actual': float(actuales[i]),
+            'puesto_actual': int(puestos_actuales[i]),
+        }
+        for i in orden if not np.isnan(notas[i])
+    ]
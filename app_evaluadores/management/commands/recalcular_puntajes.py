@@ -0,0 +1,47 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from app_eventos.models import Evento
+from app_evaluadores.models import RecalculoPuntajes
+from app_evaluadores.puntajes import marcar_puntajes_desactualizados, recalculos_disponibles, recalcular_evento
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula los puntajes de los eventos cuya rúbrica cambió (marcados como desactualizados) '
+        'e informa el avance. Con --continuo queda atendiendo nuevos cambios.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evento', type=int, default=None, help='Marca este evento como desactualizado antes de procesar.')
+        parser.add_argument('--lote', type=int, default=5000, help='Participantes publicados por transacción.')
+        parser.add_argument('--continuo', action='store_true', help='Mantiene el proceso activo revisando eventos pendientes.')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos entre revisiones en modo continuo.')
+
+    def handle(self, *args, **options):
+        if options['evento']:
+            if not Evento.objects.filter(pk=options['evento']).exists():
+                raise CommandError(f"No existe el evento {options['evento']}.")
+            marcar_puntajes_desactualizados(options['evento'], en_linea=False)
+        while True:
+            self.procesar_pendientes(options['lote'])
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
+
+    def procesar_pendientes(self, lote):
+        pendientes = recalculos_disponibles().order_by('solicitado').values_list('evento_id', flat=True)
+        for eve_id in list(pendientes):
+            inicio = time.perf_counter()
+            try:
+                recalculado = recalcular_evento(eve_id, lote=lote)
+            except Exception as e:
+                estado = RecalculoPuntajes.objects.get(evento_id=eve_id).estado
+                siguiente = 'se reintentará' if estado == 'Pendiente' else 'sin más reintentos'
+                self.stderr.write(self.style.ERROR(f'Evento {eve_id}: error al recalcular ({siguiente}): {e}'))
+                continue
+            if recalculado:
+                recalculo = RecalculoPuntajes.objects.get(evento_id=eve_id)
+                self.stdout.write(self.style.SUCCESS(
+                    f'Evento {eve_id}: {recalculo.procesados}/{recalculo.total} participantes '
+                    f'recalculados en {time.perf_counter() - inicio:.1f} s ({recalculo.estado})'
+                ))
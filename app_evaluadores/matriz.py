@@ -0,0 +1,86 @@
+from array import array
+from app_evaluadores.models import Calificacion, Criterio
+
+# Valor de una celda sin calificación (las notas válidas van de 1 a 5)
+SIN_CALIFICAR = 0
+
+
+class MatrizCalificaciones:
+    """
+    Calificaciones de un evento como matriz participante × evaluador × criterio guardada en un
+    array plano de bytes, cargada con una sola consulta. Los agregados por participante y por
+    criterio se derivan de la matriz sin volver a la base de datos.
+    """
+
+    def __init__(self, participantes_ids, evaluadores_ids, criterios):
+        self.criterios = list(criterios)
+        self.participantes = {pk: i for i, pk in enumerate(participantes_ids)}
+        self.evaluadores = {pk: i for i, pk in enumerate(evaluadores_ids)}
+        self.indice_criterios = {c.cri_id: i for i, c in enumerate(self.criterios)}
+        self.valores = array('b', bytes(len(self.participantes) * len(self.evaluadores) * len(self.criterios)))
+
+    @classmethod
+    def del_evento(cls, evento, participantes_ids, evaluador=None, criterios=None):
+        """Carga la matriz de los participantes indicados; con `evaluador`, solo sus calificaciones."""
+        criterios = list(criterios if criterios is not None else Criterio.objects.filter(cri_evento_fk=evento).order_by('cri_id'))
+        calificaciones = Calificacion.objects.filter(
+            criterio__cri_evento_fk=evento,
+            participante_id__in=participantes_ids
+        )
+        if evaluador is not None:
+            calificaciones = calificaciones.filter(evaluador=evaluador)
+        filas = list(calificaciones.values_list('participante_id', 'evaluador_id', 'criterio_id', 'cal_valor'))
+        matriz = cls(participantes_ids, sorted({fila[1] for fila in filas}), criterios)
+        for participante_id, evaluador_id, criterio_id, valor in filas:
+            matriz.valores[matriz._posicion(participante_id, evaluador_id, criterio_id)] = valor
+        return matriz
+
+    def _posicion(self, participante_id, evaluador_id, criterio_id):
+        return (
+            self.participantes[participante_id] * len(self.evaluadores) + self.evaluadores[evaluador_id]
+        ) * len(self.criterios) + self.indice_criterios[criterio_id]
+
+    def _bloque(self, participante_id):
+        """Filas (una por evaluador) del participante: [(evaluador_id, [valor por criterio])]."""
+        ancho = len(self.criterios)
+        inicio = self.participantes[participante_id] * len(self.evaluadores) * ancho
+        return [
+            (evaluador_id, self.valores[inicio + j * ancho:inicio + (j + 1) * ancho])
+            for evaluador_id, j in self.evaluadores.items()
+        ]
+
+    def calificaciones(self, participante_id):
+        """[(evaluador_id, criterio, valor)] con las celdas calificadas del participante."""
+        return [
+            (evaluador_id, criterio, valor)
+            for evaluador_id, fila in self._bloque(participante_id)
+            for criterio, valor in zip(self.criterios, fila)
+            if valor != SIN_CALIFICAR
+        ]
+
+    def num_evaluadores(self, participante_id):
+        return sum(1 for _, fila in self._bloque(participante_id) if any(fila))
+
+    def criterios_evaluados(self, participante_id):
+        """Criterios con al menos una calificación de algún evaluador."""
+        return sum(1 for columna in self.por_criterio(participante_id).values() if columna)
+
+    def por_criterio(self, participante_id):
+        """{cri_id: [valores de los evaluadores que lo calificaron]}."""
+        columnas = {c.cri_id: [] for c in self.criterios}
+        for _, fila in self._bloque(participante_id):
+            for criterio, valor in zip(self.criterios, fila):
+                if valor != SIN_CALIFICAR:
+                    columnas[criterio.cri_id].append(valor)
+        return columnas
+
+    def suma_ponderada(self, participante_id):
+        """Suma de valor × peso / 100 sobre todas las calificaciones del participante."""
+        return sum(valor * criterio.cri_peso / 100 for _, criterio, valor in self.calificaciones(participante_id))
+
+    def promedio_ponderado(self, participante_id):
+        """Promedio ponderado por evaluador, o None si nadie lo ha calificado."""
+        evaluadores = self.num_evaluadores(participante_id)
+        if not evaluadores:
+            return None
+        return round(self.suma_ponderada(participante_id) / evaluadores, 2)
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def poblar_puntajes(apps, schema_editor):
+    Calificacion = apps.get_model('app_evaluadores', 'Calificacion')
+    Criterio = apps.get_model('app_evaluadores', 'Criterio')
+    PuntajeParticipante = apps.get_model('app_evaluadores', 'PuntajeParticipante')
+    pesos = dict(
+        Criterio.objects.values('cri_evento_fk').annotate(total=Sum('cri_peso')).values_list('cri_evento_fk', 'total')
+    )
+    agregados = Calificacion.objects.values('criterio__cri_evento_fk', 'participante').annotate(
+        suma=Sum(F('cal_valor') * F('criterio__cri_peso')),
+        evaluadores=Count('evaluador', distinct=True),
+    )
+    puntajes = []
+    for fila in agregados:
+        peso_total = pesos.get(fila['criterio__cri_evento_fk']) or 0
+        suma = fila['suma'] or 0
+        puntajes.append(PuntajeParticipante(
+            evento_id=fila['criterio__cri_evento_fk'],
+            participante_id=fila['participante'],
+            suma_ponderada=suma,
+            peso_total=peso_total,
+            num_evaluadores=fila['evaluadores'],
+            puntaje=round(suma / ((peso_total or 1) * fila['evaluadores']), 2) if fila['evaluadores'] else None,
+        ))
+    PuntajeParticipante.objects.bulk_create(puntajes, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_evaluadores', '0004_evaluadorevento_puede_gestionar_rubrica'),
+        ('app_eventos', '0004_remove_evento_inscripciones_habilitadas'),
+        ('app_participantes', '0004_proyecto_pro_valor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PuntajeParticipante',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('suma_ponderada', models.FloatField(default=0)),
+                ('peso_total', models.FloatField(default=0)),
+                ('num_evaluadores', models.PositiveIntegerField(default=0)),
+                ('puntaje', models.FloatField(blank=True, null=True)),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='puntajes', to='app_eventos.evento')),
+                ('participante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='puntajes', to='app_participantes.participante')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['evento', 'puntaje'], name='app_evaluad_evento__f24468_idx')],
+                'unique_together': {('evento', 'participante')},
+            },
+        ),
+        migrations.RunPython(poblar_puntajes, migrations.RunPython.noop),
+    ]
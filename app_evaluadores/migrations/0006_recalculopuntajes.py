@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_evaluadores', '0005_puntajeparticipante'),
+        ('app_eventos', '0004_remove_evento_inscripciones_habilitadas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecalculoPuntajes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('Pendiente', 'Pendiente'), ('En proceso', 'En proceso'), ('Terminado', 'Terminado'), ('Error', 'Error')], default='Pendiente', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('procesados', models.PositiveIntegerField(default=0)),
+                ('solicitado', models.DateTimeField()),
+                ('terminado', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('evento', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recalculo_puntajes', to='app_eventos.evento')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_evaluadores', '0006_recalculopuntajes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recalculopuntajes',
+            name='bloqueado_hasta',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
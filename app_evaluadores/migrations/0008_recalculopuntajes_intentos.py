@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_evaluadores', '0007_recalculopuntajes_bloqueado_hasta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recalculopuntajes',
+            name='intentos',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from app_eventos.models import Evento
+from app_eventos.qr import url_qr
 from app_participantes.models import Participante
 from app_usuarios.models import Usuario
 
@@ -25,6 +26,11 @@ class EvaluadorEvento(models.Model):
 
     def __str__(self):
         return f"{self.evaluador.get_full_name()} - {self.evento.eve_nombre}"
+
+    @property
+    def qr_url(self):
+        """URL del QR de acceso, generado al pedirlo; solo las inscripciones aprobadas tienen QR."""
+        return url_qr(self) if self.eva_eve_estado == 'Aprobado' else None
     
 
 class Criterio(models.Model):
@@ -41,4 +47,53 @@ class Calificacion(models.Model):
     cal_observacion = models.CharField(max_length=255, blank=True, null=True)
 
     class Meta:
-        unique_together = (('evaluador', 'criterio', 'participante'),)
\ No newline at end of file
+        unique_together = (('evaluador', 'criterio', 'participante'),)
+
+class PuntajeParticipante(models.Model):
+    """
+    Acumulado materializado del puntaje de un participante en un evento. Se actualiza en O(1)
+    con cada calificación: puntaje = suma_ponderada / (peso_total * num_evaluadores).
+    """
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='puntajes')
+    participante = models.ForeignKey(Participante, on_delete=models.CASCADE, related_name='puntajes')
+    suma_ponderada = models.FloatField(default=0)
+    peso_total = models.FloatField(default=0)
+    num_evaluadores = models.PositiveIntegerField(default=0)
+    puntaje = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        unique_together = (('evento', 'participante'),)
+        indexes = [models.Index(fields=['evento', 'puntaje'])]
+
+    def calcular_puntaje(self):
+        if self.num_evaluadores > 0:
+            return round(self.suma_ponderada / ((self.peso_total or 1) * self.num_evaluadores), 2)
+        return None
+
+
+class RecalculoPuntajes(models.Model):
+    """
+    Marca que los puntajes guardados de un evento quedaron desactualizados (cambió la rúbrica)
+    y lleva el avance de su recálculo.
+    """
+    ESTADOS = [
+        ('Pendiente', 'Pendiente'),
+        ('En proceso', 'En proceso'),
+        ('Terminado', 'Terminado'),
+        ('Error', 'Error'),
+    ]
+    evento = models.OneToOneField(Evento, on_delete=models.CASCADE, related_name='recalculo_puntajes')
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='Pendiente')
+    total = models.PositiveIntegerField(default=0)
+    procesados = models.PositiveIntegerField(default=0)
+    solicitado = models.DateTimeField()
+    bloqueado_hasta = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    intentos = models.PositiveIntegerField(default=0)
+
+    @property
+    def porcentaje(self):
+        if not self.total:
+            return 100 if self.estado == 'Terminado' else 0
+        return round(100 * self.procesados / self.total)
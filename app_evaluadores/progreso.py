@@ -0,0 +1,92 @@
+from django.core.cache import cache
+from django.db.models import Count
+from app_evaluadores.models import Calificacion, Criterio, EvaluadorEvento
+from app_evaluadores.puntajes import TIEMPO_CACHE_RANKING, version_puntajes
+from app_participantes.models import ParticipanteEvento
+
+COMPLETO = 'completo'
+PARCIAL = 'parcial'
+PENDIENTE = 'pendiente'
+
+
+def _porcentaje(parte, total):
+    return round(100 * parte / total) if total else 0
+
+
+def progreso_evaluacion(evento):
+    """
+    Matriz de avance evaluador × proyecto del evento (los participantes individuales cuentan como
+    su propio proyecto). Un evaluador completó un proyecto si calificó todos los criterios de al
+    menos un integrante, igual que en la lista del evaluador. Las calificaciones se cuentan con
+    una sola consulta agrupada; el resultado se guarda en caché por versión de puntajes.
+    """
+    clave = f'progreso_evaluacion:{evento.pk}:{version_puntajes(evento)}'
+    progreso = cache.get(clave)
+    if progreso is not None:
+        return progreso
+
+    total_criterios = Criterio.objects.filter(cri_evento_fk=evento).count()
+    evaluadores = [
+        {'evaluador_id': ee.evaluador_id, 'nombre': f'{ee.evaluador.usuario.first_name} {ee.evaluador.usuario.last_name}'}
+        for ee in EvaluadorEvento.objects.filter(
+            evento=evento, eva_eve_estado='Aprobado'
+        ).select_related('evaluador__usuario').order_by('evaluador_id')
+    ]
+    participaciones = ParticipanteEvento.objects.filter(
+        evento=evento,
+        par_eve_estado='Aprobado'
+    ).select_related('participante__usuario', 'proyecto').order_by('pk')
+    unidades = {}
+    unidad_de = {}
+    for pe in participaciones:
+        if pe.proyecto_id:
+            clave_unidad, nombre, tipo = f'proyecto-{pe.proyecto_id}', pe.proyecto.titulo, 'Proyecto'
+        else:
+            usuario = pe.participante.usuario
+            clave_unidad, nombre, tipo = f'participante-{pe.participante_id}', f'{usuario.first_name} {usuario.last_name}', 'Individual'
+        unidades.setdefault(clave_unidad, {'clave': clave_unidad, 'nombre': nombre, 'tipo': tipo})
+        unidad_de[pe.participante_id] = clave_unidad
+
+    # (evaluador, participante) -> criterios calificados, en una consulta agrupada
+    estados = {}
+    conteos = Calificacion.objects.filter(
+        criterio__cri_evento_fk=evento,
+        participante_id__in=participaciones.values('participante_id')
+    ).values('evaluador_id', 'participante_id').annotate(calificados=Count('criterio_id', distinct=True))
+    for fila in conteos:
+        clave_unidad = unidad_de.get(fila['participante_id'])
+        if clave_unidad is None:
+            continue
+        estado = COMPLETO if total_criterios and fila['calificados'] >= total_criterios else PARCIAL
+        celda = (clave_unidad, fila['evaluador_id'])
+        if estados.get(celda) != COMPLETO:
+            estados[celda] = estado
+
+    for evaluador in evaluadores:
+        celdas = [estados.get((clave_unidad, evaluador['evaluador_id']), PENDIENTE) for clave_unidad in unidades]
+        evaluador['completos'] = celdas.count(COMPLETO)
+        evaluador['parciales'] = celdas.count(PARCIAL)
+        evaluador['porcentaje'] = _porcentaje(evaluador['completos'], len(unidades))
+        evaluador['pendientes'] = [
+            unidad['nombre'] for unidad, estado in zip(unidades.values(), celdas) if estado != COMPLETO
+        ]
+    filas = []
+    for unidad in unidades.values():
+        celdas = [estados.get((unidad['clave'], evaluador['evaluador_id']), PENDIENTE) for evaluador in evaluadores]
+        filas.append({
+            **unidad,
+            'celdas': celdas,
+            'completos': celdas.count(COMPLETO),
+            'porcentaje': _porcentaje(celdas.count(COMPLETO), len(evaluadores)),
+            'pendientes': [e['nombre'] for e, estado in zip(evaluadores, celdas) if estado != COMPLETO],
+        })
+
+    completas = sum(fila['completos'] for fila in filas)
+    progreso = {
+        'total_criterios': total_criterios,
+        'evaluadores': evaluadores,
+        'proyectos': filas,
+        'porcentaje': _porcentaje(completas, len(filas) * len(evaluadores)),
+    }
+    cache.set(clave, progreso, TIEMPO_CACHE_RANKING)
+    return progreso
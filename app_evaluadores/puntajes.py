@@ -0,0 +1,405 @@
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum, Window
+from django.db.models.functions import DenseRank, Rank
+from django.utils import timezone
+from app_evaluadores.models import Calificacion, Criterio, PuntajeParticipante, RecalculoPuntajes
+from app_participantes.models import ParticipanteEvento, Proyecto
+
+# Las claves llevan la versión de puntajes del evento, así que nunca se leen valores obsoletos
+TIEMPO_CACHE_RANKING = 60 * 60
+
+# Hasta este número de participantes aprobados el recálculo por cambio de rúbrica se hace en el request
+MAX_PARTICIPANTES_RECALCULO_EN_LINEA = 2000
+# Un recálculo tomado por un proceso que deja de avanzar (p. ej. murió) vuelve a quedar disponible
+DURACION_BLOQUEO = timedelta(minutes=10)
+# Un recálculo que falla se reintenta tras una espera que se duplica en cada intento
+MAX_INTENTOS_RECALCULO = 3
+ESPERA_REINTENTO_RECALCULO = timedelta(minutes=1)
+
+logger = logging.getLogger(__name__)
+
+
+def guardar_calificaciones(evento, evaluador, pesos, lote):
+    """
+    Guarda las calificaciones de un evaluador con un único upsert y actualiza en O(1) el
+    PuntajeParticipante de cada participante. `pesos` son los pesos de todos los criterios del
+    evento ({cri_id: peso}) y `lote` los valores ya validados ({participante_id: {cri_id: valor}}).
+    Debe llamarse dentro de una transacción. Retorna {participante_id: nota}.
+    """
+    participantes_ids = sorted(lote)
+    # Un recálculo en curso pudo leer las calificaciones antes que este guardado: se anota la hora y
+    # recalcular_evento lo repite una vez al terminar, sin interrumpirlo
+    RecalculoPuntajes.objects.filter(evento=evento, estado='En proceso').update(solicitado=timezone.now())
+    # Crear (sin conflicto) y bloquear las filas de puntaje: serializa a los evaluadores que
+    # califican al mismo participante sin depender de reintentos por IntegrityError
+    PuntajeParticipante.objects.bulk_create(
+        [PuntajeParticipante(evento=evento, participante_id=pk) for pk in participantes_ids],
+        ignore_conflicts=True,
+    )
+    puntajes = {
+        p.participante_id: p for p in PuntajeParticipante.objects.select_for_update().filter(
+            evento=evento, participante_id__in=participantes_ids
+        ).order_by('participante_id')
+    }
+    anteriores = defaultdict(dict)
+    for participante_id, criterio_id, valor in Calificacion.objects.filter(
+        evaluador=evaluador, participante_id__in=participantes_ids, criterio__cri_evento_fk=evento
+    ).values_list('participante_id', 'criterio_id', 'cal_valor'):
+        anteriores[participante_id][criterio_id] = valor
+
+    # MySQL resuelve el conflicto con ON DUPLICATE KEY sobre unique_together y no acepta unique_fields
+    unique_fields = ['evaluador', 'criterio', 'participante'] if connection.features.supports_update_conflicts_with_target else None
+    Calificacion.objects.bulk_create(
+        [
+            Calificacion(evaluador=evaluador, criterio_id=cri_id, participante_id=participante_id, cal_valor=valor)
+            for participante_id, nuevos in lote.items()
+            for cri_id, valor in nuevos.items()
+        ],
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=['cal_valor'],
+    )
+
+    peso_total = sum(pesos.values())
+    for participante_id, nuevos in lote.items():
+        puntaje = puntajes[participante_id]
+        previos = anteriores.get(participante_id, {})
+        puntaje.suma_ponderada += sum((valor - previos.get(cri_id, 0)) * pesos[cri_id] for cri_id, valor in nuevos.items())
+        puntaje.peso_total = peso_total
+        if not previos and nuevos:
+            puntaje.num_evaluadores += 1
+        puntaje.puntaje = puntaje.calcular_puntaje()
+    PuntajeParticipante.objects.bulk_update(
+        list(puntajes.values()), ['suma_ponderada', 'peso_total', 'num_evaluadores', 'puntaje']
+    )
+    return {participante_id: p.puntaje for participante_id, p in puntajes.items()}
+
+
+def _clave_version(eve_id):
+    return f'version_puntajes:{eve_id}'
+
+
+def version_puntajes(evento):
+    """
+    Versión de puntajes del evento. Vive en la caché compartida (CACHES, no en Evento) para que
+    invalidar no escriba en el evento; si la clave se pierde se reinicia con la hora actual, así
+    nunca vuelve a una versión ya usada.
+    """
+    clave = _clave_version(getattr(evento, 'pk', evento))
+    version = cache.get(clave)
+    if version is None:
+        cache.add(clave, time.time_ns(), None)
+        version = cache.get(clave, 0)
+    return version
+
+
+def invalidar_ranking(eventos):
+    """
+    Cambia la versión de puntajes de los eventos al confirmar la transacción actual; el ranking en
+    caché de la versión anterior deja de usarse.
+    """
+    eventos_ids = {getattr(e, 'pk', e) for e in eventos}
+
+    def cambiar_version():
+        # Una versión nueva (no un incremento): no depende de que la caché tenga incr atómico
+        cache.set_many({_clave_version(eve_id): time.time_ns() for eve_id in eventos_ids}, None)
+
+    transaction.on_commit(cambiar_version)
+
+
+def nota_proyecto(notas):
+    """Nota de un proyecto grupal a partir de las notas de sus integrantes: la mejor de las calificadas."""
+    calificadas = [nota for nota in notas if nota is not None]
+    return max(calificadas) if calificadas else None
+
+
+def notas_proyectos(integrantes, notas):
+    """
+    {proyecto_id: nota} aplicando nota_proyecto a los integrantes de cada proyecto. `integrantes`
+    son pares (clave, proyecto_id) y `notas` las notas por clave; todos los cálculos de notas de
+    proyecto (al calificar, al reconstruir y en la analítica) pasan por aquí.
+    """
+    por_proyecto = defaultdict(list)
+    for clave, proyecto_id in integrantes:
+        if proyecto_id:
+            por_proyecto[proyecto_id].append(notas.get(clave))
+    return {proyecto_id: nota_proyecto(notas_integrantes) for proyecto_id, notas_integrantes in por_proyecto.items()}
+
+
+def publicar_nota(evento, participante, nota):
+    """Publica la nota de un participante; ver publicar_notas."""
+    publicar_notas(evento, {getattr(participante, 'pk', participante): nota})
+
+
+def publicar_notas(evento, notas):
+    """
+    Copia las notas ({participante_id: nota}) a ParticipanteEvento.par_eve_valor. En proyectos
+    grupales la nota del proyecto y de todos sus integrantes aprobados se calcula con los
+    PuntajeParticipante de todos los integrantes, no solo los del lote. Unas pocas consultas por lote.
+    """
+    notas = {pk: nota for pk, nota in notas.items() if nota is not None}
+    if not notas:
+        return
+    campos = ('pk', 'participante_id', 'proyecto_id', 'par_eve_valor')
+    participaciones = list(ParticipanteEvento.objects.filter(evento=evento, participante_id__in=notas).only(*campos))
+    actualizadas = {}
+    for pe in participaciones:
+        pe.par_eve_valor = notas[pe.participante_id]
+        actualizadas[pe.pk] = pe
+    integrantes = list(ParticipanteEvento.objects.filter(
+        evento=evento,
+        proyecto_id__in={pe.proyecto_id for pe in participaciones if pe.proyecto_id},
+        par_eve_estado='Aprobado'
+    ).only(*campos))
+    guardadas = dict(PuntajeParticipante.objects.filter(
+        evento=evento, participante_id__in=[pe.participante_id for pe in integrantes]
+    ).values_list('participante_id', 'puntaje'))
+    guardadas.update(notas)
+    notas_proyecto = notas_proyectos([(pe.participante_id, pe.proyecto_id) for pe in integrantes], guardadas)
+    for pe in integrantes:
+        pe = actualizadas.setdefault(pe.pk, pe)
+        pe.par_eve_valor = notas_proyecto[pe.proyecto_id]
+    ParticipanteEvento.objects.bulk_update(list(actualizadas.values()), ['par_eve_valor'], batch_size=5000)
+    Proyecto.objects.bulk_update(
+        [Proyecto(pk=pk, pro_valor=nota) for pk, nota in notas_proyecto.items()], ['pro_valor'], batch_size=5000
+    )
+    invalidar_ranking([evento])
+
+
+def reconstruir_puntajes(eventos, progreso=None, lote=5000):
+    """
+    Reconstruye desde cero los PuntajeParticipante de los eventos indicados con una sola
+    agregación sobre Calificacion, y publica la nota en ParticipanteEvento.par_eve_valor.
+    Con `progreso(procesados, total)` las notas se publican por lotes, cada uno en su propia
+    transacción, para poder informar el avance; sin él todo se escribe en una transacción.
+    """
+    eventos_ids = [getattr(e, 'pk', e) for e in eventos]
+    pesos = dict(
+        Criterio.objects.filter(cri_evento_fk__in=eventos_ids).values('cri_evento_fk')
+        .annotate(total=Sum('cri_peso')).values_list('cri_evento_fk', 'total')
+    )
+    agregados = Calificacion.objects.filter(criterio__cri_evento_fk__in=eventos_ids).values(
+        'criterio__cri_evento_fk', 'participante'
+    ).annotate(
+        suma=Sum(F('cal_valor') * F('criterio__cri_peso')),
+        evaluadores=Count('evaluador', distinct=True),
+    )
+    puntajes = []
+    for fila in agregados:
+        puntaje = PuntajeParticipante(
+            evento_id=fila['criterio__cri_evento_fk'],
+            participante_id=fila['participante'],
+            suma_ponderada=fila['suma'] or 0,
+            peso_total=pesos.get(fila['criterio__cri_evento_fk']) or 0,
+            num_evaluadores=fila['evaluadores'],
+        )
+        puntaje.puntaje = puntaje.calcular_puntaje()
+        puntajes.append(puntaje)
+
+    notas = {(p.evento_id, p.participante_id): p.puntaje for p in puntajes}
+    participaciones = list(ParticipanteEvento.objects.filter(
+        evento_id__in=eventos_ids,
+        par_eve_estado='Aprobado'
+    ).only('pk', 'evento_id', 'participante_id', 'proyecto_id', 'par_eve_valor').order_by('pk'))
+    # En proyectos grupales todos los integrantes reciben la nota del proyecto, igual que al calificar
+    notas_proyecto = notas_proyectos([((pe.evento_id, pe.participante_id), pe.proyecto_id) for pe in participaciones], notas)
+    for pe in participaciones:
+        pe.par_eve_valor = notas_proyecto.get(pe.proyecto_id, notas.get((pe.evento_id, pe.participante_id)))
+    proyectos = [Proyecto(pk=pk, pro_valor=nota) for pk, nota in notas_proyecto.items()]
+
+    with transaction.atomic():
+        PuntajeParticipante.objects.filter(evento_id__in=eventos_ids).delete()
+        PuntajeParticipante.objects.bulk_create(puntajes, batch_size=lote)
+        Proyecto.objects.bulk_update(proyectos, ['pro_valor'], batch_size=lote)
+        if progreso is None:
+            ParticipanteEvento.objects.bulk_update(participaciones, ['par_eve_valor'], batch_size=lote)
+            invalidar_ranking(eventos)
+    if progreso is not None:
+        progreso(0, len(participaciones))
+        for inicio in range(0, len(participaciones), lote):
+            with transaction.atomic():
+                ParticipanteEvento.objects.bulk_update(participaciones[inicio:inicio + lote], ['par_eve_valor'])
+            progreso(min(inicio + lote, len(participaciones)), len(participaciones))
+        invalidar_ranking(eventos)
+    return len(puntajes)
+
+
+def marcar_puntajes_desactualizados(evento, en_linea=True):
+    """
+    Registra que cambió la rúbrica del evento. Los eventos pequeños se recalculan al confirmar la
+    transacción actual; los grandes (o todos con en_linea=False) quedan pendientes para el
+    comando recalcular_puntajes.
+    """
+    eve_id = getattr(evento, 'pk', evento)
+    RecalculoPuntajes.objects.update_or_create(
+        evento_id=eve_id,
+        defaults={
+            'estado': 'Pendiente', 'procesados': 0, 'solicitado': timezone.now(), 'bloqueado_hasta': None,
+            'terminado': None, 'error': '', 'intentos': 0,
+        },
+    )
+    invalidar_ranking([evento])
+    if not en_linea:
+        return
+    aprobados = ParticipanteEvento.objects.filter(evento_id=eve_id, par_eve_estado='Aprobado').count()
+    if aprobados <= MAX_PARTICIPANTES_RECALCULO_EN_LINEA:
+        transaction.on_commit(lambda: _recalcular_en_linea(eve_id))
+
+
+def _recalcular_en_linea(eve_id):
+    """Recálculo al confirmar el cambio de rúbrica; si falla, el comando recalcular_puntajes lo reintenta."""
+    try:
+        recalcular_evento(eve_id)
+    except Exception:
+        logger.exception('No se pudieron recalcular en línea los puntajes del evento %s', eve_id)
+
+
+def recalculos_disponibles():
+    """Recálculos pendientes (cuya espera de reintento pasó) o tomados por un proceso cuyo bloqueo ya venció."""
+    # En un recálculo 'Pendiente', bloqueado_hasta es la hora del próximo reintento
+    return RecalculoPuntajes.objects.filter(
+        Q(estado='Pendiente', bloqueado_hasta__isnull=True) |
+        Q(estado__in=['Pendiente', 'En proceso'], bloqueado_hasta__lt=timezone.now())
+    )
+
+
+def recalcular_evento(evento, lote=5000, bloqueo=DURACION_BLOQUEO):
+    """
+    Recalcula los puntajes de un evento marcado como desactualizado, guardando el avance en su
+    RecalculoPuntajes. Si mientras tanto se guardaron calificaciones (solicitado cambió), repite
+    el cálculo una vez; si vuelve a pasar, lo deja pendiente para el comando. Si falla, vuelve a
+    'Pendiente' tras una espera creciente, o queda en 'Error' tras MAX_INTENTOS_RECALCULO intentos.
+    Retorna False si no estaba disponible (otro proceso ya lo tomó).
+    """
+    eve_id = getattr(evento, 'pk', evento)
+    recalculo = recalculos_disponibles().filter(evento_id=eve_id).first()
+    if not recalculo or not recalculos_disponibles().filter(
+        pk=recalculo.pk, solicitado=recalculo.solicitado
+    ).update(estado='En proceso', procesados=0, bloqueado_hasta=timezone.now() + bloqueo, intentos=F('intentos') + 1):
+        return False
+    intentos = recalculo.intentos + 1
+    en_proceso = RecalculoPuntajes.objects.filter(pk=recalculo.pk, estado='En proceso')
+
+    def progreso(procesados, total):
+        en_proceso.update(procesados=procesados, total=total, bloqueado_hasta=timezone.now() + bloqueo)
+
+    solicitado = recalculo.solicitado
+    for _ in range(2):
+        try:
+            reconstruir_puntajes([eve_id], progreso=progreso, lote=lote)
+        except Exception as e:
+            if intentos >= MAX_INTENTOS_RECALCULO:
+                en_proceso.update(estado='Error', bloqueado_hasta=None, error=str(e))
+            else:
+                reintento = timezone.now() + ESPERA_REINTENTO_RECALCULO * 2 ** (intentos - 1)
+                en_proceso.update(estado='Pendiente', bloqueado_hasta=reintento, error=str(e))
+            raise
+        if en_proceso.filter(solicitado=solicitado).update(
+            estado='Terminado', bloqueado_hasta=None, terminado=timezone.now(), error='', intentos=0,
+        ):
+            return True
+        # Si la rúbrica volvió a cambiar, marcar_puntajes_desactualizados ya lo dejó 'Pendiente'
+        solicitado = en_proceso.values_list('solicitado', flat=True).first()
+        if solicitado is None:
+            return True
+    en_proceso.update(estado='Pendiente', bloqueado_hasta=None, intentos=0)
+    return True
+
+
+def tabla_posiciones(evento):
+    """
+    Tabla de posiciones de los participantes aprobados del evento, leída de par_eve_valor
+    (mantenido al calificar) con un ORDER BY sobre el índice (evento, par_eve_valor).
+    Nunca escribe en la base de datos.
+    """
+    participantes_evento = ParticipanteEvento.objects.filter(
+        evento=evento,
+        par_eve_estado='Aprobado'
+    ).select_related('participante__usuario', 'proyecto').order_by(F('par_eve_valor').desc(nulls_last=True), 'pk')
+
+    return [
+        {
+            'participante_evento': pe,
+            'participante': pe.participante,
+            'proyecto': pe.proyecto,
+            'calificado': pe.par_eve_valor is not None,
+            'puntaje': pe.par_eve_valor if pe.par_eve_valor is not None else 0,
+        }
+        for pe in participantes_evento
+    ]
+
+
+def _calificados(evento):
+    return ParticipanteEvento.objects.filter(
+        evento=evento,
+        confirmado=True,
+        par_eve_estado='Aprobado',
+        par_eve_valor__isnull=False
+    )
+
+
+def ranking_queryset(evento):
+    """
+    Participantes aprobados y calificados del evento anotados con `puesto` (RANK: los empates
+    comparten puesto y se salta al siguiente) y `puesto_denso` (DENSE_RANK), calculados en SQL.
+    """
+    orden = F('par_eve_valor').desc()
+    return _calificados(evento).annotate(
+        puesto=Window(Rank(), order_by=orden),
+        puesto_denso=Window(DenseRank(), order_by=orden),
+    ).order_by('puesto', 'pk')
+
+
+def _filas(queryset):
+    return [
+        {
+            'participante_evento_id': pe['pk'],
+            'participante_id': pe['participante_id'],
+            'puntaje': pe['par_eve_valor'],
+            'puesto': pe['puesto'],
+            'puesto_denso': pe['puesto_denso'],
+        }
+        for pe in queryset.values('pk', 'participante_id', 'par_eve_valor', 'puesto', 'puesto_denso')
+    ]
+
+
+def ranking(evento, limite=None):
+    """
+    Ranking del evento (o sus primeros `limite` puestos, incluyendo empates en el último)
+    como lista de dicts con ids, puntaje y puestos. Se guarda en caché por versión de puntajes.
+    """
+    eve_id = getattr(evento, 'pk', evento)
+    clave = f'ranking:{eve_id}:{version_puntajes(eve_id)}:{limite or "todos"}'
+    filas = cache.get(clave)
+    if filas is None:
+        queryset = ranking_queryset(eve_id)
+        if limite:
+            queryset = queryset.filter(puesto__lte=limite)
+        filas = _filas(queryset)
+        cache.set(clave, filas, TIEMPO_CACHE_RANKING)
+    return filas
+
+
+def puesto_participante(evento, participante):
+    """
+    Puesto (RANK) del participante en el evento, o None si no está calificado. Equivale a contar
+    cuántos tienen más nota sobre el índice (evento, par_eve_valor), sin recorrer el ranking;
+    el resultado queda en caché por versión de puntajes.
+    """
+    eve_id = getattr(evento, 'pk', evento)
+    version = version_puntajes(eve_id)
+    participante_id = getattr(participante, 'pk', participante)
+    clave = f'ranking:{eve_id}:{version}:participante:{participante_id}'
+    puesto = cache.get(clave)
+    if puesto is None:
+        calificados = _calificados(eve_id)
+        nota = calificados.filter(participante_id=participante_id).values_list('par_eve_valor', flat=True).first()
+        # 0 marca en caché "sin puesto" para no repetir la consulta
+        puesto = calificados.filter(par_eve_valor__gt=nota).count() + 1 if nota is not None else 0
+        cache.set(clave, puesto, TIEMPO_CACHE_RANKING)
+    return puesto or None
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from app_participantes.models import ParticipanteEvento
+from .models import Criterio, EvaluadorEvento
+from .puntajes import invalidar_ranking, marcar_puntajes_desactualizados
+
+
+@receiver(post_save, sender=ParticipanteEvento)
+@receiver(post_delete, sender=ParticipanteEvento)
+def invalidar_ranking_participante(sender, instance, **kwargs):
+    # Aprobar, rechazar o confirmar una inscripción cambia quién entra al ranking del evento
+    invalidar_ranking([instance.evento_id])
+
+
+@receiver(post_save, sender=EvaluadorEvento)
+@receiver(post_delete, sender=EvaluadorEvento)
+def invalidar_progreso_evaluador(sender, instance, **kwargs):
+    # El avance de evaluación en caché depende de qué evaluadores están aprobados
+    invalidar_ranking([instance.evento_id])
+
+
+@receiver(post_save, sender=Criterio)
+def rubrica_guardada(sender, instance, update_fields=None, **kwargs):
+    # Cambiar solo la descripción no altera los puntajes
+    if update_fields is not None and 'cri_peso' not in update_fields:
+        return
+    marcar_puntajes_desactualizados(instance.cri_evento_fk_id)
+
+
+@receiver(post_delete, sender=Criterio)
+def rubrica_eliminada(sender, instance, origin=None, **kwargs):
+    # Si el criterio cae en cascada (se borra el evento o su administrador) no hay nada que recalcular
+    if getattr(origin, 'model', type(origin)) is not Criterio:
+        return
+    marcar_puntajes_desactualizados(instance.cri_evento_fk_id)
@@ -1,3 +1,256 @@
+import json
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import transaction
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from app_administradores.models import AdministradorEvento
+from app_eventos.models import Evento
+from app_participantes.models import Participante, ParticipanteEvento, Proyecto
+from app_usuarios.models import Rol, RolUsuario, Usuario
+from .models import Calificacion, Criterio, Evaluador, EvaluadorEvento, PuntajeParticipante, RecalculoPuntajes
+from .puntajes import (
+    MAX_INTENTOS_RECALCULO, guardar_calificaciones, marcar_puntajes_desactualizados, publicar_notas,
+    recalcular_evento, recalculos_disponibles, reconstruir_puntajes,
+)
 
-# Create your tests here.
+
+class EventoCalificadoTestCase(TestCase):
+    """Evento con dos criterios (pesos 2 y 3), dos evaluadores aprobados y cuatro participantes aprobados."""
+
+    @classmethod
+    def setUpTestData(cls):
+        admin = Usuario.objects.create_user(username='admin', email='admin@example.com', password='x')
+        cls.evento = Evento.objects.create(
+            eve_nombre='Feria', eve_descripcion='', eve_ciudad='Manizales', eve_lugar='Centro',
+            eve_fecha_inicio=date(2026, 5, 1), eve_fecha_fin=date(2026, 5, 2), eve_estado='Aprobado',
+            eve_capacidad=100, eve_tienecosto='No',
+            eve_administrador_fk=AdministradorEvento.objects.create(usuario=admin),
+        )
+        cls.c1 = Criterio.objects.create(cri_descripcion='Claridad', cri_peso=2, cri_evento_fk=cls.evento)
+        cls.c2 = Criterio.objects.create(cri_descripcion='Impacto', cri_peso=3, cri_evento_fk=cls.evento)
+        cls.pesos = {cls.c1.pk: 2, cls.c2.pk: 3}
+        RecalculoPuntajes.objects.all().delete()
+
+        cls.evaluadores = []
+        for i in range(2):
+            usuario = Usuario.objects.create_user(username=f'eva{i}', email=f'eva{i}@example.com', password='x')
+            evaluador = Evaluador.objects.create(usuario=usuario)
+            EvaluadorEvento.objects.create(
+                evaluador=evaluador, evento=cls.evento, eva_eve_fecha_hora=timezone.now(), eva_eve_estado='Aprobado',
+            )
+            cls.evaluadores.append(evaluador)
+
+        cls.proyecto = Proyecto.objects.create(evento=cls.evento, titulo='Grupo')
+        cls.participantes = []
+        for i in range(4):
+            usuario = Usuario.objects.create_user(username=f'par{i}', email=f'par{i}@example.com', password='x')
+            participante = Participante.objects.create(usuario=usuario)
+            ParticipanteEvento.objects.create(
+                participante=participante, evento=cls.evento, par_eve_fecha_hora=timezone.now(),
+                par_eve_estado='Aprobado', confirmado=True,
+                # Los dos últimos presentan juntos el mismo proyecto
+                proyecto=cls.proyecto if i >= 2 else None,
+            )
+            cls.participantes.append(participante.pk)
+
+    def calificar(self, evaluador, lote):
+        """Mismo camino que calificar_lote: upsert incremental y publicación, en una transacción."""
+        with transaction.atomic():
+            notas = guardar_calificaciones(self.evento, evaluador, self.pesos, lote)
+            publicar_notas(self.evento, notas)
+        return notas
+
+
+class PuntajesIncrementalesTests(EventoCalificadoTestCase):
+    """El acumulado O(1) de guardar_calificaciones debe coincidir siempre con reconstruir_puntajes."""
+
+    def estado(self):
+        puntajes = {
+            p.participante_id: (round(p.suma_ponderada, 6), p.peso_total, p.num_evaluadores, p.puntaje)
+            for p in PuntajeParticipante.objects.filter(evento=self.evento)
+        }
+        notas = dict(ParticipanteEvento.objects.filter(evento=self.evento).values_list('participante_id', 'par_eve_valor'))
+        return puntajes, notas, Proyecto.objects.get(pk=self.proyecto.pk).pro_valor
+
+    def assertIgualAReconstruir(self):
+        incremental = self.estado()
+        reconstruir_puntajes([self.evento])
+        self.assertEqual(incremental, self.estado())
+
+    def puntaje(self, participante_id):
+        return PuntajeParticipante.objects.get(evento=self.evento, participante_id=participante_id).puntaje
+
+    def test_primera_calificacion(self):
+        p1 = self.participantes[0]
+        self.calificar(self.evaluadores[0], {p1: {self.c1.pk: 4, self.c2.pk: 2}})
+        # (4·2 + 2·3) / (2 + 3)
+        self.assertEqual(self.puntaje(p1), 2.8)
+        self.assertIgualAReconstruir()
+
+    def test_recalificar_el_mismo_criterio(self):
+        p1 = self.participantes[0]
+        self.calificar(self.evaluadores[0], {p1: {self.c1.pk: 4, self.c2.pk: 2}})
+        self.calificar(self.evaluadores[0], {p1: {self.c1.pk: 5}})
+        # (5·2 + 2·3) / 5; sigue siendo un solo evaluador
+        self.assertEqual(self.puntaje(p1), 3.2)
+        self.assertEqual(PuntajeParticipante.objects.get(participante_id=p1).num_evaluadores, 1)
+        self.assertIgualAReconstruir()
+
+    def test_segundo_evaluador(self):
+        p1 = self.participantes[0]
+        self.calificar(self.evaluadores[0], {p1: {self.c1.pk: 5, self.c2.pk: 2}})
+        self.calificar(self.evaluadores[1], {p1: {self.c1.pk: 1, self.c2.pk: 1}})
+        # (16 + 5) / (5 · 2 evaluadores)
+        self.assertEqual(self.puntaje(p1), 2.1)
+        self.assertIgualAReconstruir()
+
+    def test_varios_participantes_en_un_lote(self):
+        p1, p2 = self.participantes[:2]
+        self.calificar(self.evaluadores[0], {p1: {self.c1.pk: 3, self.c2.pk: 3}, p2: {self.c1.pk: 5}})
+        self.calificar(self.evaluadores[1], {p2: {self.c1.pk: 1, self.c2.pk: 4}})
+        self.assertEqual(self.puntaje(p1), 3.0)
+        self.assertIgualAReconstruir()
+
+    def test_proyecto_grupal_toma_la_mejor_nota_de_sus_integrantes(self):
+        p3, p4 = self.participantes[2:]
+        self.calificar(self.evaluadores[0], {p3: {self.c1.pk: 4, self.c2.pk: 4}})
+        # Un integrante sin calificar recibe la nota del proyecto
+        self.assertEqual(ParticipanteEvento.objects.get(participante_id=p4).par_eve_valor, 4.0)
+        self.calificar(self.evaluadores[0], {p4: {self.c1.pk: 2, self.c2.pk: 2}})
+        notas = set(ParticipanteEvento.objects.filter(proyecto=self.proyecto).values_list('par_eve_valor', flat=True))
+        self.assertEqual(notas, {4.0})
+        self.assertEqual(Proyecto.objects.get(pk=self.proyecto.pk).pro_valor, 4)
+        self.assertIgualAReconstruir()
+
+        # Si baja la nota del mejor integrante, el proyecto pasa a la siguiente mejor
+        self.calificar(self.evaluadores[0], {p3: {self.c1.pk: 1, self.c2.pk: 1}})
+        notas = set(ParticipanteEvento.objects.filter(proyecto=self.proyecto).values_list('par_eve_valor', flat=True))
+        self.assertEqual(notas, {2.0})
+        self.assertIgualAReconstruir()
+
+
+class RecalculoTests(EventoCalificadoTestCase):
+    def test_calificar_no_reinicia_un_recalculo_en_curso(self):
+        inicio = timezone.now() - timedelta(minutes=1)
+        RecalculoPuntajes.objects.create(evento=self.evento, estado='En proceso', solicitado=inicio)
+        self.calificar(self.evaluadores[0], {self.participantes[0]: {self.c1.pk: 4}})
+        recalculo = RecalculoPuntajes.objects.get()
+        self.assertEqual(recalculo.estado, 'En proceso')
+        self.assertGreater(recalculo.solicitado, inicio)
+
+    def test_recalcular_repite_una_vez_si_se_califica_mientras_tanto(self):
+        RecalculoPuntajes.objects.create(evento=self.evento, solicitado=timezone.now())
+        llamadas = []
+
+        def reconstruir(*args, **kwargs):
+            llamadas.append(RecalculoPuntajes.objects.get().estado)
+            if len(llamadas) == 1:
+                self.calificar(self.evaluadores[0], {self.participantes[0]: {self.c1.pk: 4}})
+
+        with mock.patch('app_evaluadores.puntajes.reconstruir_puntajes', side_effect=reconstruir):
+            self.assertTrue(recalcular_evento(self.evento))
+        self.assertEqual(llamadas, ['En proceso', 'En proceso'])
+        self.assertEqual(RecalculoPuntajes.objects.get().estado, 'Terminado')
+
+    def test_si_se_sigue_calificando_queda_pendiente_para_el_comando(self):
+        RecalculoPuntajes.objects.create(evento=self.evento, solicitado=timezone.now())
+
+        def reconstruir(*args, **kwargs):
+            self.calificar(self.evaluadores[0], {self.participantes[0]: {self.c1.pk: 4}})
+
+        with mock.patch('app_evaluadores.puntajes.reconstruir_puntajes', side_effect=reconstruir) as simulado:
+            self.assertTrue(recalcular_evento(self.evento))
+        self.assertEqual(simulado.call_count, 2)
+        self.assertEqual(RecalculoPuntajes.objects.get().estado, 'Pendiente')
+
+    def vencer_espera(self):
+        RecalculoPuntajes.objects.update(bloqueado_hasta=timezone.now() - timedelta(seconds=1))
+
+    def test_fallo_en_linea_se_reintenta_con_espera_y_luego_queda_en_error(self):
+        fallo = mock.patch('app_evaluadores.puntajes.reconstruir_puntajes', side_effect=RuntimeError('sin conexión'))
+        with fallo, self.assertLogs('app_evaluadores.puntajes'), self.captureOnCommitCallbacks(execute=True):
+            marcar_puntajes_desactualizados(self.evento)
+        recalculo = RecalculoPuntajes.objects.get()
+        self.assertEqual((recalculo.estado, recalculo.intentos, recalculo.error), ('Pendiente', 1, 'sin conexión'))
+        self.assertGreater(recalculo.bloqueado_hasta, timezone.now())
+        self.assertFalse(recalculos_disponibles().exists())
+
+        # El comando toma los reintentos por el mismo camino
+        for _ in range(MAX_INTENTOS_RECALCULO - 1):
+            self.vencer_espera()
+            with fallo:
+                call_command('recalcular_puntajes', stdout=StringIO(), stderr=StringIO())
+        recalculo.refresh_from_db()
+        self.assertEqual((recalculo.estado, recalculo.intentos, recalculo.bloqueado_hasta), ('Error', MAX_INTENTOS_RECALCULO, None))
+        self.assertFalse(recalculos_disponibles().exists())
+
+    def test_reintento_exitoso_reinicia_los_intentos(self):
+        RecalculoPuntajes.objects.create(evento=self.evento, solicitado=timezone.now())
+        with mock.patch('app_evaluadores.puntajes.reconstruir_puntajes', side_effect=RuntimeError('sin conexión')):
+            with self.assertRaises(RuntimeError):
+                recalcular_evento(self.evento)
+        self.vencer_espera()
+        salida = StringIO()
+        call_command('recalcular_puntajes', stdout=salida, stderr=StringIO())
+        recalculo = RecalculoPuntajes.objects.get()
+        self.assertEqual((recalculo.estado, recalculo.intentos, recalculo.error), ('Terminado', 0, ''))
+        self.assertIn('Terminado', salida.getvalue())
+
+
+class CalificarLoteVistaTests(EventoCalificadoTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        rol = Rol.objects.create(nombre='evaluador')
+        RolUsuario.objects.create(usuario=cls.evaluadores[0].usuario, rol=rol)
+
+    def setUp(self):
+        self.client.force_login(self.evaluadores[0].usuario)
+        self.url = reverse('calificar_lote_evaluador', args=[self.evento.pk])
+
+    def enviar(self, datos):
+        return self.client.post(self.url, json.dumps(datos), content_type='application/json')
+
+    def assertRechazado(self, respuesta, participante_id, mensaje):
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn(mensaje, respuesta.json()['errores'][str(participante_id)])
+        self.assertFalse(Calificacion.objects.exists())
+
+    def test_valores_no_enteros(self):
+        p1, p2 = self.participantes[:2]
+        respuesta = self.enviar({p1: {self.c1.pk: 4}, p2: {self.c1.pk: 2.5}})
+        self.assertRechazado(respuesta, p2, f'criterio {self.c1.pk}: debe ser un entero')
+        for valor in (True, '4'):
+            respuesta = self.enviar({p1: {self.c1.pk: valor}})
+            self.assertRechazado(respuesta, p1, 'debe ser un entero')
+
+    def test_criterio_de_otro_evento(self):
+        p1 = self.participantes[0]
+        respuesta = self.enviar({p1: {self.c2.pk + 100: 3}})
+        self.assertRechazado(respuesta, p1, f'El criterio {self.c2.pk + 100} no pertenece a este evento.')
+
+    def test_lote_demasiado_grande(self):
+        respuesta = self.enviar({i: {self.c1.pk: 3} for i in range(1, 502)})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('máximo 500', respuesta.json()['error'])
+
+    def test_lote_valido_se_guarda_y_reenviarlo_no_cambia_nada(self):
+        p1, p2 = self.participantes[:2]
+        datos = {p1: {self.c1.pk: 4, self.c2.pk: 2}, p2: {self.c1.pk: 5}}
+        for _ in range(2):
+            respuesta = self.enviar(datos)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertEqual(respuesta.json()['calificaciones'], 3)
+            self.assertEqual(respuesta.json()['notas'][str(p1)], 2.8)
+            self.assertEqual(Calificacion.objects.count(), 3)
+
+        # Un nuevo envío actualiza la calificación existente en vez de duplicarla
+        respuesta = self.enviar({p1: {self.c1.pk: 5}})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(Calificacion.objects.get(participante_id=p1, criterio=self.c1).cal_valor, 5)
+        self.assertEqual(Calificacion.objects.count(), 3)
+        self.assertEqual(PuntajeParticipante.objects.get(participante_id=p1).puntaje, 3.2)
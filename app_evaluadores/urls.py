@@ -6,9 +6,11 @@ urlpatterns = [
     path('gestionar-items/<int:eve_id>/', views.gestionar_items, name='gestionar_items_evaluador'),
     path('agregar-item/<int:eve_id>/', views.agregar_item, name='agregar_item_evaluador'),
     path('editar-item/<int:criterio_id>/', views.editar_item, name='editar_item_evaluador'),
+    path('simular-pesos/<int:eve_id>/', views.simular_pesos, name='simular_pesos_evaluador'),
     path('eliminar-item/<int:criterio_id>/', views.eliminar_item, name='eliminar_item_evaluador'),
     path('lista-participantes-evaluador/<int:eve_id>/', views.lista_participantes, name='lista_participantes_evaluador'),
     path('calificar-participante/<int:eve_id>/<int:participante_id>/', views.calificar_participante, name='calificar_participante_evaluador'),
+    path('calificar-lote/<int:eve_id>/', views.calificar_lote, name='calificar_lote_evaluador'),
     path('tabla-posiciones/<int:eve_id>/', views.ver_tabla_posiciones, name='tabla_posiciones_evaluador'),
     path('descargar-tabla-posiciones-pdf/<int:eve_id>/', views.descargar_tabla_posiciones_pdf, name='descargar_tabla_posiciones_pdf'),
     path('informacion-detallada/<int:eve_id>/', views.informacion_detallada, name='informacion_detallada_evaluador'),
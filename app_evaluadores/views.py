@@ -1,13 +1,20 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.db import transaction
 from django.contrib.auth.decorators import login_required, user_passes_test
 from app_usuarios.permisos import es_evaluador
 from django.contrib import messages
-from django.http import HttpResponse, FileResponse, Http404
+from django.http import HttpResponse, FileResponse, Http404, JsonResponse
+from django.views.decorators.http import require_POST
 from .models import Evaluador
 from app_eventos.models import Evento, EventoCategoria
-from app_evaluadores.models import Criterio, Calificacion, EvaluadorEvento
+from app_evaluadores.models import Criterio, Calificacion, EvaluadorEvento, RecalculoPuntajes
+from app_evaluadores.matriz import MatrizCalificaciones
+from app_evaluadores.analitica import tabla_posiciones_normalizada, pesos_candidatos, simular_ranking
+from app_evaluadores.puntajes import tabla_posiciones, guardar_calificaciones, publicar_nota, publicar_notas
 from app_participantes.models import ParticipanteEvento, Participante
 from app_usuarios.models import Usuario
+from app_administradores.models import CertificadoEmitido
+import json
 import os
 from django.conf import settings
 from reportlab.lib.pagesizes import letter
@@ -18,57 +25,6 @@ from reportlab.lib.units import inch
 from reportlab.lib.styles import ParagraphStyle
 
 
-def calcular_y_guardar_nota_general(participante, evento):
-    criterios = Criterio.objects.filter(cri_evento_fk=evento)
-    peso_total = sum(c.cri_peso for c in criterios) or 1
-    
-    calificaciones = Calificacion.objects.filter(
-        participante=participante,
-        criterio__cri_evento_fk=evento
-    ).select_related('criterio')
-    
-    evaluadores_ids = set(c.evaluador_id for c in calificaciones)
-    num_evaluadores = len(evaluadores_ids)
-    
-    if num_evaluadores > 0:
-        puntaje_ponderado = sum(
-            c.cal_valor * c.criterio.cri_peso for c in calificaciones
-        ) / (peso_total * num_evaluadores)
-        
-        participante_evento = ParticipanteEvento.objects.get(
-            participante=participante,
-            evento=evento
-        )
-        participante_evento.par_eve_valor = round(puntaje_ponderado, 2)
-        participante_evento.save()
-        
-        return round(puntaje_ponderado, 2)
-    
-    return 0
-
-
-
-def obtener_puesto_participante(participante, evento):
-    """
-    Obtiene el puesto de un participante en un evento basado en su nota
-    """
-    # Obtener todas las participaciones del evento ordenadas por nota
-    participaciones = ParticipanteEvento.objects.filter(
-        evento=evento,
-        par_eve_estado='Aprobado',
-        par_eve_valor__isnull=False
-    ).order_by('-par_eve_valor')
-    
-    # Encontrar el puesto del participante
-    for i, pe in enumerate(participaciones, 1):
-        if pe.participante == participante:
-            return i
-    
-    return None  # No encontrado o sin calificación
-
-
-
-
 @login_required
 @user_passes_test(es_evaluador, login_url='login')
 def dashboard_evaluador(request):
@@ -90,7 +46,8 @@ def dashboard_evaluador(request):
     return render(request, 'app_evaluadores/dashboard_evaluador.html', {
         'evaluador': evaluador,
         'inscripciones': inscripciones,
-        'inscripciones_con_archivos': inscripciones_con_archivos
+        'inscripciones_con_archivos': inscripciones_con_archivos,
+        'certificados': CertificadoEmitido.objects.filter(usuario=request.user, tipo__in=['evaluador']).exclude(archivo='').select_related('evento'),
     })
 
 
@@ -177,6 +134,23 @@ def editar_item(request, criterio_id):
         'peso_restante': peso_restante,
     })
 
+@login_required
+@user_passes_test(es_evaluador, login_url='login')
+def simular_pesos(request, eve_id):
+    """Ranking que resultaría con los pesos `peso_<cri_id>` recibidos, sin guardar nada."""
+    evento = get_object_or_404(Evento, pk=eve_id)
+    evaluador = getattr(request.user, 'evaluador', None)
+    if not evaluador or not EvaluadorEvento.objects.filter(
+        evaluador=evaluador, evento=evento, eva_eve_estado='Aprobado'
+    ).exists():
+        return JsonResponse({'success': False, 'error': 'No estás aprobado como evaluador en este evento.'}, status=403)
+    try:
+        pesos = pesos_candidatos(request.GET)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, 'ranking': simular_ranking(evento, pesos)})
+
+
 @login_required
 @user_passes_test(es_evaluador, login_url='login')
 def eliminar_item(request, criterio_id):
@@ -262,45 +236,27 @@ def calificar_participante(request, eve_id, participante_id):
     criterios = Criterio.objects.filter(cri_evento_fk=evento)
     evaluador = request.user.evaluador
     if request.method == 'POST':
+        # Validar todo el formulario antes de escribir
+        nuevos = {}
         for criterio in criterios:
             valor = request.POST.get(f'criterio_{criterio.cri_id}')
             if valor:
                 try:
                     valor_int = int(valor)
-                    if 1 <= valor_int <= 5:
-                        calificacion, created = Calificacion.objects.get_or_create(
-                            evaluador=evaluador,
-                            criterio=criterio,
-                            participante=participante,
-                            defaults={'cal_valor': valor_int}
-                        )
-                        if not created:
-                            calificacion.cal_valor = valor_int
-                            calificacion.save()
-                    else:
-                        messages.error(request, f"El valor de '{criterio.cri_descripcion}' debe estar entre 1 y 5.")
-                        return redirect(request.path)
                 except ValueError:
                     messages.error(request, f"Valor inválido para '{criterio.cri_descripcion}'.")
                     return redirect(request.path)
-    
-        # Calcular nota general para este participante
-        nota = calcular_y_guardar_nota_general(participante, evento)
-
-        # Propagar calificación al proyecto y demás integrantes si es grupal
-        if participacion.proyecto:
-            proyecto = participacion.proyecto
-            proyecto.pro_valor = nota
-            proyecto.save()
-        
-            # Actualizar todos los integrantes del proyecto
-            integrantes = ParticipanteEvento.objects.filter(
-                proyecto=proyecto,
-                par_eve_estado='Aprobado'
-            )
-            for integrante in integrantes:
-                integrante.par_eve_valor = nota
-                integrante.save()
+                if not 1 <= valor_int <= 5:
+                    messages.error(request, f"El valor de '{criterio.cri_descripcion}' debe estar entre 1 y 5.")
+                    return redirect(request.path)
+                nuevos[criterio.cri_id] = valor_int
+
+        with transaction.atomic():
+            # Un upsert para todos los criterios y el puntaje materializado, propagado al proyecto e integrantes
+            pesos = {c.cri_id: c.cri_peso for c in criterios}
+            notas = guardar_calificaciones(evento, evaluador, pesos, {participante.pk: nuevos})
+            if notas[participante.pk] is not None:
+                publicar_nota(evento, participante, notas[participante.pk])
     
         messages.success(request, "Calificaciones guardadas exitosamente.")
         return redirect('lista_participantes_evaluador', eve_id=eve_id)
@@ -312,6 +268,90 @@ def calificar_participante(request, eve_id, participante_id):
     })
 
 
+# Máximo de participantes por lote en calificar_lote
+MAX_PARTICIPANTES_LOTE = 500
+
+
+@login_required
+@user_passes_test(es_evaluador, login_url='login')
+@require_POST
+def calificar_lote(request, eve_id):
+    """
+    Recibe en JSON las calificaciones de varios participantes ({participante_id: {criterio_id: valor}})
+    y las guarda todas o ninguna. Reenviar el mismo lote no cambia el resultado, así que una página
+    sin conexión puede sincronizar sus calificaciones pendientes cuando vuelva a tenerla.
+    """
+    evento = get_object_or_404(Evento, pk=eve_id)
+    evaluador = getattr(request.user, 'evaluador', None)
+    if not evaluador or not EvaluadorEvento.objects.filter(
+        evaluador=evaluador, evento=evento, eva_eve_estado='Aprobado'
+    ).exists():
+        return JsonResponse({'success': False, 'error': 'No estás aprobado como evaluador en este evento.'}, status=403)
+
+    try:
+        datos = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'success': False, 'error': 'El cuerpo debe ser JSON válido.'}, status=400)
+    if not isinstance(datos, dict) or not datos:
+        return JsonResponse({'success': False, 'error': 'Envía un objeto {participante_id: {criterio_id: valor}}.'}, status=400)
+    if len(datos) > MAX_PARTICIPANTES_LOTE:
+        return JsonResponse({'success': False, 'error': f'El lote admite máximo {MAX_PARTICIPANTES_LOTE} participantes.'}, status=400)
+
+    # Validar todo el lote antes de escribir
+    pesos = dict(Criterio.objects.filter(cri_evento_fk=evento).values_list('cri_id', 'cri_peso'))
+    aprobados = set(ParticipanteEvento.objects.filter(
+        evento=evento,
+        par_eve_estado='Aprobado'
+    ).values_list('participante_id', flat=True))
+    lote = {}
+    errores = {}
+    for participante_id, valores in datos.items():
+        try:
+            participante_id = int(participante_id)
+        except (TypeError, ValueError):
+            errores[participante_id] = 'Identificador de participante inválido.'
+            continue
+        if participante_id not in aprobados:
+            errores[participante_id] = 'El participante no está aprobado en este evento.'
+            continue
+        if not isinstance(valores, dict):
+            errores[participante_id] = 'Las calificaciones deben ser un objeto {criterio_id: valor}.'
+            continue
+        nuevos = {}
+        for criterio_id, valor in valores.items():
+            try:
+                criterio_id = int(criterio_id)
+            except (TypeError, ValueError):
+                errores[participante_id] = f'Criterio inválido: {criterio_id}.'
+                break
+            # Solo enteros JSON: int() truncaría 2.7 a 2 y aceptaría true como 1
+            if type(valor) is not int:
+                errores[participante_id] = f'Valor inválido para el criterio {criterio_id}: debe ser un entero.'
+                break
+            if criterio_id not in pesos:
+                errores[participante_id] = f'El criterio {criterio_id} no pertenece a este evento.'
+                break
+            if not 1 <= valor <= 5:
+                errores[participante_id] = f'El valor del criterio {criterio_id} debe estar entre 1 y 5.'
+                break
+            nuevos[criterio_id] = valor
+        else:
+            if nuevos:
+                lote[participante_id] = nuevos
+    if errores:
+        return JsonResponse({'success': False, 'error': 'El lote tiene errores; no se guardó nada.', 'errores': errores}, status=400)
+
+    with transaction.atomic():
+        notas = guardar_calificaciones(evento, evaluador, pesos, lote) if lote else {}
+        publicar_notas(evento, notas)
+
+    return JsonResponse({
+        'success': True,
+        'calificaciones': sum(len(nuevos) for nuevos in lote.values()),
+        'notas': notas,
+    })
+
+
 @login_required
 @user_passes_test(es_evaluador, login_url='login')
 def ver_tabla_posiciones(request, eve_id):
@@ -326,51 +366,19 @@ def ver_tabla_posiciones(request, eve_id):
         messages.error(request, "No estás inscrito en este evento.")
         return redirect('dashboard_evaluador')
 
-    criterios = Criterio.objects.filter(cri_evento_fk=evento)
-    peso_total = sum(c.cri_peso for c in criterios) or 1
-
-    # Incluir el proyecto en el select_related
-    participantes_evento = ParticipanteEvento.objects.filter(
-        evento=evento,
-        par_eve_estado='Aprobado'
-    ).select_related('participante', 'proyecto')  # 👈 Clave: agregar 'proyecto'
-
-    posiciones = []
-    for pe in participantes_evento:
-        participante = pe.participante
-        
-        # Si ya tenemos la nota guardada, la usamos; si no, la calculamos
-        if pe.par_eve_valor is not None:
-            puntaje_ponderado = pe.par_eve_valor
-        else:
-            calificaciones = Calificacion.objects.filter(
-                participante=participante,
-                criterio__cri_evento_fk=evento
-            ).select_related('criterio')
-            evaluadores_ids = set(c.evaluador_id for c in calificaciones)
-            num_evaluadores = len(evaluadores_ids)
-            if num_evaluadores > 0:
-                puntaje_ponderado = sum(
-                    c.cal_valor * c.criterio.cri_peso for c in calificaciones
-                ) / (peso_total * num_evaluadores)
-                puntaje_ponderado = round(puntaje_ponderado, 2)
-                pe.par_eve_valor = puntaje_ponderado
-                pe.save()
-            else:
-                puntaje_ponderado = 0
-
-        # Guardar también el proyecto
-        posiciones.append({
-            'participante': participante,
-            'puntaje': puntaje_ponderado,
-            'proyecto': pe.proyecto  # 👈 Aquí está el dato clave
-        })
-
-    posiciones.sort(key=lambda x: x['puntaje'], reverse=True)
+    posiciones = tabla_posiciones(evento)
+    # Modo opcional que corrige la severidad de cada evaluador (z-score por evaluador)
+    modo = request.GET.get('modo')
+    analisis = None
+    if modo == 'normalizado':
+        posiciones, analisis = tabla_posiciones_normalizada(evento, posiciones)
 
     return render(request, 'tabla_posiciones_evaluador.html', {
         'evento': evento,
-        'posiciones': posiciones
+        'posiciones': posiciones,
+        'modo': modo,
+        'analisis': analisis,
+        'recalculo': RecalculoPuntajes.objects.filter(evento=evento).exclude(estado='Terminado').first(),
     })
 
 @login_required
@@ -388,11 +396,7 @@ def descargar_tabla_posiciones_pdf(request, eve_id):
         return redirect('dashboard_evaluador')
 
     # Obtener participantes calificados y ordenados
-    participantes_evento = ParticipanteEvento.objects.filter(
-        evento=evento,
-        par_eve_estado='Aprobado',
-        par_eve_valor__isnull=False
-    ).select_related('participante__usuario', 'proyecto').order_by('-par_eve_valor')
+    posiciones = [p for p in tabla_posiciones(evento) if p['calificado']]
 
     # Crear la respuesta HTTP con el contenido PDF
     response = HttpResponse(content_type='application/pdf')
@@ -427,11 +431,12 @@ def descargar_tabla_posiciones_pdf(request, eve_id):
     # Preparar datos para la tabla
     data = [["Posición", "Nombre del Participante", "Correo", "Proyecto Grupal / Individual", "Puntaje"]]
 
-    for i, pe in enumerate(participantes_evento, start=1):
-        nombre = f"{pe.participante.usuario.first_name} {pe.participante.usuario.last_name}"
-        correo = pe.participante.usuario.email
-        proyecto = pe.proyecto.titulo if pe.proyecto else "Individual"
-        puntaje = f"{pe.par_eve_valor:.2f}"
+    for i, posicion in enumerate(posiciones, start=1):
+        usuario = posicion['participante'].usuario
+        nombre = f"{usuario.first_name} {usuario.last_name}"
+        correo = usuario.email
+        proyecto = posicion['proyecto'].titulo if posicion['proyecto'] else "Individual"
+        puntaje = f"{posicion['puntaje']:.2f}"
 
         # Usar Paragraph para permitir saltos de línea si es necesario
         data.append([str(i), nombre, correo, Paragraph(proyecto, styles['Normal']), puntaje])
@@ -481,32 +486,29 @@ def informacion_detallada(request, eve_id):
     except (EvaluadorEvento.DoesNotExist, Evaluador.DoesNotExist):
         messages.error(request, "No estás inscrito en este evento.")
         return redirect('dashboard_evaluador')
-    criterios = Criterio.objects.filter(cri_evento_fk=evento)
-    total_criterios = criterios.count()
-    participantes_evento = ParticipanteEvento.objects.filter(
+    criterios = list(Criterio.objects.filter(cri_evento_fk=evento).order_by('cri_id'))
+    total_criterios = len(criterios)
+    participantes_evento = list(ParticipanteEvento.objects.filter(
         evento=evento,
         par_eve_estado='Aprobado'
-    ).select_related('participante__usuario')
+    ).select_related('participante__usuario'))
+    # Las calificaciones de este evaluador para todo el evento en una sola consulta
+    matriz = MatrizCalificaciones.del_evento(
+        evento, [pe.participante_id for pe in participantes_evento], evaluador=evaluador, criterios=criterios
+    )
     participantes_info = []
     for pe in participantes_evento:
         participante = pe.participante
-        calificaciones_actual = Calificacion.objects.filter(
-            evaluador=evaluador,
-            participante=participante,
-            criterio__cri_evento_fk=evento
-        ).select_related('criterio')
-        total_aporte = 0
-        calificaciones_lista = []
-        for c in calificaciones_actual:
-            aporte = (c.cal_valor * c.criterio.cri_peso) / 100
-            total_aporte += aporte
-            calificaciones_lista.append({
-                'criterio': c.criterio,
-                'cal_valor': c.cal_valor,
-                'aporte': round(aporte, 2)
-            })
+        calificaciones_lista = [
+            {
+                'criterio': criterio,
+                'cal_valor': valor,
+                'aporte': round(valor * criterio.cri_peso / 100, 2)
+            }
+            for _, criterio, valor in matriz.calificaciones(participante.pk)
+        ]
         evaluado = len(calificaciones_lista) == total_criterios
-        promedio_ponderado = round(total_aporte, 2) if calificaciones_lista else None
+        promedio_ponderado = round(matriz.suma_ponderada(participante.pk), 2) if calificaciones_lista else None
         participantes_info.append({
             'participante': participante,
             'evaluado': evaluado,
@@ -568,7 +570,7 @@ def modificar_inscripcion_evaluador(request, evento_id):
         usuario.save()
         archivo = request.FILES.get('documentacion')
         if archivo:
-            inscripcion.eva_eve_qr = archivo
+            inscripcion.eva_eve_documentos = archivo
             inscripcion.save()
         messages.success(request, "Información actualizada correctamente.")
         return redirect('dashboard_evaluador')
@@ -667,7 +669,7 @@ def ver_perfil_evaluador(request, evento_id):
         'evento': evaluador_evento.evento,
         'evaluador': evaluador_evento,
         'usuario': usuario,  # Agregar el usuario al contexto
-        'qr_url': evaluador_evento.eva_eve_qr.url if evaluador_evento.eva_eve_qr else None,
+        'qr_url': evaluador_evento.qr_url,
     })
 
 @login_required
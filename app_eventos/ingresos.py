@@ -0,0 +1,178 @@
+"""
+Registro de ingresos al evento desde los dispositivos de la puerta. El dispositivo envía el token
+del QR (ver app_eventos.qr): la firma se valida sin consultar la base de datos y solo los tokens
+válidos del evento llegan a ella, con una consulta por clave primaria y un INSERT. Cada dispositivo
+se identifica con su propia clave (DispositivoIngreso), que el administrador puede rotar o revocar.
+"""
+import hashlib
+import secrets
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from app_asistentes.models import AsistenteEvento
+from app_evaluadores.models import EvaluadorEvento
+from app_participantes.models import ParticipanteEvento
+from .models import DispositivoIngreso, Ingreso
+from .qr import PREFIJOS, leer_token
+
+# La caché es la compartida de CACHES, así que revocar o rotar una clave la borra para todos los
+# workers; el tiempo solo acota una lectura que se cruce con la revocación y vuelva a guardarla
+TIEMPO_CACHE_CLAVE = 60
+MAX_INGRESOS_POR_LOTE = 5000
+# modelo del token -> (modelo, campo de estado, ruta al usuario)
+INSCRIPCIONES = {
+    'asistenteevento': (AsistenteEvento, 'asi_eve_estado', 'asistente__usuario'),
+    'participanteevento': (ParticipanteEvento, 'par_eve_estado', 'participante__usuario'),
+    'evaluadorevento': (EvaluadorEvento, 'eva_eve_estado', 'evaluador__usuario'),
+}
+
+
+def _hash_clave(clave):
+    return hashlib.sha256(clave.encode()).hexdigest()
+
+
+def _cache_clave(clave_hash):
+    return f'dispositivo_ingreso:{clave_hash}'
+
+
+def nueva_clave(dispositivo):
+    """Asigna una clave nueva al dispositivo (la anterior deja de servir) y la retorna; solo se guarda su hash."""
+    clave = secrets.token_urlsafe(24)
+    anterior = dispositivo.clave
+    dispositivo.clave = _hash_clave(clave)
+    dispositivo.save(update_fields=['clave'] if dispositivo.pk else None)
+    if anterior:
+        transaction.on_commit(lambda: cache.delete(_cache_clave(anterior)))
+    return clave
+
+
+def revocar_dispositivo(dispositivo):
+    dispositivo.revocado = timezone.now()
+    dispositivo.save(update_fields=['revocado'])
+    transaction.on_commit(lambda: cache.delete(_cache_clave(dispositivo.clave)))
+
+
+def dispositivo_autorizado(request, evento_id):
+    """
+    Nombre del dispositivo si la petición trae 'Authorization: Bearer <clave>' de un dispositivo
+    vigente del evento; None si no. La consulta se guarda en caché un minuto.
+    """
+    cabecera = request.headers.get('Authorization', '')
+    if not cabecera.startswith('Bearer ') or len(cabecera) > 200:
+        return None
+    clave_hash = _hash_clave(cabecera[7:])
+    clave_cache = _cache_clave(clave_hash)
+    dispositivo = cache.get(clave_cache)
+    if dispositivo is None:
+        # (evento, nombre), o () si la clave no existe o está revocada
+        dispositivo = DispositivoIngreso.objects.filter(clave=clave_hash, revocado__isnull=True).values_list(
+            'evento_id', 'nombre',
+        ).first() or ()
+        cache.set(clave_cache, dispositivo, TIEMPO_CACHE_CLAVE)
+    if not dispositivo or dispositivo[0] != evento_id:
+        return None
+    return dispositivo[1]
+
+
+def registrar_ingreso(evento_id, token, dispositivo=''):
+    """
+    Registra el ingreso del día para el token del QR. Retorna (código HTTP, respuesta JSON); un
+    segundo escaneo el mismo día no es un error, se responde con duplicado=True.
+    """
+    datos = leer_token(token or '')
+    if datos is None:
+        return 400, {'success': False, 'error': 'QR no válido.'}
+    modelo_token, evento_token, inscripcion_id = datos
+    if evento_token != evento_id:
+        return 409, {'success': False, 'error': 'El QR pertenece a otro evento.'}
+
+    modelo, campo_estado, usuario = INSCRIPCIONES[modelo_token]
+    inscripcion = modelo.objects.filter(pk=inscripcion_id, evento_id=evento_id).values_list(
+        campo_estado, f'{usuario}__first_name', f'{usuario}__last_name',
+    ).first()
+    if inscripcion is None or inscripcion[0] != 'Aprobado':
+        return 403, {'success': False, 'error': 'La inscripción no está aprobada.'}
+
+    tipo = PREFIJOS[modelo_token]
+    ingreso = Ingreso(
+        evento_id=evento_id, tipo=tipo, inscripcion_id=inscripcion_id,
+        dia=timezone.localdate(), dispositivo=(dispositivo or '')[:50],
+    )
+    try:
+        with transaction.atomic():
+            ingreso.save(force_insert=True)
+        duplicado = False
+    except IntegrityError:
+        ingreso = Ingreso.objects.only('registrado').get(tipo=tipo, inscripcion_id=inscripcion_id, dia=ingreso.dia)
+        duplicado = True
+
+    return 200, {
+        'success': True,
+        'duplicado': duplicado,
+        'tipo': dict(Ingreso.TIPO_CHOICES)[tipo],
+        'nombre': f'{inscripcion[1]} {inscripcion[2]}'.strip(),
+        'registrado': timezone.localtime(ingreso.registrado).isoformat(),
+    }
+
+
+def _fecha_ingreso(valor, inicio, fin):
+    """
+    Fecha y hora del ingreso enviada por el dispositivo (ISO 8601), o None si no es válida o su
+    día está fuera de las fechas del evento (inicio..fin).
+    """
+    try:
+        registrado = parse_datetime(str(valor or ''))
+    except ValueError:
+        return None
+    if registrado is None:
+        return None
+    if timezone.is_naive(registrado):
+        registrado = timezone.make_aware(registrado)
+    # Un reloj adelantado en el dispositivo no puede registrar ingresos a futuro
+    registrado = min(registrado, timezone.now())
+    if not inicio <= timezone.localdate(registrado) <= fin:
+        return None
+    return registrado
+
+
+def sincronizar_ingresos(evento, ingresos, dispositivo=''):
+    """
+    Guarda los ingresos registrados sin conexión: [{'token': ..., 'registrado': fecha ISO}, ...],
+    solo si ocurrieron durante las fechas del evento. Retorna (aceptados, rechazados); los que ya
+    estaban registrados ese día cuentan como aceptados y se conserva el primero.
+    """
+    evento_id = evento.pk
+    rechazados = []
+    validos = {}
+    for entrada in ingresos:
+        token = str(entrada.get('token', '')) if isinstance(entrada, dict) else ''
+        datos = leer_token(token)
+        if datos is None:
+            rechazados.append({'token': token, 'error': 'QR no válido.'})
+        elif datos[1] != evento_id:
+            rechazados.append({'token': token, 'error': 'El QR pertenece a otro evento.'})
+        else:
+            registrado = _fecha_ingreso(entrada.get('registrado'), evento.eve_fecha_inicio, evento.eve_fecha_fin)
+            if registrado is None:
+                rechazados.append({'token': token, 'error': 'Fecha no válida.'})
+            else:
+                validos.setdefault(datos[0], []).append((token, datos[2], registrado))
+
+    nuevos = []
+    for modelo_token, entradas in validos.items():
+        modelo, campo_estado, _ = INSCRIPCIONES[modelo_token]
+        aprobados = set(modelo.objects.filter(
+            evento_id=evento_id, pk__in={pk for _, pk, _ in entradas}, **{campo_estado: 'Aprobado'},
+        ).values_list('pk', flat=True))
+        for token, pk, registrado in sorted(entradas, key=lambda entrada: entrada[2]):
+            if pk not in aprobados:
+                rechazados.append({'token': token, 'error': 'La inscripción no está aprobada.'})
+                continue
+            nuevos.append(Ingreso(
+                evento_id=evento_id, tipo=PREFIJOS[modelo_token], inscripcion_id=pk,
+                dia=timezone.localdate(registrado), registrado=registrado, dispositivo=(dispositivo or '')[:50],
+            ))
+    # Los que chocan con (tipo, inscripcion_id, dia) ya registrados se ignoran
+    Ingreso.objects.bulk_create(nuevos, batch_size=500, ignore_conflicts=True)
+    return len(nuevos), rechazados
@@ -0,0 +1,169 @@
+import json
+import statistics
+import time
+import uuid
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from app_admin.models import Superadmin
+from app_eventos.models import Evento
+from app_evaluadores.models import EvaluadorEvento
+from app_usuarios.models import Usuario, Rol, RolUsuario
+
+CORREO_SUPERADMIN = 'benchmark.superadmin@eventsoft.test'
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide tiempo y número de consultas de las vistas críticas con el cliente de pruebas de Django '
+        'sobre los datos generados con generar_datos. Guarda los resultados en JSON y puede compararlos '
+        'con una corrida anterior.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evento', type=int, default=None, help='Evento a medir (por defecto el aprobado con más participantes).')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Veces que se ejecuta cada vista.')
+        parser.add_argument('--salida', default=None, help='Archivo JSON donde guardar los resultados.')
+        parser.add_argument('--comparar', default=None, help='Archivo JSON de una corrida anterior para comparar.')
+        parser.add_argument('--tolerancia-tiempo', type=float, default=0.25, help='Aumento relativo de la mediana permitido (0.25 = 25%%).')
+        parser.add_argument('--tolerancia-consultas', type=float, default=0.0, help='Aumento relativo de consultas permitido.')
+
+    def handle(self, *args, **options):
+        evento = self.elegir_evento(options['evento'])
+        escenarios = self.escenarios(evento)
+        resultados = {}
+        # Los correos se quedan en memoria y cada request se revierte para no alterar los datos medidos
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            for nombre, cliente, metodo, url, datos in escenarios:
+                resultados[nombre] = self.medir(cliente, metodo, url, datos, options['repeticiones'])
+                r = resultados[nombre]
+                self.stdout.write(f"{nombre:<45} {r['estado']:>4} {r['mediana_ms']:>10.1f} ms {r['consultas']:>6} consultas")
+
+        corrida = {
+            'fecha': timezone.now().isoformat(),
+            'evento': evento.eve_id,
+            'repeticiones': options['repeticiones'],
+            'resultados': resultados,
+        }
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(corrida, archivo, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as archivo:
+                base = json.load(archivo)
+            fallas = self.comparar(base['resultados'], resultados, options['tolerancia_tiempo'], options['tolerancia_consultas'])
+            if fallas:
+                raise CommandError(f'{fallas} vista(s) superan la tolerancia respecto a {options["comparar"]}.')
+            self.stdout.write(self.style.SUCCESS('Sin regresiones respecto a la corrida base.'))
+
+    def elegir_evento(self, eve_id):
+        if eve_id:
+            evento = Evento.objects.filter(pk=eve_id).first()
+        else:
+            evento = Evento.objects.con_estado_efectivo(['Aprobado']).annotate(
+                aprobados=Count('participanteevento', filter=Q(participanteevento__par_eve_estado='Aprobado'))
+            ).order_by('-aprobados').first()
+        if not evento:
+            raise CommandError('No hay eventos para medir. Ejecuta primero generar_datos.')
+        return evento
+
+    def cliente(self, usuario=None, rol=None):
+        cliente = Client(HTTP_HOST='localhost')
+        if usuario:
+            cliente.force_login(usuario)
+            sesion = cliente.session
+            sesion['rol_sesion'] = rol
+            sesion.save()
+        return cliente
+
+    def superadmin(self):
+        rol, _ = Rol.objects.get_or_create(nombre='superadmin', defaults={'descripcion': 'Superadministrador'})
+        usuario = Usuario.objects.filter(email=CORREO_SUPERADMIN).first()
+        if not usuario:
+            usuario = Usuario.objects.create_user(
+                username='benchmark_superadmin', email=CORREO_SUPERADMIN, password=None, documento='0',
+            )
+        RolUsuario.objects.get_or_create(usuario=usuario, rol=rol)
+        Superadmin.objects.get_or_create(usuario=usuario)
+        return usuario
+
+    def escenarios(self, evento):
+        eve = {'eve_id': evento.eve_id}
+        anonimo = self.cliente()
+        administrador = self.cliente(evento.eve_administrador_fk.usuario, 'administrador_evento')
+        superadmin = self.cliente(self.superadmin(), 'superadmin')
+        escenarios = [
+            ('ver_eventos', anonimo, 'get', reverse('ver_eventos'), None),
+            ('detalle_evento_visitante', anonimo, 'get', reverse('detalle_evento_visitante', kwargs=eve), None),
+            ('tabla_posiciones_administrador', administrador, 'get', reverse('tabla_posiciones_administrador', kwargs=eve), None),
+            ('estadisticas_generales', administrador, 'get', reverse('estadisticas_generales'), None),
+            ('detalle_evento_admin', superadmin, 'get', reverse('detalle_evento_admin', kwargs=eve), None),
+            ('informacion_detallada_administrador_evento', administrador, 'get', reverse('informacion_detallada_administrador_evento', kwargs=eve), None),
+            ('gestionar_notificaciones', administrador, 'get', reverse('gestionar_notificaciones') + f'?tipo=asistentes&evento={evento.eve_id}', None),
+            ('registro_evento (formulario)', anonimo, 'get', reverse('inscripcion_asistente', kwargs=eve), None),
+        ]
+        inscripcion = EvaluadorEvento.objects.filter(evento=evento, eva_eve_estado='Aprobado').select_related('evaluador__usuario').first()
+        if inscripcion:
+            evaluador = self.cliente(inscripcion.evaluador.usuario, 'evaluador')
+            escenarios.insert(3, ('tabla_posiciones_evaluador', evaluador, 'get', reverse('tabla_posiciones_evaluador', kwargs=eve), None))
+        marca = uuid.uuid4().hex[:8]
+        escenarios.append(('registro_evento (envío)', anonimo, 'post', reverse('inscripcion_asistente', kwargs=eve), {
+            'asi_id': f'9{int(marca, 16) % 10**9}',
+            'asi_nombres': 'Benchmark',
+            'asi_apellidos': 'Registro',
+            'asi_correo': f'benchmark.{marca}@eventsoft.test',
+            'asi_telefono': '3000000000',
+        }))
+        return escenarios
+
+    def medir(self, cliente, metodo, url, datos, repeticiones):
+        tiempos = []
+        consultas = 0
+        estado = None
+        tamano = 0
+        for _ in range(max(repeticiones, 1)):
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as capturadas:
+                    inicio = time.perf_counter()
+                    respuesta = getattr(cliente, metodo)(url, datos) if datos else getattr(cliente, metodo)(url)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                transaction.set_rollback(True)
+            consultas = len(capturadas)
+            estado = respuesta.status_code
+            tamano = len(respuesta.content) if not respuesta.streaming else 0
+        return {
+            'url': url,
+            'estado': estado,
+            'mediana_ms': round(statistics.median(tiempos), 2),
+            'min_ms': round(min(tiempos), 2),
+            'max_ms': round(max(tiempos), 2),
+            'consultas': consultas,
+            'bytes': tamano,
+        }
+
+    def comparar(self, base, actual, tolerancia_tiempo, tolerancia_consultas):
+        fallas = 0
+        self.stdout.write('\nComparación con la corrida base:')
+        for nombre, resultado in actual.items():
+            anterior = base.get(nombre)
+            if not anterior:
+                self.stdout.write(f'{nombre:<45} sin datos base')
+                continue
+            lento = resultado['mediana_ms'] > anterior['mediana_ms'] * (1 + tolerancia_tiempo)
+            mas_consultas = resultado['consultas'] > anterior['consultas'] * (1 + tolerancia_consultas)
+            linea = (
+                f"{nombre:<45} {anterior['mediana_ms']:>9.1f} -> {resultado['mediana_ms']:>9.1f} ms  "
+                f"{anterior['consultas']:>5} -> {resultado['consultas']:>5} consultas"
+            )
+            if lento or mas_consultas:
+                fallas += 1
+                self.stdout.write(self.style.ERROR(f'{linea}  REGRESIÓN'))
+            else:
+                self.stdout.write(linea)
+        return fallas
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from app_asistentes.models import AsistenteEvento
+from app_evaluadores.models import EvaluadorEvento
+from app_participantes.models import ParticipanteEvento
+
+CAMPOS_QR = [
+    (AsistenteEvento, 'asi_eve_qr'),
+    (ParticipanteEvento, 'par_eve_qr'),
+    (EvaluadorEvento, 'eva_eve_qr'),
+]
+
+
+class Command(BaseCommand):
+    help = "Borra los PNG de QR guardados por inscripción (media/*/qr/); los QR ahora se generan al pedirlos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Solo cuenta los archivos que se borrarían.',
+        )
+
+    def handle(self, *args, **options):
+        for modelo, campo in CAMPOS_QR:
+            inscripciones = modelo.objects.exclude(**{f'{campo}__isnull': True}).exclude(**{campo: ''})
+            borrados = 0
+            for inscripcion in inscripciones.only('pk', campo).iterator():
+                if not options['simular']:
+                    getattr(inscripcion, campo).delete(save=False)
+                    modelo.objects.filter(pk=inscripcion.pk).update(**{campo: None})
+                borrados += 1
+            accion = 'por borrar' if options['simular'] else 'borrados'
+            self.stdout.write(self.style.SUCCESS(f'{modelo.__name__}: {borrados} QR {accion}'))
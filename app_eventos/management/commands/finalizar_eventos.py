@@ -0,0 +1,29 @@
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from app_eventos.models import Evento
+
+class Command(BaseCommand):
+    help = "Marca como 'Finalizado' los eventos cuya fecha de fin ya pasó (job periódico, una vez por día)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help='Mantiene el proceso activo y repite la transición en cada cambio de día.',
+        )
+
+    def handle(self, *args, **options):
+        self.finalizar()
+        while options['continuo']:
+            # Dormir hasta el siguiente cambio de día (hora local del proyecto)
+            ahora = timezone.localtime()
+            manana = timezone.make_aware(datetime.combine(ahora.date() + timedelta(days=1), datetime.min.time()))
+            time.sleep(max((manana - ahora).total_seconds(), 1))
+            self.finalizar()
+
+    def finalizar(self):
+        hoy = timezone.localdate()
+        actualizados = Evento.objects.finalizar_vencidos(hoy)
+        self.stdout.write(self.style.SUCCESS(f'{hoy}: eventos marcados como finalizados: {actualizados}'))
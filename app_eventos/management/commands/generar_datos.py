@@ -0,0 +1,268 @@
+import random
+import uuid
+from datetime import timedelta
+from itertools import islice
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from app_areas.models import Area, Categoria
+from app_eventos.models import Evento, EventoCategoria
+from app_usuarios.models import Usuario, Rol, RolUsuario
+from app_administradores.models import AdministradorEvento
+from app_asistentes.models import Asistente, AsistenteEvento
+from app_participantes.models import Participante, ParticipanteEvento, Proyecto
+from app_evaluadores.models import Evaluador, EvaluadorEvento, Criterio, Calificacion
+from app_evaluadores.puntajes import reconstruir_puntajes
+
+# Cantidades por unidad de escala. Con --escala 100 se generan ~1M calificaciones.
+EVENTOS_POR_ESCALA = 10
+ADMINISTRADORES_POR_ESCALA = 2
+ASISTENTES_POR_ESCALA = 200
+PARTICIPANTES_POR_ESCALA = 100
+EVALUADORES_POR_ESCALA = 20
+
+# Cantidades por evento
+ASISTENTES_POR_EVENTO = 100
+PARTICIPANTES_POR_EVENTO = 40
+EVALUADORES_POR_EVENTO = 5
+CRITERIOS_POR_EVENTO = 5
+INTEGRANTES_MAX_PROYECTO = 3
+
+AREAS = {
+    'Tecnología': ['Software', 'Hardware', 'Inteligencia Artificial', 'Redes'],
+    'Ciencias': ['Biología', 'Química', 'Física', 'Matemáticas'],
+    'Artes': ['Música', 'Danza', 'Artes Visuales', 'Teatro'],
+    'Negocios': ['Emprendimiento', 'Finanzas', 'Mercadeo', 'Logística'],
+    'Salud': ['Enfermería', 'Nutrición', 'Deporte', 'Salud Pública'],
+}
+CIUDADES = ['Manizales', 'Bogotá', 'Medellín', 'Cali', 'Pereira', 'Armenia', 'Bucaramanga']
+ROLES = {
+    'administrador_evento': 'Administrador de eventos',
+    'asistente': 'Asistente a eventos',
+    'participante': 'Participante (expositor) de eventos',
+    'evaluador': 'Evaluador de eventos',
+}
+
+
+def en_bloques(iterable, tamano):
+    iterador = iter(iterable)
+    while True:
+        bloque = list(islice(iterador, tamano))
+        if not bloque:
+            return
+        yield bloque
+
+
+class Command(BaseCommand):
+    help = 'Genera un conjunto de datos sintético (eventos, usuarios, inscripciones y calificaciones) para pruebas de rendimiento'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', type=int, default=1, help='Multiplicador del tamaño del conjunto de datos.')
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por cada bulk_create.')
+        parser.add_argument('--semilla', type=int, default=None, help='Semilla aleatoria para resultados reproducibles.')
+        parser.add_argument('--clave', default='eventsoft123', help='Contraseña común para todos los usuarios generados.')
+
+    def handle(self, *args, **options):
+        escala = max(options['escala'], 1)
+        self.lote = options['lote']
+        self.rnd = random.Random(options['semilla'])
+        # Identificador de la corrida para que los correos y nombres no choquen entre ejecuciones
+        self.marca = uuid.uuid4().hex[:6]
+        # Se calcula un solo hash y se reutiliza en todos los usuarios
+        self.clave = make_password(options['clave'])
+        self.ahora = timezone.now()
+
+        categorias = self.crear_areas()
+        roles = self.crear_roles()
+
+        administradores = self.crear_perfiles(AdministradorEvento, 'admin', ADMINISTRADORES_POR_ESCALA * escala, roles['administrador_evento'])
+        asistentes = self.crear_perfiles(Asistente, 'asistente', ASISTENTES_POR_ESCALA * escala, roles['asistente'])
+        participantes = self.crear_perfiles(Participante, 'participante', PARTICIPANTES_POR_ESCALA * escala, roles['participante'])
+        evaluadores = self.crear_perfiles(Evaluador, 'evaluador', EVALUADORES_POR_ESCALA * escala, roles['evaluador'])
+
+        eventos = self.crear_eventos(EVENTOS_POR_ESCALA * escala, administradores, categorias)
+        self.crear_asistencias(eventos, asistentes)
+        aprobados = self.crear_participaciones(eventos, participantes)
+        jurados = self.crear_evaluaciones(eventos, evaluadores)
+        criterios = self.crear_criterios(eventos)
+        total = self.crear_calificaciones(eventos, aprobados, jurados, criterios)
+        reconstruir_puntajes(eventos)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Datos generados (marca {self.marca}): {len(eventos)} eventos, '
+            f'{len(asistentes) + len(participantes) + len(evaluadores) + len(administradores)} usuarios, '
+            f'{total} calificaciones.'
+        ))
+
+    def guardar(self, modelo, objetos, recargar=None):
+        """
+        Inserta los objetos con bulk_create por lotes. Si el motor no devuelve las llaves
+        primarias (MySQL), se recargan con el queryset `recargar`, ordenado por pk.
+        """
+        for bloque in en_bloques(objetos, self.lote):
+            modelo.objects.bulk_create(bloque, batch_size=self.lote)
+        if recargar is not None and objetos and objetos[0].pk is None:
+            return list(recargar.order_by('pk'))
+        return objetos
+
+    def crear_areas(self):
+        categorias = []
+        for nombre_area, nombres_categoria in AREAS.items():
+            area, _ = Area.objects.get_or_create(are_nombre=nombre_area, defaults={'are_descripcion': f'Área de {nombre_area}'})
+            for nombre in nombres_categoria:
+                categoria, _ = Categoria.objects.get_or_create(
+                    cat_nombre=nombre, cat_area_fk=area, defaults={'cat_descripcion': f'Categoría de {nombre}'}
+                )
+                categorias.append(categoria)
+        return categorias
+
+    def crear_roles(self):
+        return {
+            nombre: Rol.objects.get_or_create(nombre=nombre, defaults={'descripcion': descripcion})[0]
+            for nombre, descripcion in ROLES.items()
+        }
+
+    def crear_perfiles(self, modelo, prefijo, cantidad, rol):
+        usuarios = [
+            Usuario(
+                username=f'{prefijo}{i}_{self.marca}',
+                email=f'{prefijo}{i}.{self.marca}@eventsoft.test',
+                first_name=prefijo.capitalize(),
+                last_name=f'{i}',
+                documento=str(10_000_000 + i),
+                password=self.clave,
+                is_active=True,
+            )
+            for i in range(cantidad)
+        ]
+        usuarios = self.guardar(Usuario, usuarios, Usuario.objects.filter(email__endswith=f'.{self.marca}@eventsoft.test', username__startswith=prefijo))
+        self.guardar(RolUsuario, [RolUsuario(usuario=u, rol=rol) for u in usuarios])
+        return self.guardar(modelo, [modelo(usuario=u) for u in usuarios], modelo.objects.filter(usuario__in=usuarios))
+
+    def crear_eventos(self, cantidad, administradores, categorias):
+        hoy = timezone.localdate()
+        eventos = []
+        for i in range(cantidad):
+            inicio = hoy + timedelta(days=self.rnd.randint(-60, 120))
+            eventos.append(Evento(
+                eve_nombre=f'Evento {i} {self.marca}',
+                eve_descripcion='Evento generado para pruebas de rendimiento.',
+                eve_ciudad=self.rnd.choice(CIUDADES),
+                eve_lugar='Centro de convenciones',
+                eve_fecha_inicio=inicio,
+                eve_fecha_fin=inicio + timedelta(days=self.rnd.randint(0, 5)),
+                eve_estado=self.rnd.choices(['Aprobado', 'Inscripciones Cerradas', 'Pendiente'], [8, 1, 1])[0],
+                eve_capacidad=self.rnd.randint(200, 2000),
+                eve_tienecosto=self.rnd.choice(['Si', 'No']),
+                eve_administrador_fk=self.rnd.choice(administradores),
+            ))
+        eventos = self.guardar(Evento, eventos, Evento.objects.filter(eve_nombre__endswith=f' {self.marca}'))
+        self.guardar(EventoCategoria, [
+            EventoCategoria(evento=evento, categoria=categoria)
+            for evento in eventos
+            for categoria in self.rnd.sample(categorias, 2)
+        ])
+        return eventos
+
+    def crear_asistencias(self, eventos, asistentes):
+        def filas():
+            for evento in eventos:
+                for asistente in self.rnd.sample(asistentes, min(ASISTENTES_POR_EVENTO, len(asistentes))):
+                    yield AsistenteEvento(
+                        asistente=asistente,
+                        evento=evento,
+                        asi_eve_fecha_hora=self.ahora,
+                        asi_eve_estado=self.rnd.choices(['Aprobado', 'Pendiente'], [4, 1])[0],
+                        confirmado=True,
+                    )
+        for bloque in en_bloques(filas(), self.lote):
+            AsistenteEvento.objects.bulk_create(bloque)
+
+    def crear_participaciones(self, eventos, participantes):
+        """Crea proyectos (individuales o grupales) e inscripciones. Retorna los participantes aprobados por evento."""
+        grupos_por_evento = {}
+        proyectos = []
+        for evento in eventos:
+            elegidos = self.rnd.sample(participantes, min(PARTICIPANTES_POR_EVENTO, len(participantes)))
+            grupos = []
+            while elegidos:
+                tamano = self.rnd.randint(1, INTEGRANTES_MAX_PROYECTO)
+                grupos.append(elegidos[:tamano])
+                elegidos = elegidos[tamano:]
+            grupos_por_evento[evento.pk] = grupos
+            for n in range(len(grupos)):
+                proyectos.append(Proyecto(evento=evento, titulo=f'Proyecto {n} {self.marca}', estado='Aprobado'))
+        proyectos = self.guardar(Proyecto, proyectos, Proyecto.objects.filter(evento__in=eventos, titulo__endswith=f' {self.marca}'))
+
+        aprobados = {}
+        inscripciones = []
+        proyectos_iter = iter(proyectos)
+        for evento in eventos:
+            aprobados[evento.pk] = []
+            for n, grupo in enumerate(grupos_por_evento[evento.pk]):
+                proyecto = next(proyectos_iter)
+                estado = self.rnd.choices(['Aprobado', 'Pendiente'], [6, 1])[0]
+                codigo = f'{self.marca}{evento.pk}-{n}' if len(grupo) > 1 else None
+                for participante in grupo:
+                    inscripciones.append(ParticipanteEvento(
+                        participante=participante,
+                        evento=evento,
+                        par_eve_fecha_hora=self.ahora,
+                        par_eve_estado=estado,
+                        confirmado=True,
+                        codigo=codigo,
+                        proyecto=proyecto,
+                    ))
+                    if estado == 'Aprobado':
+                        aprobados[evento.pk].append(participante)
+        self.guardar(ParticipanteEvento, inscripciones)
+        return aprobados
+
+    def crear_evaluaciones(self, eventos, evaluadores):
+        jurados = {}
+        inscripciones = []
+        for evento in eventos:
+            jurados[evento.pk] = self.rnd.sample(evaluadores, min(EVALUADORES_POR_EVENTO, len(evaluadores)))
+            for i, evaluador in enumerate(jurados[evento.pk]):
+                inscripciones.append(EvaluadorEvento(
+                    evaluador=evaluador,
+                    evento=evento,
+                    eva_eve_fecha_hora=self.ahora,
+                    eva_eve_estado='Aprobado',
+                    confirmado=True,
+                    puede_gestionar_rubrica=(i == 0),
+                ))
+        self.guardar(EvaluadorEvento, inscripciones)
+        return jurados
+
+    def crear_criterios(self, eventos):
+        peso = 100 / CRITERIOS_POR_EVENTO
+        criterios = [
+            Criterio(cri_descripcion=f'Criterio {n + 1}', cri_peso=peso, cri_evento_fk=evento)
+            for evento in eventos
+            for n in range(CRITERIOS_POR_EVENTO)
+        ]
+        criterios = self.guardar(Criterio, criterios, Criterio.objects.filter(cri_evento_fk__in=eventos))
+        por_evento = {}
+        for criterio in criterios:
+            por_evento.setdefault(criterio.cri_evento_fk_id, []).append(criterio)
+        return por_evento
+
+    def crear_calificaciones(self, eventos, aprobados, jurados, criterios):
+        """Matriz densa participante x evaluador x criterio por evento, insertada por lotes."""
+        def filas():
+            for evento in eventos:
+                for participante in aprobados[evento.pk]:
+                    for evaluador in jurados[evento.pk]:
+                        for criterio in criterios[evento.pk]:
+                            yield Calificacion(
+                                evaluador=evaluador,
+                                criterio=criterio,
+                                participante=participante,
+                                cal_valor=self.rnd.randint(1, 5),
+                            )
+        total = 0
+        for bloque in en_bloques(filas(), self.lote):
+            Calificacion.objects.bulk_create(bloque)
+            total += len(bloque)
+        return total
@@ -0,0 +1,114 @@
+"""
+Manifiesto de ingreso sin conexión: permite a los dispositivos de la puerta validar los QR sin red.
+Contiene el hash de 64 bits (primeros 8 bytes del SHA-256) del token de cada inscripción aprobada,
+en un filtro de Bloom para descartar rápido y en un arreglo ordenado para confirmar por búsqueda
+binaria. Cada cambio en las inscripciones aprobadas crea una versión nueva; un dispositivo que ya
+tiene la versión N pide ?desde=N y recibe solo las altas y bajas.
+
+Formato (enteros big-endian):
+    cabecera   'EVQR', formato (u8), clase (u8: 0 completo, 1 delta), evento (u32), versión (u32), desde (u32)
+    completo   n (u32), bits del filtro m (u32), funciones k (u8), filtro (m/8 bytes), n hashes (u64) ordenados
+    delta      altas (u32), bajas (u32), hashes de altas (u64) ordenados, hashes de bajas (u64) ordenados
+
+Posición i del filtro para un hash h: ((h >> 32) + i * ((h & 0xFFFFFFFF) | 1)) % m, con el bit
+posición % 8 (el menos significativo primero) del byte posición // 8. Al aplicar un delta se
+agregan las altas al filtro y se quitan las bajas solo del arreglo, que es el que confirma.
+"""
+import hashlib
+import struct
+from django.db import IntegrityError, transaction
+from .ingresos import INSCRIPCIONES
+from .models import ManifiestoIngreso
+from .qr import generar_token
+
+MAGIA = b'EVQR'
+FORMATO = 1
+COMPLETO, DELTA = 0, 1
+# 10 bits por token y 7 funciones: ~1% de falsos positivos, que el arreglo ordenado descarta
+BITS_POR_TOKEN = 10
+FUNCIONES_BLOOM = 7
+VERSIONES_GUARDADAS = 50
+_CABECERA = struct.Struct('>4sBBIII')
+
+
+def hash_token(token):
+    return int.from_bytes(hashlib.sha256(token.encode()).digest()[:8], 'big')
+
+
+def hashes_aprobados(evento_id):
+    """Hashes ordenados de los tokens de las inscripciones aprobadas del evento."""
+    hashes = []
+    for modelo, (clase, campo_estado, _) in INSCRIPCIONES.items():
+        ids = clase.objects.filter(evento_id=evento_id, **{campo_estado: 'Aprobado'}).values_list('pk', flat=True)
+        hashes.extend(hash_token(generar_token(modelo, evento_id, pk)) for pk in ids.iterator())
+    return sorted(hashes)
+
+
+def _empaquetar(hashes):
+    return struct.pack(f'>{len(hashes)}Q', *hashes)
+
+
+def _desempaquetar(contenido):
+    contenido = bytes(contenido)
+    return struct.unpack(f'>{len(contenido) // 8}Q', contenido)
+
+
+def filtro_bloom(hashes):
+    """(bits, bytes) del filtro de Bloom de los hashes."""
+    bits = max(64, -(-len(hashes) * BITS_POR_TOKEN // 64) * 64)
+    filtro = bytearray(bits // 8)
+    for h in hashes:
+        h1, h2 = h >> 32, (h & 0xFFFFFFFF) | 1
+        for i in range(FUNCIONES_BLOOM):
+            posicion = (h1 + i * h2) % bits
+            filtro[posicion // 8] |= 1 << (posicion % 8)
+    return bits, bytes(filtro)
+
+
+def version_actual(evento_id):
+    """(versión, hashes) vigentes; guarda una versión nueva si cambiaron las inscripciones aprobadas."""
+    hashes = hashes_aprobados(evento_id)
+    contenido = _empaquetar(hashes)
+    ultima = ManifiestoIngreso.objects.filter(evento_id=evento_id).first()
+    if ultima is not None and bytes(ultima.hashes) == contenido:
+        return ultima.version, hashes
+    version = ultima.version + 1 if ultima else 1
+    try:
+        with transaction.atomic():
+            ManifiestoIngreso.objects.create(evento_id=evento_id, version=version, hashes=contenido)
+    except IntegrityError:
+        # Otro dispositivo pidió el manifiesto al mismo tiempo y guardó esta versión
+        return version_actual(evento_id)
+    ManifiestoIngreso.objects.filter(evento_id=evento_id, version__lte=version - VERSIONES_GUARDADAS).delete()
+    return version, hashes
+
+
+def _delta(evento_id, version, desde, altas, bajas):
+    return b''.join([
+        _CABECERA.pack(MAGIA, FORMATO, DELTA, evento_id, version, desde),
+        struct.pack('>II', len(altas), len(bajas)),
+        _empaquetar(altas),
+        _empaquetar(bajas),
+    ])
+
+
+def manifiesto(evento_id, desde=None):
+    """
+    (versión, bytes) del manifiesto del evento. Con desde, el delta respecto a esa versión; si ya
+    no se guarda (o es posterior a la vigente) se envía el manifiesto completo.
+    """
+    version, hashes = version_actual(evento_id)
+    if desde == version:
+        return version, _delta(evento_id, version, desde, [], [])
+    if desde is not None:
+        anterior = ManifiestoIngreso.objects.filter(evento_id=evento_id, version=desde).values_list('hashes', flat=True).first()
+        if anterior is not None:
+            anterior, actual = set(_desempaquetar(anterior)), set(hashes)
+            return version, _delta(evento_id, version, desde, sorted(actual - anterior), sorted(anterior - actual))
+    bits, filtro = filtro_bloom(hashes)
+    return version, b''.join([
+        _CABECERA.pack(MAGIA, FORMATO, COMPLETO, evento_id, version, 0),
+        struct.pack('>IIB', len(hashes), bits, FUNCIONES_BLOOM),
+        filtro,
+        _empaquetar(hashes),
+    ])
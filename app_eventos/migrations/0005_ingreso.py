@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_eventos', '0004_remove_evento_inscripciones_habilitadas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ingreso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('A', 'Asistente'), ('P', 'Participante'), ('E', 'Evaluador')], max_length=1)),
+                ('inscripcion_id', models.PositiveIntegerField()),
+                ('dia', models.DateField()),
+                ('registrado', models.DateTimeField(default=django.utils.timezone.now)),
+                ('dispositivo', models.CharField(blank=True, default='', max_length=50)),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingresos', to='app_eventos.evento')),
+            ],
+            options={
+                'ordering': ['-registrado'],
+                'unique_together': {('tipo', 'inscripcion_id', 'dia')},
+            },
+        ),
+    ]
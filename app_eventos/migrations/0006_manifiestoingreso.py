@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_eventos', '0005_ingreso'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ManifiestoIngreso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('hashes', models.BinaryField()),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='manifiestos_ingreso', to='app_eventos.evento')),
+            ],
+            options={
+                'ordering': ['-version'],
+                'unique_together': {('evento', 'version')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_eventos', '0006_manifiestoingreso'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DispositivoIngreso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50)),
+                ('clave', models.CharField(max_length=64, unique=True)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('revocado', models.DateTimeField(blank=True, null=True)),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dispositivos_ingreso', to='app_eventos.evento')),
+            ],
+            options={
+                'ordering': ['nombre'],
+                'unique_together': {('evento', 'nombre')},
+            },
+        ),
+    ]
@@ -1,7 +1,44 @@
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from app_administradores.models import AdministradorEvento
 from app_areas.models import Categoria
 
+# Estados que pasan a 'Finalizado' cuando la fecha de fin ya pasó
+ESTADOS_FINALIZABLES = ['Aprobado', 'Inscripciones Cerradas', 'Pendiente']
+
+
+def estado_en(estados):
+    """Q para eve_estado en `estados` sin distinguir mayúsculas: hay filas con 'aprobado' y con 'Aprobado'."""
+    filtro = Q(pk__in=[])
+    for estado in estados:
+        filtro |= Q(eve_estado__iexact=estado)
+    return filtro
+
+
+class EventoQuerySet(models.QuerySet):
+    def vencidos(self, hoy=None):
+        """Eventos cuya fecha de fin ya pasó pero aún no están marcados como finalizados."""
+        hoy = hoy or timezone.localdate()
+        return self.filter(estado_en(ESTADOS_FINALIZABLES), eve_fecha_fin__lt=hoy)
+
+    def finalizar_vencidos(self, hoy=None):
+        """Marca como 'Finalizado' los eventos vencidos. Retorna cuántos se actualizaron."""
+        return self.vencidos(hoy).update(eve_estado='Finalizado')
+
+    def con_estado_efectivo(self, estados, hoy=None):
+        """
+        Filtra por estado efectivo (sin distinguir mayúsculas): un evento vencido cuenta como
+        'Finalizado' aunque el job periódico todavía no haya actualizado la fila.
+        """
+        hoy = hoy or timezone.localdate()
+        vencido = Q(eve_fecha_fin__lt=hoy) & estado_en(ESTADOS_FINALIZABLES)
+        filtro = estado_en(estados) & ~vencido
+        if 'finalizado' in [estado.lower() for estado in estados]:
+            filtro |= vencido
+        return self.filter(filtro)
+
+
 class Evento(models.Model):
     eve_id = models.AutoField(primary_key=True)
     eve_nombre = models.CharField(max_length=100)
@@ -19,6 +56,16 @@ class Evento(models.Model):
     eve_memorias = models.FileField(upload_to='eventos/memorias/', null=True, blank=True)
     eve_informacion_tecnica = models.FileField(upload_to='eventos/informacion_tecnica/', null=True, blank=True)
 
+    objects = EventoQuerySet.as_manager()
+
+    @property
+    def estado_efectivo(self):
+        """Estado del evento considerando la fecha de fin, sin escribir en la base de datos."""
+        finalizables = [estado.lower() for estado in ESTADOS_FINALIZABLES]
+        if self.eve_estado.lower() in finalizables and self.eve_fecha_fin < timezone.localdate():
+            return 'Finalizado'
+        return self.eve_estado
+
 class EventoCategoria(models.Model):
     evento = models.ForeignKey(Evento, on_delete=models.CASCADE)
     categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE)
@@ -54,4 +101,58 @@ class ConfiguracionCertificado(models.Model):
         unique_together = (('evento', 'tipo'),)
 
     def __str__(self):
-        return f"{self.evento.eve_nombre} - {self.get_tipo_display()}"
\ No newline at end of file
+        return f"{self.evento.eve_nombre} - {self.get_tipo_display()}"
+
+class Ingreso(models.Model):
+    """Entrada al evento registrada al escanear el QR de una inscripción; a lo sumo una por día. Solo se insertan filas."""
+    TIPO_CHOICES = [
+        ('A', 'Asistente'),
+        ('P', 'Participante'),
+        ('E', 'Evaluador'),
+    ]
+
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='ingresos')
+    # Prefijo del token QR (ver app_eventos.qr) e id de la AsistenteEvento/ParticipanteEvento/EvaluadorEvento
+    tipo = models.CharField(max_length=1, choices=TIPO_CHOICES)
+    inscripcion_id = models.PositiveIntegerField()
+    dia = models.DateField()
+    registrado = models.DateTimeField(default=timezone.now)
+    dispositivo = models.CharField(max_length=50, blank=True, default='')
+
+    class Meta:
+        ordering = ['-registrado']
+        unique_together = (('tipo', 'inscripcion_id', 'dia'),)
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.inscripcion_id} - {self.dia}"
+
+
+class ManifiestoIngreso(models.Model):
+    """Versión del manifiesto de ingreso sin conexión: hashes ordenados de los tokens QR aprobados del evento."""
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='manifiestos_ingreso')
+    version = models.PositiveIntegerField()
+    hashes = models.BinaryField()
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-version']
+        unique_together = (('evento', 'version'),)
+
+    def __str__(self):
+        return f"{self.evento_id} v{self.version}"
+
+
+class DispositivoIngreso(models.Model):
+    """Dispositivo de la puerta autorizado a registrar ingresos del evento. Se guarda el SHA-256 de su clave."""
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='dispositivos_ingreso')
+    nombre = models.CharField(max_length=50)
+    clave = models.CharField(max_length=64, unique=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    revocado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['nombre']
+        unique_together = (('evento', 'nombre'),)
+
+    def __str__(self):
+        return f"{self.evento_id} - {self.nombre}"
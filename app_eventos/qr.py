@@ -0,0 +1,85 @@
+"""
+Códigos QR de acceso de las inscripciones (asistentes, participantes y evaluadores). El QR lleva
+un token corto firmado con SECRET_KEY que identifica la inscripción y su evento. La imagen no se
+guarda en disco: se genera al pedirla (siempre igual para el mismo token) y queda en una caché LRU.
+"""
+import base64
+import io
+from functools import lru_cache
+import qrcode
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+MAX_QR_EN_CACHE = 1024
+TIEMPO_CACHE_QR = 60 * 60 * 24 * 365
+# Con tokens de ~25 caracteres alfanuméricos y corrección M el QR queda en versión 2 (25×25
+# módulos): 8 px por módulo da un PNG de ~230 px, legible en pantalla e impreso
+CORRECCION_QR = qrcode.constants.ERROR_CORRECT_M
+TAMANO_MODULO = 8
+BORDE = 2
+PREFIJOS = {'asistenteevento': 'A', 'participanteevento': 'P', 'evaluadorevento': 'E'}
+TIPOS = {prefijo: modelo for modelo, prefijo in PREFIJOS.items()}
+_SAL = 'app_eventos.qr'
+_DIGITOS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def _base36(numero):
+    digitos = ''
+    while True:
+        numero, resto = divmod(numero, 36)
+        digitos = _DIGITOS[resto] + digitos
+        if not numero:
+            return digitos
+
+
+def _firma(carga):
+    # 80 bits del HMAC en base 32: solo mayúsculas y dígitos, que el QR codifica en modo alfanumérico
+    return base64.b32encode(salted_hmac(_SAL, carga, algorithm='sha256').digest()[:10]).decode()
+
+
+def generar_token(modelo, evento_id, pk):
+    """Token del QR: tipo de inscripción, evento e id en base 36, y su firma. P. ej. 'A1-2N9.KZ3V...'."""
+    carga = f'{PREFIJOS[modelo]}{_base36(evento_id)}-{_base36(pk)}'
+    return f'{carga}.{_firma(carga)}'
+
+
+def token_inscripcion(inscripcion):
+    return generar_token(inscripcion._meta.model_name, inscripcion.evento_id, inscripcion.pk)
+
+
+def leer_token(token):
+    """(modelo, evento_id, id de la inscripción) si la firma del token es válida, o None. No consulta la base de datos."""
+    try:
+        carga, firma = token.split('.')
+        modelo = TIPOS[carga[0]]
+        evento_id, pk = (int(parte, 36) for parte in carga[1:].split('-'))
+    except (ValueError, KeyError, IndexError):
+        return None
+    if not constant_time_compare(firma, _firma(carga)):
+        return None
+    return modelo, evento_id, pk
+
+
+@lru_cache(maxsize=MAX_QR_EN_CACHE)
+def png_qr(token):
+    """PNG del QR del token."""
+    qr = qrcode.QRCode(error_correction=CORRECCION_QR, box_size=TAMANO_MODULO, border=BORDE)
+    qr.add_data(token)
+    qr.make(fit=True)
+    buffer = io.BytesIO()
+    qr.make_image().save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def etiqueta_qr(token):
+    """ETag del PNG: cambia solo si cambia el token o el tamaño de la imagen."""
+    return f'{token}-{CORRECCION_QR}-{TAMANO_MODULO}-{BORDE}'
+
+
+def url_qr(inscripcion):
+    return reverse('qr_inscripcion', args=[token_inscripcion(inscripcion)])
+
+
+def adjuntar_qr(email, inscripcion):
+    """Adjunta al correo el PNG del QR de acceso de la inscripción."""
+    email.attach('qr_acceso.png', png_qr(token_inscripcion(inscripcion)), 'image/png')
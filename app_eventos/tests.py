@@ -1,3 +1,245 @@
+import json
+import struct
+from datetime import date, datetime
+from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from app_administradores.models import AdministradorEvento
+from app_asistentes.models import Asistente, AsistenteEvento
+from app_usuarios.models import Usuario
+from .ingresos import nueva_clave, registrar_ingreso, revocar_dispositivo, sincronizar_ingresos
+from .manifiesto import COMPLETO, DELTA, FORMATO, MAGIA, hash_token, manifiesto
+from .models import DispositivoIngreso, Evento, Ingreso
+from .qr import generar_token, leer_token, token_inscripcion
 
-# Create your tests here.
+
+class IngresoTestCase(TestCase):
+    """Evento con tres asistentes: dos aprobados y uno pendiente."""
+
+    @classmethod
+    def setUpTestData(cls):
+        admin = Usuario.objects.create_user(username='admin', email='admin@example.com', password='x')
+        cls.evento = Evento.objects.create(
+            eve_nombre='Congreso', eve_descripcion='', eve_ciudad='Manizales', eve_lugar='Centro',
+            eve_fecha_inicio=date(2026, 5, 1), eve_fecha_fin=date(2026, 5, 2), eve_estado='Aprobado',
+            eve_capacidad=100, eve_tienecosto='No',
+            eve_administrador_fk=AdministradorEvento.objects.create(usuario=admin),
+        )
+        cls.inscripciones = []
+        for i, estado in enumerate(['Aprobado', 'Aprobado', 'Pendiente']):
+            usuario = Usuario.objects.create_user(
+                username=f'asi{i}', email=f'asi{i}@example.com', password='x', first_name='Ana', last_name=f'N{i}',
+            )
+            cls.inscripciones.append(AsistenteEvento.objects.create(
+                asistente=Asistente.objects.create(usuario=usuario), evento=cls.evento,
+                asi_eve_fecha_hora=timezone.now(), asi_eve_estado=estado,
+            ))
+        cls.tokens = [token_inscripcion(inscripcion) for inscripcion in cls.inscripciones]
+
+
+class TokenQrTests(IngresoTestCase):
+    def test_leer_token(self):
+        inscripcion = self.inscripciones[0]
+        self.assertEqual(leer_token(self.tokens[0]), ('asistenteevento', self.evento.pk, inscripcion.pk))
+        # Evento e id grandes en base 36
+        token = generar_token('evaluadorevento', 123456, 987654321)
+        self.assertEqual(leer_token(token), ('evaluadorevento', 123456, 987654321))
+
+    def test_token_alterado_se_rechaza(self):
+        carga, firma = self.tokens[0].split('.')
+        otra_firma = firma[:-1] + ('A' if firma[-1] != 'A' else 'B')
+        alterados = [
+            f'{carga}.{otra_firma}',
+            # Misma firma con otro tipo de inscripción o con otro id
+            f'P{carga[1:]}.{firma}',
+            f'{carga}1.{firma}',
+            carga, '', '.', 'X1-1.AAAA', f'{carga}.{firma}.{firma}',
+        ]
+        for token in alterados:
+            with self.subTest(token=token):
+                self.assertIsNone(leer_token(token))
+
+
+class RegistrarIngresoTests(IngresoTestCase):
+    def test_segundo_escaneo_del_dia_es_duplicado(self):
+        estado, respuesta = registrar_ingreso(self.evento.pk, self.tokens[0], 'Puerta 1')
+        self.assertEqual((estado, respuesta['duplicado'], respuesta['nombre']), (200, False, 'Ana N0'))
+        estado, duplicado = registrar_ingreso(self.evento.pk, self.tokens[0], 'Puerta 2')
+        self.assertEqual((estado, duplicado['duplicado']), (200, True))
+        # Se conserva el primer registro
+        self.assertEqual(duplicado['registrado'], respuesta['registrado'])
+        ingreso, = Ingreso.objects.all()
+        self.assertEqual((ingreso.inscripcion_id, ingreso.dispositivo), (self.inscripciones[0].pk, 'Puerta 1'))
+
+    def test_rechazos(self):
+        otro_evento = generar_token('asistenteevento', self.evento.pk + 1, self.inscripciones[0].pk)
+        self.assertEqual(registrar_ingreso(self.evento.pk, 'basura')[0], 400)
+        self.assertEqual(registrar_ingreso(self.evento.pk, otro_evento)[0], 409)
+        self.assertEqual(registrar_ingreso(self.evento.pk, self.tokens[2])[0], 403)
+        self.assertFalse(Ingreso.objects.exists())
+
+
+class DispositivoIngresoTests(IngresoTestCase):
+    def setUp(self):
+        self.dispositivo = DispositivoIngreso(evento=self.evento, nombre='Puerta 1')
+        self.clave = nueva_clave(self.dispositivo)
+        self.url = reverse('ingreso_evento', args=[self.evento.pk])
+
+    def escanear(self, token, clave):
+        return self.client.post(
+            self.url, json.dumps({'token': token}), content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {clave}',
+        )
+
+    def test_solo_el_evento_del_dispositivo(self):
+        self.assertEqual(self.escanear(self.tokens[0], self.clave).status_code, 200)
+        self.assertEqual(self.escanear(self.tokens[0], 'otra').status_code, 401)
+        otro_evento = generar_token('asistenteevento', self.evento.pk + 1, self.inscripciones[0].pk)
+        url = reverse('ingreso_evento', args=[self.evento.pk + 1])
+        respuesta = self.client.post(
+            url, json.dumps({'token': otro_evento}), content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.clave}',
+        )
+        self.assertEqual(respuesta.status_code, 401)
+
+    def test_revocar_y_rotar_surten_efecto_aunque_la_clave_este_en_cache(self):
+        anterior = self.clave
+        self.assertEqual(self.escanear(self.tokens[0], anterior).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.clave = nueva_clave(self.dispositivo)
+        self.assertEqual(self.escanear(self.tokens[1], anterior).status_code, 401)
+        self.assertEqual(self.escanear(self.tokens[1], self.clave).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            revocar_dispositivo(self.dispositivo)
+        self.assertEqual(self.escanear(self.tokens[1], self.clave).status_code, 401)
+
+    def test_la_cache_de_claves_es_compartida(self):
+        # Con una caché por proceso, revocar solo limpiaría la del worker que atendió al administrador
+        self.assertNotIn('LocMemCache', settings.CACHES['default']['BACKEND'])
+        self.assertEqual(self.escanear(self.tokens[0], self.clave).status_code, 200)
+        self.assertEqual(cache.get(f'dispositivo_ingreso:{self.dispositivo.clave}'), (self.evento.pk, 'Puerta 1'))
+
+
+def leer_manifiesto(contenido):
+    """Decodifica el manifiesto como lo haría el dispositivo (formato en app_eventos.manifiesto)."""
+    magia, formato, clase, evento, version, desde = struct.unpack_from('>4sBBIII', contenido)
+    datos = {'magia': magia, 'formato': formato, 'clase': clase, 'evento': evento, 'version': version, 'desde': desde}
+    posicion = struct.calcsize('>4sBBIII')
+    if clase == COMPLETO:
+        n, bits, funciones = struct.unpack_from('>IIB', contenido, posicion)
+        posicion += struct.calcsize('>IIB')
+        datos.update(bits=bits, funciones=funciones, filtro=contenido[posicion:posicion + bits // 8])
+        posicion += bits // 8
+        datos['hashes'] = list(struct.unpack_from(f'>{n}Q', contenido, posicion))
+        posicion += 8 * n
+    else:
+        altas, bajas = struct.unpack_from('>II', contenido, posicion)
+        posicion += 8
+        datos['altas'] = list(struct.unpack_from(f'>{altas}Q', contenido, posicion))
+        datos['bajas'] = list(struct.unpack_from(f'>{bajas}Q', contenido, posicion + 8 * altas))
+        posicion += 8 * (altas + bajas)
+    datos['sobrante'] = len(contenido) - posicion
+    return datos
+
+
+def en_filtro(datos, h):
+    bits = datos['bits']
+    for i in range(datos['funciones']):
+        posicion = ((h >> 32) + i * ((h & 0xFFFFFFFF) | 1)) % bits
+        if not datos['filtro'][posicion // 8] & (1 << (posicion % 8)):
+            return False
+    return True
+
+
+class ManifiestoTests(IngresoTestCase):
+    def aprobar(self, inscripcion, estado='Aprobado'):
+        AsistenteEvento.objects.filter(pk=inscripcion.pk).update(asi_eve_estado=estado)
+
+    def test_manifiesto_completo(self):
+        version, contenido = manifiesto(self.evento.pk)
+        datos = leer_manifiesto(contenido)
+        self.assertEqual(
+            (datos['magia'], datos['formato'], datos['clase'], datos['evento'], datos['version'], datos['desde']),
+            (MAGIA, FORMATO, COMPLETO, self.evento.pk, version, 0),
+        )
+        self.assertEqual(datos['sobrante'], 0)
+        aprobados = [hash_token(token) for token in self.tokens[:2]]
+        self.assertEqual(datos['hashes'], sorted(aprobados))
+        for h in aprobados:
+            self.assertTrue(en_filtro(datos, h))
+        # Sin cambios no se crea otra versión
+        self.assertEqual(manifiesto(self.evento.pk)[0], version)
+
+    def test_delta_aplicado_a_la_version_anterior_da_la_siguiente(self):
+        anterior, contenido = manifiesto(self.evento.pk)
+        hashes = set(leer_manifiesto(contenido)['hashes'])
+        self.aprobar(self.inscripciones[2])
+        self.aprobar(self.inscripciones[0], 'Rechazado')
+
+        version, contenido = manifiesto(self.evento.pk, desde=anterior)
+        self.assertEqual(version, anterior + 1)
+        delta = leer_manifiesto(contenido)
+        self.assertEqual((delta['clase'], delta['version'], delta['desde'], delta['sobrante']), (DELTA, version, anterior, 0))
+        self.assertEqual(delta['altas'], [hash_token(self.tokens[2])])
+        self.assertEqual(delta['bajas'], [hash_token(self.tokens[0])])
+        completo = leer_manifiesto(manifiesto(self.evento.pk)[1])
+        self.assertEqual(sorted(hashes.union(delta['altas']).difference(delta['bajas'])), completo['hashes'])
+
+        # Un dispositivo al día recibe un delta vacío; una versión desconocida, el manifiesto completo
+        self.assertEqual(leer_manifiesto(manifiesto(self.evento.pk, desde=version)[1])['altas'], [])
+        self.assertEqual(leer_manifiesto(manifiesto(self.evento.pk, desde=version + 5)[1])['clase'], COMPLETO)
+
+
+class SincronizarIngresosTests(IngresoTestCase):
+    def registrado(self, dia, hora=9):
+        return timezone.make_aware(datetime(dia.year, dia.month, dia.day, hora)).isoformat()
+
+    def test_fechas_fuera_del_evento_se_rechazan(self):
+        inicio, fin = self.evento.eve_fecha_inicio, self.evento.eve_fecha_fin
+        aceptados, rechazados = sincronizar_ingresos(self.evento, [
+            {'token': self.tokens[0], 'registrado': self.registrado(inicio)},
+            {'token': self.tokens[1], 'registrado': self.registrado(fin, 23)},
+            {'token': self.tokens[0], 'registrado': self.registrado(date(2026, 4, 30), 23)},
+            {'token': self.tokens[1], 'registrado': self.registrado(date(2026, 5, 3), 0)},
+            {'token': self.tokens[1], 'registrado': 'ayer'},
+        ], 'Puerta 1')
+        self.assertEqual(aceptados, 2)
+        self.assertEqual([r['error'] for r in rechazados], ['Fecha no válida.'] * 3)
+        self.assertEqual(
+            sorted(Ingreso.objects.values_list('inscripcion_id', 'dia')),
+            [(self.inscripciones[0].pk, inicio), (self.inscripciones[1].pk, fin)],
+        )
+
+    def test_reenviar_conserva_el_primer_ingreso_del_dia(self):
+        dia = self.evento.eve_fecha_inicio
+        sincronizar_ingresos(self.evento, [{'token': self.tokens[0], 'registrado': self.registrado(dia, 8)}])
+        aceptados, rechazados = sincronizar_ingresos(self.evento, [
+            {'token': self.tokens[0], 'registrado': self.registrado(dia, 10)},
+            {'token': self.tokens[2], 'registrado': self.registrado(dia)},
+        ])
+        self.assertEqual((aceptados, [r['error'] for r in rechazados]), (1, ['La inscripción no está aprobada.']))
+        ingreso = Ingreso.objects.get()
+        self.assertEqual(timezone.localtime(ingreso.registrado).hour, 8)
+
+
+class EstadoEfectivoTests(IngresoTestCase):
+    def crear_evento(self, estado, fin):
+        return Evento.objects.create(
+            eve_nombre=estado, eve_descripcion='', eve_ciudad='Manizales', eve_lugar='Centro',
+            eve_fecha_inicio=fin, eve_fecha_fin=fin, eve_estado=estado, eve_capacidad=10, eve_tienecosto='No',
+            eve_administrador_fk=self.evento.eve_administrador_fk,
+        )
+
+    def test_sin_distinguir_mayusculas(self):
+        hoy = date(2026, 5, 10)
+        vigente = self.crear_evento('aprobado', date(2026, 5, 20))
+        vencido = self.crear_evento('APROBADO', date(2026, 5, 1))
+        eventos = Evento.objects.filter(pk__in=[vigente.pk, vencido.pk])
+        self.assertEqual(list(eventos.con_estado_efectivo(['Aprobado'], hoy)), [vigente])
+        self.assertEqual(list(eventos.con_estado_efectivo(['Finalizado'], hoy)), [vencido])
+        self.assertEqual(eventos.finalizar_vencidos(hoy), 1)
+        vencido.refresh_from_db()
+        self.assertEqual(vencido.eve_estado, 'Finalizado')
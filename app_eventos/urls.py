@@ -15,4 +15,10 @@ urlpatterns = [
     path('confirmar-registro/<str:token>/', views.confirmar_registro, name='confirmar_registro'),
     path('registro_admin_evento/', views.registrarse_admin_evento, name='registro_admin_evento'),
     path('inscribir-otro-expositor/<int:eve_id>/<str:codigo>/', views.inscribir_otro_expositor, name='inscribir_otro_expositor'),
+    path('certificados/verificar/', views.verificar_certificado, name='verificar_certificado'),
+    path('certificados/verificar/<str:codigo>/', views.verificar_certificado, name='verificar_certificado_codigo'),
+    path('qr/<str:token>.png', views.qr_inscripcion, name='qr_inscripcion'),
+    path('ingreso/<int:eve_id>/', views.ingreso_evento, name='ingreso_evento'),
+    path('ingreso/<int:eve_id>/manifiesto/', views.manifiesto_ingreso, name='manifiesto_ingreso'),
+    path('ingreso/<int:eve_id>/sincronizar/', views.sincronizar_ingresos_evento, name='sincronizar_ingresos'),
 ]
\ No newline at end of file
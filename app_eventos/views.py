@@ -1,6 +1,8 @@
-from app_administradores.models import CodigoInvitacionAdminEvento, AdministradorEvento, CodigoInvitacionEvento
+from app_administradores.models import CodigoInvitacionAdminEvento, AdministradorEvento, CodigoInvitacionEvento, CertificadoEmitido
 from django.db import transaction
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag
 from django.http import HttpResponse, JsonResponse, Http404, FileResponse
 from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
@@ -12,17 +14,18 @@ from app_areas.models import Area, Categoria
 from app_asistentes.models import Asistente, AsistenteEvento
 from app_evaluadores.models import Evaluador, EvaluadorEvento
 from .models import Evento, EventoCategoria
+from .qr import TIEMPO_CACHE_QR, adjuntar_qr, etiqueta_qr, leer_token, png_qr
+from .ingresos import MAX_INGRESOS_POR_LOTE, dispositivo_autorizado, registrar_ingreso, sincronizar_ingresos
+from .manifiesto import manifiesto
 from app_usuarios.models import Usuario, Rol, RolUsuario
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
-from io import BytesIO
-from django.core.files.base import ContentFile
 from django.urls import reverse
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 import random
 import string
-import qrcode
 from django.utils.crypto import get_random_string
+import json
 import os
 
 def generar_clave():
@@ -43,7 +46,7 @@ def ver_eventos(request):
     ciudad = request.GET.get('ciudad')
     fecha = request.GET.get('fecha')
     nombre = request.GET.get('nombre')
-    eventos = Evento.objects.filter(eve_estado__in=['Aprobado', 'Inscripciones Cerradas'])
+    eventos = Evento.objects.con_estado_efectivo(['Aprobado', 'Inscripciones Cerradas'])
     if ciudad:
         eventos = eventos.filter(eve_ciudad__icontains=ciudad)
     if fecha:
@@ -78,7 +81,7 @@ def compartir_evento_visitante(request, eve_id):
     evento = get_object_or_404(Evento, pk=eve_id)
     
     # Verificar que el evento esté disponible públicamente
-    if evento.eve_estado.lower() not in ['aprobado', 'inscripciones cerradas']:
+    if evento.estado_efectivo.lower() not in ['aprobado', 'inscripciones cerradas']:
         return JsonResponse({
             'success': False,
             'error': 'Este evento no está disponible públicamente.'
@@ -154,7 +157,7 @@ def registro_con_codigo(request, codigo):
     tipo = codigo_invitacion.tipo
     
     # Verificar que el evento esté activo
-    if evento.eve_estado.lower() not in ['aprobado', 'inscripciones cerradas']:
+    if evento.estado_efectivo.lower() not in ['aprobado', 'inscripciones cerradas']:
         messages.error(request, "Este evento no está disponible para inscripciones.")
         return redirect('ver_eventos')
     
@@ -657,16 +660,7 @@ def registro_evento(request, eve_id, tipo):
                 if evento.eve_tienecosto == 'SI' and archivo:
                     asistencia.asi_eve_soporte = archivo
                 
-                qr_img_bytes = None
                 if estado == "Aprobado":
-                    qr_data = f"asistente:{usuario.documento}|evento:{evento.eve_id}|clave:{usuario.password}"
-                    buffer = BytesIO()
-                    qr_img = qrcode.make(qr_data)
-                    qr_img.save(buffer, format='PNG')
-                    filename = f"qr_asistente_{usuario.documento}_{evento.eve_id}.png"
-                    asistencia.asi_eve_qr.save(filename, ContentFile(buffer.getvalue()), save=False)
-                    qr_img_bytes = buffer.getvalue()
-                    
                     # Descontar capacidad del evento cuando es gratuito y aprobado
                     evento.eve_capacidad -= 1
                     evento.save()
@@ -679,7 +673,7 @@ def registro_evento(request, eve_id, tipo):
                         'nombre': usuario.first_name,
                         'evento': evento.eve_nombre,
                         'clave': None,  # No mostrar clave porque ya está activo
-                        'qr_url': asistencia.asi_eve_qr.url if asistencia.asi_eve_qr else None,
+                        'qr_url': request.build_absolute_uri(asistencia.qr_url),
                     })
                     email = EmailMessage(
                         subject=f'Registro aprobado - {evento.eve_nombre}',
@@ -687,8 +681,7 @@ def registro_evento(request, eve_id, tipo):
                         to=[usuario.email],
                     )
                     email.content_subtype = 'html'
-                    if qr_img_bytes:
-                        email.attach('qr_acceso.png', qr_img_bytes, 'image/png')
+                    adjuntar_qr(email, asistencia)
                     email.send()
                     
             return render(request, "ya_registrado.html", {
@@ -904,9 +897,6 @@ def confirmar_registro(request, token):
         if rol_obj and not RolUsuario.objects.filter(usuario=usuario, rol=rol_obj).exists():
             RolUsuario.objects.create(usuario=usuario, rol=rol_obj)
         
-        qr_url = None
-        qr_img_bytes = None
-        
         # Solo procesar asistentes en este flujo
         if rol == 'asistente':
             asistente, _ = Asistente.objects.get_or_create(usuario=usuario)
@@ -916,14 +906,6 @@ def confirmar_registro(request, token):
                 # Si es gratuito: aprobado, QR y descontar capacidad
                 if evento.eve_tienecosto == 'NO':
                     asistencia.asi_eve_estado = 'Aprobado'
-                    qr_data = f"asistente:{usuario.documento}|evento:{evento.eve_id}|clave:{usuario.password}"
-                    buffer = BytesIO()
-                    qr_img = qrcode.make(qr_data)
-                    qr_img.save(buffer, format='PNG')
-                    filename = f"qr_asistente_{usuario.documento}_{evento.eve_id}.png"
-                    asistencia.asi_eve_qr.save(filename, ContentFile(buffer.getvalue()), save=False)
-                    qr_url = asistencia.asi_eve_qr.url
-                    qr_img_bytes = buffer.getvalue()
                     evento.eve_capacidad -= 1
                     evento.save()
                 else:
@@ -937,7 +919,7 @@ def confirmar_registro(request, token):
                         'nombre': usuario.first_name,
                         'evento': evento.eve_nombre,
                         'clave': None,  # No mostrar clave porque ya está activo
-                        'qr_url': qr_url,
+                        'qr_url': request.build_absolute_uri(asistencia.qr_url),
                     })
                     email = EmailMessage(
                         subject=f'Confirmación de registro - {evento.eve_nombre}',
@@ -945,8 +927,7 @@ def confirmar_registro(request, token):
                         to=[usuario.email],
                     )
                     email.content_subtype = 'html'
-                    if qr_img_bytes:
-                        email.attach('qr_acceso.png', qr_img_bytes, 'image/png')
+                    adjuntar_qr(email, asistencia)
                     email.send()
         else:
             return HttpResponse('Tipo de registro inválido para este flujo.')
@@ -966,7 +947,7 @@ def confirmar_registro(request, token):
     if rol_obj and not RolUsuario.objects.filter(usuario=usuario, rol=rol_obj).exists():
         RolUsuario.objects.create(usuario=usuario, rol=rol_obj)
     qr_url = None
-    qr_img_bytes = None
+    asistencia = None
     
     # Solo procesar asistentes en este flujo
     if rol == 'asistente':
@@ -977,17 +958,11 @@ def confirmar_registro(request, token):
             # Solo asistentes gratuitos quedan aprobados y reciben QR
             if evento.eve_tienecosto == 'NO':
                 asistencia.asi_eve_estado = 'Aprobado'
-                qr_data = f"asistente:{usuario.documento}|evento:{evento.eve_id}|clave:{clave}"
-                buffer = BytesIO()
-                qr_img = qrcode.make(qr_data)
-                qr_img.save(buffer, format='PNG')
-                filename = f"qr_asistente_{usuario.documento}_{clave}.png"
-                asistencia.asi_eve_qr.save(filename, ContentFile(buffer.getvalue()), save=False)
-                qr_url = asistencia.asi_eve_qr.url
-                qr_img_bytes = buffer.getvalue()
                 evento.eve_capacidad -= 1
                 evento.save()
             asistencia.save()
+            if asistencia.qr_url:
+                qr_url = request.build_absolute_uri(asistencia.qr_url)
     else:
         return HttpResponse('Tipo de registro inválido para este flujo.')
     cuerpo_html = render_to_string('correo_clave.html', {
@@ -1002,8 +977,8 @@ def confirmar_registro(request, token):
         to=[usuario.email],
     )
     email.content_subtype = 'html'
-    if qr_img_bytes:
-        email.attach('qr_acceso.png', qr_img_bytes, 'image/png')
+    if qr_url:
+        adjuntar_qr(email, asistencia)
     email.send()
     return render(request, 'registro_confirmado.html', {
         'nombre': usuario.first_name,
@@ -1073,3 +1048,95 @@ def registrarse_admin_evento(request):
         'email': invitacion.email_destino,
         'username_sugerido': username_sugerido
     })
+
+
+def verificar_certificado(request, codigo=None):
+    """Verificación pública de un certificado por su código de verificación."""
+    codigo = (codigo or request.GET.get('codigo', '')).strip().upper()
+    certificado = None
+    if codigo:
+        # Una sola consulta por el índice único de codigo. El registro se crea antes de generar el
+        # PDF: sin archivo el certificado nunca se emitió
+        certificado = CertificadoEmitido.objects.select_related('evento', 'usuario').filter(
+            codigo=codigo
+        ).exclude(archivo='').first()
+    return render(request, 'app_eventos/verificar_certificado.html', {
+        'codigo': codigo,
+        'certificado': certificado,
+    }, status=404 if codigo and certificado is None else 200)
+
+
+@cache_control(public=True, max_age=TIEMPO_CACHE_QR, immutable=True)
+@etag(lambda request, token: etiqueta_qr(token))
+def qr_inscripcion(request, token):
+    """PNG del QR de acceso de una inscripción, generado a partir de su token firmado."""
+    if leer_token(token) is None:
+        raise Http404("QR no válido")
+    return HttpResponse(png_qr(token), content_type='image/png')
+
+
+@csrf_exempt
+def ingreso_evento(request, eve_id):
+    """
+    Registra la entrada de un QR escaneado en la puerta: POST {"token": ...} con 'Authorization:
+    Bearer <clave del dispositivo>' (ver control de ingreso del administrador). No usa la sesión.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Método no permitido.'}, status=405)
+    dispositivo = dispositivo_autorizado(request, eve_id)
+    if dispositivo is None:
+        return JsonResponse({'success': False, 'error': 'Dispositivo no autorizado.'}, status=401)
+    try:
+        token = json.loads(request.body)['token']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Se esperaba un JSON con el token del QR.'}, status=400)
+    estado, respuesta = registrar_ingreso(eve_id, str(token), dispositivo)
+    return JsonResponse(respuesta, status=estado)
+
+
+def manifiesto_ingreso(request, eve_id):
+    """
+    Manifiesto binario de los QR aprobados del evento para validar sin conexión (formato en
+    app_eventos.manifiesto). Con ?desde=<versión> retorna solo los cambios desde esa versión.
+    """
+    if dispositivo_autorizado(request, eve_id) is None:
+        return JsonResponse({'success': False, 'error': 'Dispositivo no autorizado.'}, status=401)
+    desde = request.GET.get('desde')
+    if desde is not None:
+        try:
+            desde = int(desde)
+        except ValueError:
+            desde = -1
+        if desde < 0:
+            return JsonResponse({'success': False, 'error': 'Versión no válida.'}, status=400)
+    get_object_or_404(Evento, pk=eve_id)
+    version, contenido = manifiesto(eve_id, desde)
+    response = HttpResponse(contenido, content_type='application/octet-stream')
+    response['X-Manifiesto-Version'] = str(version)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@csrf_exempt
+def sincronizar_ingresos_evento(request, eve_id):
+    """
+    Recibe los ingresos que un dispositivo registró sin conexión: POST {"ingresos": [{"token": ...,
+    "registrado": "2025-05-10T08:31:00-05:00"}, ...]}.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Método no permitido.'}, status=405)
+    dispositivo = dispositivo_autorizado(request, eve_id)
+    if dispositivo is None:
+        return JsonResponse({'success': False, 'error': 'Dispositivo no autorizado.'}, status=401)
+    try:
+        ingresos = json.loads(request.body)['ingresos']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Se esperaba un JSON con la lista de ingresos.'}, status=400)
+    if not isinstance(ingresos, list) or len(ingresos) > MAX_INGRESOS_POR_LOTE:
+        return JsonResponse({
+            'success': False,
+            'error': f'Se esperaba una lista de hasta {MAX_INGRESOS_POR_LOTE} ingresos.',
+        }, status=400)
+    evento = get_object_or_404(Evento.objects.only('eve_fecha_inicio', 'eve_fecha_fin'), pk=eve_id)
+    aceptados, rechazados = sincronizar_ingresos(evento, ingresos, dispositivo)
+    return JsonResponse({'success': True, 'aceptados': aceptados, 'rechazados': rechazados})
@@ -0,0 +1,44 @@
+from django.contrib import admin
+from django.utils import timezone
+from .campanas import reenviar_fallidos
+from .models import CampanaNotificacion, CorreoSaliente, DestinatarioCampana
+
+
+@admin.register(CorreoSaliente)
+class CorreoSalienteAdmin(admin.ModelAdmin):
+    list_display = ('asunto', 'estado', 'intentos', 'proximo_intento', 'creado', 'enviado')
+    list_filter = ('estado',)
+    search_fields = ('asunto', 'destinatarios')
+    exclude = ('mensaje',)
+    readonly_fields = ('asunto', 'remitente', 'destinatarios', 'creado', 'enviado', 'ultimo_error')
+    actions = ['reintentar']
+
+    @admin.action(description='Reintentar los correos seleccionados')
+    def reintentar(self, request, queryset):
+        actualizados = queryset.exclude(estado='Enviado').update(
+            estado='Pendiente', intentos=0, proximo_intento=timezone.now(), bloqueado_hasta=None
+        )
+        self.message_user(request, f'{actualizados} correo(s) vuelven a la cola.')
+
+
+class DestinatarioCampanaInline(admin.TabularInline):
+    model = DestinatarioCampana
+    fields = ('email', 'nombre', 'estado', 'intentos', 'enviado', 'error')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(CampanaNotificacion)
+class CampanaNotificacionAdmin(admin.ModelAdmin):
+    list_display = ('asunto', 'evento', 'tipo', 'estado', 'creada', 'terminada')
+    list_filter = ('estado', 'tipo')
+    search_fields = ('asunto', 'evento__eve_nombre')
+    readonly_fields = ('estado', 'creada', 'terminada')
+    inlines = [DestinatarioCampanaInline]
+    actions = ['reenviar_fallidos']
+
+    @admin.action(description='Reenviar a los destinatarios fallidos')
+    def reenviar_fallidos(self, request, queryset):
+        reenviados = sum(reenviar_fallidos(campana) for campana in queryset)
+        self.message_user(request, f'{reenviados} destinatario(s) vuelven a la cola.')
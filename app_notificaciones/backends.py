@@ -0,0 +1,30 @@
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import sanitize_address
+from app_notificaciones.models import CorreoSaliente
+
+
+class OutboxBackend(BaseEmailBackend):
+    """
+    Backend de correo que no se conecta a SMTP: guarda cada mensaje renderizado en CorreoSaliente
+    (dentro de la transacción en curso) para que lo envíe el comando enviar_correos.
+    """
+
+    def send_messages(self, email_messages):
+        correos = []
+        for mensaje in email_messages:
+            destinatarios = mensaje.recipients()
+            if not destinatarios:
+                continue
+            try:
+                codificacion = mensaje.encoding or 'utf-8'
+                correos.append(CorreoSaliente(
+                    asunto=str(mensaje.subject)[:255],
+                    remitente=sanitize_address(mensaje.from_email, codificacion),
+                    destinatarios=[sanitize_address(d, codificacion) for d in destinatarios],
+                    mensaje=mensaje.message().as_bytes(linesep='\r\n'),
+                ))
+            except Exception:
+                if not self.fail_silently:
+                    raise
+        CorreoSaliente.objects.bulk_create(correos)
+        return len(correos)
@@ -0,0 +1,145 @@
+import time
+from email.utils import make_msgid
+from itertools import groupby
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.utils import DNS_NAME
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from app_notificaciones.envio import DURACION_BLOQUEO, Bloqueo, CorreoGuardado
+from app_notificaciones.models import CampanaNotificacion, DestinatarioCampana
+
+MAX_INTENTOS_DESTINATARIO = 3
+
+
+def crear_campana(evento, tipo, asunto, mensaje, destinatarios):
+    """
+    Crea la campaña con sus destinatarios [(email, nombre)], sin repetir correos (sin distinguir
+    mayúsculas). Los correos vacíos se omiten. No envía nada: de eso se encarga enviar_campanas.
+    """
+    unicos = {}
+    for email, nombre in destinatarios:
+        email = (email or '').strip()
+        if email:
+            unicos.setdefault(email.lower(), (email, nombre))
+    with transaction.atomic():
+        campana = CampanaNotificacion.objects.create(evento=evento, tipo=tipo, asunto=asunto, mensaje=mensaje)
+        DestinatarioCampana.objects.bulk_create([
+            DestinatarioCampana(campana=campana, email=email, nombre=nombre[:255])
+            for email, nombre in unicos.values()
+        ])
+    return campana
+
+
+def reenviar_fallidos(campana):
+    """Devuelve a la cola los destinatarios fallidos de la campaña. Retorna cuántos."""
+    with transaction.atomic():
+        reenviados = campana.destinatarios.filter(estado='Fallido').update(
+            estado='Pendiente', intentos=0, error='', bloqueado_hasta=None
+        )
+        if reenviados:
+            CampanaNotificacion.objects.filter(pk=campana.pk).update(estado='Pendiente', terminada=None)
+    return reenviados
+
+
+def reclamar_destinatarios(tamano, bloqueo=DURACION_BLOQUEO):
+    """
+    Marca como 'Enviando' hasta `tamano` destinatarios pendientes (o con el bloqueo vencido),
+    empezando por las campañas más antiguas, y los retorna con su campaña.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        destinatarios = list(
+            DestinatarioCampana.objects.select_for_update(skip_locked=True).filter(
+                Q(estado='Pendiente') | Q(estado='Enviando', bloqueado_hasta__lt=ahora)
+            ).order_by('campana_id', 'intentos', 'pk')[:tamano]
+        )
+        if destinatarios:
+            DestinatarioCampana.objects.filter(pk__in=[d.pk for d in destinatarios]).update(
+                estado='Enviando', bloqueado_hasta=ahora + bloqueo
+            )
+            CampanaNotificacion.objects.filter(
+                pk__in={d.campana_id for d in destinatarios}, estado='Pendiente'
+            ).update(estado='Enviando')
+    campanas = CampanaNotificacion.objects.in_bulk({d.campana_id for d in destinatarios})
+    for destinatario in destinatarios:
+        destinatario.campana = campanas[destinatario.campana_id]
+    return destinatarios
+
+
+def _mime_base(campana):
+    """MIME del cuerpo de la campaña, renderizado una vez; solo cambian To y Message-ID por destinatario."""
+    correo = EmailMessage(subject=campana.asunto, body=campana.mensaje)
+    correo.content_subtype = 'html'
+    return correo.from_email, correo.message()
+
+
+def _mime_para(mime, email):
+    del mime['To']
+    del mime['Message-ID']
+    mime['To'] = email
+    mime['Message-ID'] = make_msgid(domain=DNS_NAME)
+    return mime.as_bytes(linesep='\r\n')
+
+
+def _terminar_campanas(campanas_ids):
+    CampanaNotificacion.objects.filter(pk__in=campanas_ids).exclude(
+        destinatarios__estado__in=['Pendiente', 'Enviando']
+    ).update(estado='Terminada', terminada=timezone.now())
+
+
+def enviar_destinatarios(destinatarios, max_por_minuto=None, bloqueo=DURACION_BLOQUEO):
+    """
+    Envía a los destinatarios reclamados por una sola conexión y registra el resultado de cada uno.
+    Si no se puede conectar, los devuelve a la cola sin contar el intento y relanza el error.
+    Retorna (enviados, fallidos).
+    """
+    enviados = fallidos = 0
+    pausa = 60 / max_por_minuto if max_por_minuto else 0
+    vigente = Bloqueo(DestinatarioCampana, bloqueo)
+    conexion = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+    try:
+        conexion.open()
+    except Exception:
+        DestinatarioCampana.objects.filter(pk__in=[d.pk for d in destinatarios]).update(
+            estado='Pendiente', bloqueado_hasta=None
+        )
+        raise
+    try:
+        for campana, grupo in groupby(destinatarios, key=lambda d: d.campana):
+            remitente, mime = _mime_base(campana)
+            for destinatario in grupo:
+                vigente.mantener(destinatarios[enviados + fallidos:])
+                inicio = time.monotonic()
+                try:
+                    crudo = _mime_para(mime, destinatario.email)
+                    if not conexion.send_messages([CorreoGuardado(remitente, [destinatario.email], crudo, campana.asunto)]):
+                        raise RuntimeError('El backend no aceptó el mensaje.')
+                except Exception as e:
+                    fallidos += 1
+                    intentos = destinatario.intentos + 1
+                    DestinatarioCampana.objects.filter(pk=destinatario.pk).update(
+                        estado='Fallido' if intentos >= MAX_INTENTOS_DESTINATARIO else 'Pendiente',
+                        intentos=intentos,
+                        bloqueado_hasta=None,
+                        error=str(e)[:2000],
+                    )
+                    conexion.close()
+                    try:
+                        conexion.open()
+                    except Exception:
+                        pass
+                else:
+                    enviados += 1
+                    DestinatarioCampana.objects.filter(pk=destinatario.pk).update(
+                        estado='Enviado', intentos=destinatario.intentos + 1, bloqueado_hasta=None,
+                        error='', enviado=timezone.now()
+                    )
+                espera = pausa - (time.monotonic() - inicio)
+                if espera > 0:
+                    time.sleep(espera)
+    finally:
+        conexion.close()
+        _terminar_campanas({d.campana_id for d in destinatarios})
+    return enviados, fallidos
@@ -0,0 +1,140 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from app_notificaciones.models import CorreoSaliente
+
+MAX_INTENTOS = 6
+# Espera antes del primer reintento; se duplica en cada fallo hasta ESPERA_MAXIMA
+ESPERA_BASE = timedelta(minutes=1)
+ESPERA_MAXIMA = timedelta(hours=6)
+# Un lote reclamado que no se termina en este tiempo (p. ej. el worker murió) vuelve a la cola
+DURACION_BLOQUEO = timedelta(minutes=10)
+
+
+class _MimeGuardado:
+    """Expone los bytes MIME guardados con la interfaz que usan los backends de correo."""
+
+    def __init__(self, crudo):
+        self.crudo = crudo
+
+    def as_bytes(self, *args, **kwargs):
+        return self.crudo
+
+    def get_charset(self):
+        return None
+
+
+class CorreoGuardado(EmailMessage):
+    """EmailMessage que entrega tal cual un MIME ya renderizado (p. ej. el de un CorreoSaliente)."""
+
+    def __init__(self, remitente, destinatarios, crudo, asunto=''):
+        super().__init__(subject=asunto, from_email=remitente, to=destinatarios)
+        self.crudo = bytes(crudo)
+
+    def message(self):
+        return _MimeGuardado(self.crudo)
+
+
+def reclamar_lote(tamano, bloqueo=DURACION_BLOQUEO):
+    """
+    Marca como 'Enviando' hasta `tamano` correos listos para enviar (o con el bloqueo vencido) y
+    los retorna. Con skip_locked varios workers pueden drenar la cola sin tomar el mismo correo.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        correos = list(
+            CorreoSaliente.objects.select_for_update(skip_locked=True).filter(
+                Q(estado='Pendiente', proximo_intento__lte=ahora) |
+                Q(estado='Enviando', bloqueado_hasta__lt=ahora)
+            ).order_by('proximo_intento', 'pk')[:tamano]
+        )
+        if correos:
+            CorreoSaliente.objects.filter(pk__in=[c.pk for c in correos]).update(
+                estado='Enviando', bloqueado_hasta=ahora + bloqueo
+            )
+    return correos
+
+
+class Bloqueo:
+    """
+    Mantiene vigente el bloqueo de los registros reclamados mientras se envían: con un límite de
+    correos por minuto un lote puede tardar más que DURACION_BLOQUEO, y al vencerse otro worker
+    los volvería a reclamar y enviar. Cuando pasa la mitad del bloqueo lo extiende a los que faltan.
+    """
+
+    def __init__(self, modelo, duracion=DURACION_BLOQUEO):
+        self.modelo = modelo
+        self.duracion = duracion
+        self.renovar = time.monotonic() + duracion.total_seconds() / 2
+
+    def mantener(self, pendientes):
+        if time.monotonic() < self.renovar:
+            return
+        self.modelo.objects.filter(pk__in=[r.pk for r in pendientes], estado='Enviando').update(
+            bloqueado_hasta=timezone.now() + self.duracion
+        )
+        self.renovar = time.monotonic() + self.duracion.total_seconds() / 2
+
+
+def _registrar_fallo(correo, error, max_intentos):
+    intentos = correo.intentos + 1
+    espera = min(ESPERA_BASE * 2 ** (intentos - 1), ESPERA_MAXIMA)
+    CorreoSaliente.objects.filter(pk=correo.pk).update(
+        estado='Fallido' if intentos >= max_intentos else 'Pendiente',
+        intentos=intentos,
+        proximo_intento=timezone.now() + espera,
+        bloqueado_hasta=None,
+        ultimo_error=str(error)[:2000],
+    )
+
+
+def enviar_lote(correos, max_intentos=MAX_INTENTOS, max_por_minuto=None, bloqueo=DURACION_BLOQUEO):
+    """
+    Envía los correos reclamados por una sola conexión (se reabre si el servidor la corta).
+    Los fallos se reintentan con espera exponencial y tras `max_intentos` quedan como 'Fallido'.
+    Retorna (enviados, fallidos).
+    """
+    enviados = fallidos = 0
+    vigente = Bloqueo(CorreoSaliente, bloqueo)
+    pausa = 60 / max_por_minuto if max_por_minuto else 0
+    conexion = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+    try:
+        conexion.open()
+    except Exception as e:
+        # Sin conexión todo el lote se reintenta más tarde
+        for correo in correos:
+            _registrar_fallo(correo, e, max_intentos)
+        return 0, len(correos)
+    try:
+        for i, correo in enumerate(correos):
+            vigente.mantener(correos[i:])
+            inicio = time.monotonic()
+            try:
+                if not conexion.send_messages([
+                    CorreoGuardado(correo.remitente, correo.destinatarios, correo.mensaje, correo.asunto)
+                ]):
+                    raise RuntimeError('El backend no aceptó el mensaje.')
+            except Exception as e:
+                fallidos += 1
+                _registrar_fallo(correo, e, max_intentos)
+                # La conexión pudo quedar inservible: se reabre para el siguiente correo
+                conexion.close()
+                try:
+                    conexion.open()
+                except Exception:
+                    pass
+            else:
+                enviados += 1
+                CorreoSaliente.objects.filter(pk=correo.pk).update(
+                    estado='Enviado', enviado=timezone.now(), bloqueado_hasta=None, ultimo_error=''
+                )
+            espera = pausa - (time.monotonic() - inicio)
+            if espera > 0:
+                time.sleep(espera)
+    finally:
+        conexion.close()
+    return enviados, fallidos
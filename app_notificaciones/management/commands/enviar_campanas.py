@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from app_notificaciones.campanas import enviar_destinatarios, reclamar_destinatarios
+
+
+class Command(BaseCommand):
+    help = (
+        'Envía las campañas de notificación pendientes por lotes con un límite de correos por minuto, '
+        'registrando el resultado de cada destinatario. Con --continuo queda atendiendo nuevas campañas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=50, help='Destinatarios enviados por conexión.')
+        parser.add_argument('--continuo', action='store_true', help='Mantiene el proceso activo revisando campañas pendientes.')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos entre revisiones cuando no hay envíos.')
+        parser.add_argument('--max-por-minuto', type=int, default=120, help='Límite de correos por minuto (0 = sin límite).')
+
+    def handle(self, *args, **options):
+        while True:
+            destinatarios = reclamar_destinatarios(options['lote'])
+            if destinatarios:
+                try:
+                    enviados, fallidos = enviar_destinatarios(destinatarios, options['max_por_minuto'])
+                except Exception as e:
+                    self.stderr.write(self.style.ERROR(f'No se pudo conectar al servidor de correo: {e}'))
+                else:
+                    estilo = self.style.SUCCESS if not fallidos else self.style.WARNING
+                    self.stdout.write(estilo(f'Campañas: {enviados} correo(s) enviados, {fallidos} con error.'))
+                    continue
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from app_notificaciones.envio import MAX_INTENTOS, enviar_lote, reclamar_lote
+
+
+class Command(BaseCommand):
+    help = (
+        'Envía los correos encolados en CorreoSaliente por lotes, reutilizando una conexión SMTP '
+        'por lote. Con --continuo queda atendiendo la cola.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=50, help='Correos enviados por conexión.')
+        parser.add_argument('--continuo', action='store_true', help='Mantiene el proceso activo revisando la cola.')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos entre revisiones cuando la cola está vacía.')
+        parser.add_argument('--max-intentos', type=int, default=MAX_INTENTOS, help='Intentos antes de marcar un correo como fallido.')
+        parser.add_argument('--max-por-minuto', type=int, default=None, help='Límite de correos por minuto de este proceso.')
+
+    def handle(self, *args, **options):
+        while True:
+            correos = reclamar_lote(options['lote'])
+            if correos:
+                enviados, fallidos = enviar_lote(correos, options['max_intentos'], options['max_por_minuto'])
+                estilo = self.style.SUCCESS if not fallidos else self.style.WARNING
+                self.stdout.write(estilo(f'{enviados} correo(s) enviados, {fallidos} con error.'))
+                continue
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
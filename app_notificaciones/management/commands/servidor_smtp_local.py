@@ -0,0 +1,90 @@
+import os
+import socketserver
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class _SesionSMTP(socketserver.StreamRequestHandler):
+    """Implementa lo mínimo de SMTP para aceptar correos y guardarlos como archivos .eml."""
+
+    def responder(self, linea):
+        self.wfile.write(linea.encode() + b'\r\n')
+
+    def handle(self):
+        self.responder('220 eventsoft SMTP local')
+        remitente, destinatarios = None, []
+        while True:
+            linea = self.rfile.readline()
+            if not linea:
+                return
+            comando = linea.decode('utf-8', 'replace').strip()
+            verbo = comando[:4].upper()
+            if verbo == 'HELO':
+                self.responder('250 eventsoft')
+            elif verbo == 'EHLO':
+                self.responder('250-eventsoft')
+                self.responder('250 AUTH PLAIN')
+            elif verbo == 'AUTH':
+                # Acepta cualquier usuario: el backend SMTP inicia sesión si EMAIL_HOST_USER está definido
+                self.responder('235 OK')
+            elif verbo == 'MAIL':
+                remitente, destinatarios = comando.split(':', 1)[1].strip(), []
+                self.responder('250 OK')
+            elif verbo == 'RCPT':
+                destinatarios.append(comando.split(':', 1)[1].strip())
+                self.responder('250 OK')
+            elif verbo == 'DATA':
+                self.responder('354 Fin con <CRLF>.<CRLF>')
+                datos = []
+                for linea in iter(self.rfile.readline, b''):
+                    if linea in (b'.\r\n', b'.\n'):
+                        break
+                    datos.append(linea[1:] if linea.startswith(b'..') else linea)
+                self.server.guardar(remitente, destinatarios, b''.join(datos))
+                self.responder('250 OK')
+            elif verbo in ('RSET', 'NOOP'):
+                self.responder('250 OK')
+            elif verbo == 'QUIT':
+                self.responder('221 Adiós')
+                return
+            else:
+                self.responder('502 Comando no soportado')
+
+
+class _Servidor(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, direccion, directorio, stdout):
+        super().__init__(direccion, _SesionSMTP)
+        self.directorio = directorio
+        self.stdout = stdout
+        self.contador = 0
+
+    def guardar(self, remitente, destinatarios, mensaje):
+        self.contador += 1
+        nombre = f"{timezone.now():%Y%m%d-%H%M%S}-{self.contador}.eml"
+        with open(os.path.join(self.directorio, nombre), 'wb') as archivo:
+            archivo.write(mensaje)
+        self.stdout.write(f"{nombre}: {remitente} -> {', '.join(destinatarios)}")
+
+
+class Command(BaseCommand):
+    help = (
+        'Servidor SMTP local para pruebas: acepta todos los correos sin reenviarlos y los guarda '
+        'como .eml. Úselo con EMAIL_HOST=localhost, EMAIL_PORT=<puerto> y EMAIL_USE_TLS=False.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--puerto', type=int, default=1025)
+        parser.add_argument('--directorio', default=os.path.join(settings.MEDIA_ROOT, 'correos_locales'))
+
+    def handle(self, *args, **options):
+        os.makedirs(options['directorio'], exist_ok=True)
+        with _Servidor(('127.0.0.1', options['puerto']), options['directorio'], self.stdout) as servidor:
+            self.stdout.write(f"SMTP local en 127.0.0.1:{options['puerto']}, guardando en {options['directorio']}")
+            try:
+                servidor.serve_forever()
+            except KeyboardInterrupt:
+                pass
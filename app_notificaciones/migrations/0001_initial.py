@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorreoSaliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asunto', models.CharField(blank=True, max_length=255)),
+                ('remitente', models.CharField(max_length=254)),
+                ('destinatarios', models.JSONField()),
+                ('mensaje', models.BinaryField()),
+                ('estado', models.CharField(choices=[('Pendiente', 'Pendiente'), ('Enviando', 'Enviando'), ('Enviado', 'Enviado'), ('Fallido', 'Fallido')], default='Pendiente', max_length=10)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now)),
+                ('bloqueado_hasta', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_error', models.TextField(blank=True, default='')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('enviado', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['estado', 'proximo_intento'], name='app_notific_estado_91ec6e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_eventos', '0004_remove_evento_inscripciones_habilitadas'),
+        ('app_notificaciones', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampanaNotificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('asistentes', 'Asistentes'), ('participantes', 'Participantes'), ('evaluadores', 'Evaluadores')], max_length=15)),
+                ('asunto', models.CharField(max_length=255)),
+                ('mensaje', models.TextField()),
+                ('estado', models.CharField(choices=[('Pendiente', 'Pendiente'), ('Enviando', 'Enviando'), ('Terminada', 'Terminada')], default='Pendiente', max_length=10)),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('terminada', models.DateTimeField(blank=True, null=True)),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='campanas_notificacion', to='app_eventos.evento')),
+            ],
+            options={
+                'ordering': ['-creada'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DestinatarioCampana',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('nombre', models.CharField(blank=True, max_length=255)),
+                ('estado', models.CharField(choices=[('Pendiente', 'Pendiente'), ('Enviando', 'Enviando'), ('Enviado', 'Enviado'), ('Fallido', 'Fallido')], default='Pendiente', max_length=10)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('bloqueado_hasta', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('enviado', models.DateTimeField(blank=True, null=True)),
+                ('campana', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='destinatarios', to='app_notificaciones.campananotificacion')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['campana', 'estado'], name='app_notific_campana_5e6b17_idx')],
+                'constraints': [models.UniqueConstraint(fields=('campana', 'email'), name='destinatario_unico_por_campana')],
+            },
+        ),
+    ]
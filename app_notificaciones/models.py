@@ -0,0 +1,100 @@
+from django.db import models
+from django.utils import timezone
+
+
+class CorreoSaliente(models.Model):
+    """
+    Correo ya renderizado (MIME completo, con adjuntos) en espera de ser enviado por el comando
+    enviar_correos. Los que agotan sus intentos quedan como 'Fallido' para revisión manual.
+    """
+    ESTADOS = [
+        ('Pendiente', 'Pendiente'),
+        ('Enviando', 'Enviando'),
+        ('Enviado', 'Enviado'),
+        ('Fallido', 'Fallido'),
+    ]
+    asunto = models.CharField(max_length=255, blank=True)
+    remitente = models.CharField(max_length=254)
+    destinatarios = models.JSONField()
+    mensaje = models.BinaryField()
+    estado = models.CharField(max_length=10, choices=ESTADOS, default='Pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    bloqueado_hasta = models.DateTimeField(null=True, blank=True)
+    ultimo_error = models.TextField(blank=True, default='')
+    creado = models.DateTimeField(auto_now_add=True)
+    enviado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['estado', 'proximo_intento'])]
+
+    def __str__(self):
+        return f"{self.asunto} -> {', '.join(self.destinatarios)} ({self.estado})"
+
+
+class CampanaNotificacion(models.Model):
+    """
+    Mensaje de gestionar_notificaciones para un conjunto de destinatarios de un evento. Lo envía
+    por lotes el comando enviar_campanas, registrando el resultado de cada destinatario.
+    """
+    TIPOS = [
+        ('asistentes', 'Asistentes'),
+        ('participantes', 'Participantes'),
+        ('evaluadores', 'Evaluadores'),
+    ]
+    ESTADOS = [
+        ('Pendiente', 'Pendiente'),
+        ('Enviando', 'Enviando'),
+        ('Terminada', 'Terminada'),
+    ]
+    evento = models.ForeignKey('app_eventos.Evento', on_delete=models.CASCADE, related_name='campanas_notificacion')
+    tipo = models.CharField(max_length=15, choices=TIPOS)
+    asunto = models.CharField(max_length=255)
+    mensaje = models.TextField()
+    estado = models.CharField(max_length=10, choices=ESTADOS, default='Pendiente')
+    creada = models.DateTimeField(auto_now_add=True)
+    terminada = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-creada']
+
+    def __str__(self):
+        return f"{self.asunto} ({self.get_tipo_display()}, {self.estado})"
+
+    def resumen(self):
+        """Número de destinatarios por estado, con el total y el porcentaje ya procesado."""
+        conteos = dict(self.destinatarios.values_list('estado').annotate(n=models.Count('pk')))
+        resumen = {estado: conteos.get(estado, 0) for estado, _ in DestinatarioCampana.ESTADOS}
+        total = sum(resumen.values())
+        procesados = resumen['Enviado'] + resumen['Fallido']
+        return {
+            **resumen,
+            'total': total,
+            'porcentaje': round(100 * procesados / total) if total else 100,
+            'estado': self.estado,
+        }
+
+
+class DestinatarioCampana(models.Model):
+    """Resultado del envío de una campaña a un correo (único por campaña)."""
+    ESTADOS = [
+        ('Pendiente', 'Pendiente'),
+        ('Enviando', 'Enviando'),
+        ('Enviado', 'Enviado'),
+        ('Fallido', 'Fallido'),
+    ]
+    campana = models.ForeignKey(CampanaNotificacion, on_delete=models.CASCADE, related_name='destinatarios')
+    email = models.EmailField()
+    nombre = models.CharField(max_length=255, blank=True)
+    estado = models.CharField(max_length=10, choices=ESTADOS, default='Pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    bloqueado_hasta = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    enviado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['campana', 'email'], name='destinatario_unico_por_campana')]
+        indexes = [models.Index(fields=['campana', 'estado'])]
+
+    def __str__(self):
+        return f"{self.email} ({self.estado})"
@@ -0,0 +1,209 @@
+from datetime import date, timedelta
+from unittest import mock
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from app_administradores.models import AdministradorEvento
+from app_eventos.models import Evento
+from app_usuarios.models import Usuario
+from app_notificaciones.backends import OutboxBackend
+from app_notificaciones.campanas import (
+    MAX_INTENTOS_DESTINATARIO, crear_campana, enviar_destinatarios, reclamar_destinatarios, reenviar_fallidos,
+)
+from app_notificaciones.envio import enviar_lote, reclamar_lote
+from app_notificaciones.models import CampanaNotificacion, CorreoSaliente, DestinatarioCampana
+
+LOCMEM = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class BackendRechaza(BaseEmailBackend):
+    """Backend que no acepta ningún mensaje."""
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('550 buzón no disponible')
+
+
+class BackendSinConexion(BaseEmailBackend):
+    def open(self):
+        raise ConnectionError('No se pudo conectar')
+
+
+class BackendBloqueos(EmailBackend):
+    """locmem que anota, para cada mensaje, hasta cuándo estaba bloqueado su registro al enviarlo."""
+    bloqueos = []
+
+    def send_messages(self, messages):
+        for mensaje in messages:
+            para = mensaje.to[0]
+            registro = (
+                CorreoSaliente.objects.filter(destinatarios=[para]).first()
+                or DestinatarioCampana.objects.filter(email=para).first()
+            )
+            self.bloqueos.append(registro.bloqueado_hasta)
+        return super().send_messages(messages)
+
+
+class Reloj:
+    """Sustituye al módulo time: sleep avanza el reloj en vez de esperar."""
+
+    def __init__(self):
+        self.ahora = 0.0
+
+    def monotonic(self):
+        return self.ahora
+
+    def sleep(self, segundos):
+        self.ahora += segundos
+
+
+def encolar(n):
+    """Encola n correos con OutboxBackend (las pruebas usan locmem como EMAIL_BACKEND)."""
+    OutboxBackend().send_messages([
+        EmailMessage('Prueba', 'Cuerpo', 'eventos@example.com', [f'a{i}@example.com']) for i in range(n)
+    ])
+    return list(CorreoSaliente.objects.order_by('pk'))
+
+
+class ColaCorreoTests(TestCase):
+    def test_send_guarda_en_la_cola(self):
+        correo, = encolar(1)
+        self.assertEqual(correo.estado, 'Pendiente')
+        self.assertEqual(correo.destinatarios, ['a0@example.com'])
+        self.assertEqual(mail.outbox, [])
+
+    def test_reclamar_lote_bloquea_los_correos(self):
+        encolar(3)
+        correos = reclamar_lote(2)
+        self.assertEqual(len(correos), 2)
+        self.assertEqual(CorreoSaliente.objects.filter(estado='Enviando', bloqueado_hasta__gt=timezone.now()).count(), 2)
+        # Otro worker solo encuentra el que queda libre
+        self.assertEqual(len(reclamar_lote(10)), 1)
+        self.assertEqual(reclamar_lote(10), [])
+
+    def test_reclamar_lote_retoma_bloqueos_vencidos(self):
+        encolar(1)
+        reclamar_lote(1)
+        CorreoSaliente.objects.update(bloqueado_hasta=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(reclamar_lote(1)), 1)
+
+    def test_reclamar_lote_respeta_proximo_intento(self):
+        encolar(1)
+        CorreoSaliente.objects.update(proximo_intento=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(reclamar_lote(1), [])
+
+    @override_settings(OUTBOX_EMAIL_BACKEND=LOCMEM)
+    def test_enviar_lote(self):
+        encolar(2)
+        self.assertEqual(enviar_lote(reclamar_lote(10)), (2, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(CorreoSaliente.objects.exclude(estado='Enviado').exists())
+        self.assertFalse(CorreoSaliente.objects.filter(bloqueado_hasta__isnull=False).exists())
+
+    @override_settings(OUTBOX_EMAIL_BACKEND='app_notificaciones.tests.BackendRechaza')
+    def test_fallo_se_reintenta_con_espera_y_luego_queda_fallido(self):
+        encolar(1)
+        self.assertEqual(enviar_lote(reclamar_lote(1), max_intentos=2), (0, 1))
+        correo = CorreoSaliente.objects.get()
+        self.assertEqual((correo.estado, correo.intentos), ('Pendiente', 1))
+        self.assertIn('550', correo.ultimo_error)
+        self.assertGreater(correo.proximo_intento, timezone.now())
+        self.assertEqual(reclamar_lote(1), [])
+
+        CorreoSaliente.objects.update(proximo_intento=timezone.now())
+        enviar_lote(reclamar_lote(1), max_intentos=2)
+        correo.refresh_from_db()
+        self.assertEqual((correo.estado, correo.intentos), ('Fallido', 2))
+        self.assertEqual(reclamar_lote(1), [])
+
+    @override_settings(OUTBOX_EMAIL_BACKEND='app_notificaciones.tests.BackendSinConexion')
+    def test_sin_conexion_todo_el_lote_se_reintenta(self):
+        encolar(2)
+        self.assertEqual(enviar_lote(reclamar_lote(10)), (0, 2))
+        self.assertEqual(CorreoSaliente.objects.filter(estado='Pendiente', intentos=1).count(), 2)
+
+    @override_settings(OUTBOX_EMAIL_BACKEND='app_notificaciones.tests.BackendBloqueos')
+    def test_el_bloqueo_se_extiende_mientras_se_limita_el_ritmo(self):
+        # 12 correos a 1 por minuto tardan más que el bloqueo de 10 minutos
+        encolar(12)
+        correos = reclamar_lote(12)
+        reclamado = CorreoSaliente.objects.get(pk=correos[0].pk).bloqueado_hasta
+        BackendBloqueos.bloqueos = []
+        with mock.patch('app_notificaciones.envio.time', Reloj()):
+            self.assertEqual(enviar_lote(correos, max_por_minuto=1), (12, 0))
+        # Al pasar la mitad del bloqueo (el sexto correo) se extendió para los que faltaban
+        self.assertEqual(BackendBloqueos.bloqueos[:5], [reclamado] * 5)
+        self.assertTrue(all(b > reclamado for b in BackendBloqueos.bloqueos[5:]))
+
+
+class CampanaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        usuario = Usuario.objects.create_user(username='admin', email='admin@example.com', password='x')
+        cls.evento = Evento.objects.create(
+            eve_nombre='Congreso', eve_descripcion='', eve_ciudad='Manizales', eve_lugar='Centro',
+            eve_fecha_inicio=date(2026, 5, 1), eve_fecha_fin=date(2026, 5, 2), eve_estado='Aprobado',
+            eve_capacidad=100, eve_tienecosto='No',
+            eve_administrador_fk=AdministradorEvento.objects.create(usuario=usuario),
+        )
+
+    def crear(self, emails):
+        return crear_campana(self.evento, 'asistentes', 'Aviso', '<p>Hola</p>', [(e, 'Nombre') for e in emails])
+
+    def test_crear_campana_sin_repetidos_ni_vacios(self):
+        campana = self.crear(['a@example.com', 'A@example.com', '', None, 'b@example.com'])
+        self.assertEqual(sorted(campana.destinatarios.values_list('email', flat=True)), ['a@example.com', 'b@example.com'])
+
+    def test_reclamar_destinatarios(self):
+        campana = self.crear(['a@example.com', 'b@example.com'])
+        destinatarios = reclamar_destinatarios(1)
+        self.assertEqual(len(destinatarios), 1)
+        self.assertEqual(destinatarios[0].campana, campana)
+        self.assertEqual(CampanaNotificacion.objects.get().estado, 'Enviando')
+        self.assertEqual(len(reclamar_destinatarios(10)), 1)
+        self.assertEqual(reclamar_destinatarios(10), [])
+        DestinatarioCampana.objects.update(bloqueado_hasta=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(reclamar_destinatarios(10)), 2)
+
+    @override_settings(OUTBOX_EMAIL_BACKEND=LOCMEM)
+    def test_enviar_destinatarios_termina_la_campana(self):
+        self.crear(['a@example.com', 'b@example.com'])
+        self.assertEqual(enviar_destinatarios(reclamar_destinatarios(10)), (2, 0))
+        self.assertEqual([m.to for m in mail.outbox], [['a@example.com'], ['b@example.com']])
+        self.assertEqual(CampanaNotificacion.objects.get().estado, 'Terminada')
+
+    @override_settings(OUTBOX_EMAIL_BACKEND='app_notificaciones.tests.BackendRechaza')
+    def test_fallidos_y_reenvio(self):
+        campana = self.crear(['a@example.com'])
+        for _ in range(MAX_INTENTOS_DESTINATARIO):
+            self.assertEqual(enviar_destinatarios(reclamar_destinatarios(10)), (0, 1))
+        destinatario = DestinatarioCampana.objects.get()
+        self.assertEqual((destinatario.estado, destinatario.intentos), ('Fallido', MAX_INTENTOS_DESTINATARIO))
+        self.assertEqual(CampanaNotificacion.objects.get().estado, 'Terminada')
+
+        self.assertEqual(reenviar_fallidos(campana), 1)
+        destinatario.refresh_from_db()
+        self.assertEqual((destinatario.estado, destinatario.intentos), ('Pendiente', 0))
+        self.assertEqual(CampanaNotificacion.objects.get().estado, 'Pendiente')
+
+    @override_settings(OUTBOX_EMAIL_BACKEND='app_notificaciones.tests.BackendSinConexion')
+    def test_sin_conexion_no_cuenta_el_intento(self):
+        self.crear(['a@example.com'])
+        with self.assertRaises(ConnectionError):
+            enviar_destinatarios(reclamar_destinatarios(10))
+        destinatario = DestinatarioCampana.objects.get()
+        self.assertEqual((destinatario.estado, destinatario.intentos, destinatario.bloqueado_hasta), ('Pendiente', 0, None))
+
+    @override_settings(OUTBOX_EMAIL_BACKEND='app_notificaciones.tests.BackendBloqueos')
+    def test_el_bloqueo_se_extiende_mientras_se_limita_el_ritmo(self):
+        self.crear([f'd{i}@example.com' for i in range(12)])
+        destinatarios = reclamar_destinatarios(12)
+        reclamado = DestinatarioCampana.objects.get(pk=destinatarios[0].pk).bloqueado_hasta
+        BackendBloqueos.bloqueos = []
+        reloj = Reloj()
+        with mock.patch('app_notificaciones.envio.time', reloj), mock.patch('app_notificaciones.campanas.time', reloj):
+            self.assertEqual(enviar_destinatarios(destinatarios, max_por_minuto=1), (12, 0))
+        self.assertEqual(BackendBloqueos.bloqueos[:5], [reclamado] * 5)
+        self.assertTrue(all(b > reclamado for b in BackendBloqueos.bloqueos[5:]))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_eventos', '0004_remove_evento_inscripciones_habilitadas'),
+        ('app_participantes', '0004_proyecto_pro_valor'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='participanteevento',
+            index=models.Index(fields=['evento', 'par_eve_valor'], name='app_partici_evento__8c5c56_idx'),
+        ),
+    ]
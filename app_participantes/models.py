@@ -1,5 +1,6 @@
 from django.db import models
 from app_eventos.models import Evento
+from app_eventos.qr import url_qr
 from app_usuarios.models import Usuario
 
 class Participante(models.Model):
@@ -33,4 +34,10 @@ class ParticipanteEvento(models.Model):
     proyecto = models.ForeignKey('Proyecto', on_delete=models.SET_NULL, null=True, blank=True, related_name="participantes")
 
     class Meta:
-        unique_together = (('participante', 'evento'),)
\ No newline at end of file
+        unique_together = (('participante', 'evento'),)
+        indexes = [models.Index(fields=['evento', 'par_eve_valor'])]
+
+    @property
+    def qr_url(self):
+        """URL del QR de acceso, generado al pedirlo; solo las inscripciones aprobadas tienen QR."""
+        return url_qr(self) if self.par_eve_estado == 'Aprobado' else None
@@ -1,8 +1,11 @@
 from django.shortcuts import render , redirect, get_object_or_404
 from django.contrib import messages
 from app_participantes.models import ParticipanteEvento , Participante, Proyecto
+from app_administradores.models import CertificadoEmitido
 from app_eventos.models import EventoCategoria, Evento
 from app_evaluadores.models import Criterio, Calificacion
+from app_evaluadores.puntajes import puesto_participante
+from app_eventos.qr import png_qr, token_inscripcion
 from django.views.decorators.http import require_http_methods, require_POST
 from django.contrib.auth.decorators import login_required, user_passes_test
 from app_usuarios.permisos import es_participante
@@ -54,7 +57,8 @@ def dashboard_participante_general(request):
 
     return render(request, 'dashboard_participante_general.html', {
         'eventos': eventos,
-        'estadisticas': estadisticas
+        'estadisticas': estadisticas,
+        'certificados': CertificadoEmitido.objects.filter(usuario=request.user, tipo__in=['participacion', 'premiacion']).exclude(archivo='').select_related('evento'),
     })
 
 @login_required
@@ -137,7 +141,7 @@ def ver_qr_participante(request, evento_id):
         )
         evento = relacion.evento
         datos = {
-            'qr_url': relacion.par_eve_qr.url if relacion.par_eve_qr else None,
+            'qr_url': relacion.qr_url,
             'eve_nombre': evento.eve_nombre,
             'eve_lugar': evento.eve_lugar,
             'eve_descripcion': evento.eve_descripcion,
@@ -160,13 +164,12 @@ def descargar_qr_participante(request, evento_id):
             participante=participante,
             evento__eve_id=evento_id
         )
-        if inscripcion.par_eve_qr and os.path.exists(inscripcion.par_eve_qr.path):
-            with open(inscripcion.par_eve_qr.path, 'rb') as f:
-                response = HttpResponse(f.read(), content_type='image/png')
-                filename = f'qr_evento_{evento_id}_participante_{participante.id}.png'
-                response['Content-Disposition'] = f'attachment; filename="{filename}"'
-                return response
-        raise Http404("QR no disponible o archivo no encontrado")
+        if inscripcion.par_eve_estado == 'Aprobado':
+            response = HttpResponse(png_qr(token_inscripcion(inscripcion)), content_type='image/png')
+            filename = f'qr_evento_{evento_id}_participante_{participante.id}.png'
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+        raise Http404("QR no disponible para esta inscripción")
     except ParticipanteEvento.DoesNotExist:
         raise Http404("QR no encontrado para esta inscripción")
     
@@ -195,7 +198,7 @@ def ver_evento_completo(request, evento_id):
         'eve_lugar': evento.eve_lugar,
         'eve_fecha_inicio': evento.eve_fecha_inicio,
         'eve_fecha_fin': evento.eve_fecha_fin,
-        'eve_estado': evento.eve_estado,
+        'eve_estado': evento.estado_efectivo,
         'eve_capacidad': evento.eve_capacidad,
         'eve_tienecosto': evento.eve_tienecosto,
         'tiene_costo_legible': 'Sí' if evento.eve_tienecosto.upper() == 'SI' else 'No',
@@ -239,6 +242,7 @@ def ver_calificaciones_participante(request, evento_id):
     return render(request, 'ver_calificaciones_participante.html', {
         'calificaciones': calificaciones,
         'evento': evento,
+        'puesto': puesto_participante(evento, participante),
     })
 
 @login_required
@@ -1,15 +1,19 @@
 from django.utils.deprecation import MiddlewareMixin
+from .sesion import asignar_perfiles, obtener_snapshot
 
 class RolSesionMiddleware(MiddlewareMixin):
     def process_request(self, request):
         if request.user.is_authenticated:
+            snapshot = obtener_snapshot(request)
+            request.user.roles_sesion = snapshot
+            asignar_perfiles(request.user, snapshot)
             rol_sesion = request.session.get('rol_sesion')
+            if rol_sesion and rol_sesion not in snapshot['roles']:
+                # El rol elegido al iniciar sesión fue retirado
+                del request.session['rol_sesion']
+                rol_sesion = None
             if rol_sesion:
                 request.user.rol_actual = rol_sesion
             else:
                 # fallback: primer rol
-                rol_usuario = getattr(request.user, 'roles', None)
-                if rol_usuario and rol_usuario.first():
-                    request.user.rol_actual = rol_usuario.first().rol.nombre
-                else:
-                    request.user.rol_actual = None
\ No newline at end of file
+                request.user.rol_actual = snapshot['roles'][0] if snapshot['roles'] else None
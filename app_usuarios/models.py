@@ -5,6 +5,8 @@ class Usuario(AbstractUser):
     email = models.EmailField(unique=True)
     telefono = models.CharField(max_length=20, null=True, blank=True)
     documento = models.CharField(max_length=20)
+    # Se incrementa cada vez que cambian sus RolUsuario; invalida el snapshot de roles en sesión
+    roles_version = models.PositiveIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
@@ -14,6 +16,9 @@ class Usuario(AbstractUser):
 
     @property
     def rol_principal(self):
+        snapshot = getattr(self, 'roles_sesion', None)
+        if snapshot is not None:
+            return snapshot['roles'][0] if snapshot['roles'] else "Sin rol"
         rol_usuario = self.roles.first()
         if rol_usuario:
             return rol_usuario.rol.nombre
@@ -21,6 +26,9 @@ class Usuario(AbstractUser):
 
     @property
     def rol_descripcion(self):
+        snapshot = getattr(self, 'roles_sesion', None)
+        if snapshot is not None:
+            return snapshot['descripcion'] if snapshot['roles'] else "Sin descripción"
         rol_usuario = self.roles.first()
         if rol_usuario:
             return rol_usuario.rol.descripcion
@@ -5,6 +5,9 @@ def get_rol_usuario(user):
     rol_actual = getattr(user, 'rol_actual', None)
     if rol_actual:
         return rol_actual
+    snapshot = getattr(user, 'roles_sesion', None)
+    if snapshot is not None:
+        return snapshot['roles'][0] if snapshot['roles'] else None
     rol_usuario = user.roles.first()
     return rol_usuario.rol.nombre if rol_usuario else None
 
@@ -21,4 +24,4 @@ def es_participante(user):
     return get_rol_usuario(user) == 'participante'
 
 def es_asistente(user):
-    return get_rol_usuario(user) == 'asistente'
\ No newline at end of file
+    return get_rol_usuario(user) == 'asistente'
@@ -0,0 +1,51 @@
+SESION_ROLES = 'roles_snapshot'
+
+PERFILES = ('asistente', 'participante', 'evaluador', 'administrador')
+
+
+def construir_snapshot(user):
+    """
+    Calcula los roles del usuario y los ids de sus perfiles (asistente, participante,
+    evaluador, administrador) en dos consultas. El resultado es serializable en sesión.
+    """
+    from .models import RolUsuario, Usuario
+
+    roles = list(
+        RolUsuario.objects.filter(usuario=user).order_by('pk').values_list('rol__nombre', 'rol__descripcion')
+    )
+    perfiles = Usuario.objects.filter(pk=user.pk).values(*[f'{perfil}__id' for perfil in PERFILES]).first() or {}
+    return {
+        'version': user.roles_version,
+        'roles': [nombre for nombre, _ in roles],
+        'descripcion': roles[0][1] if roles else None,
+        'perfiles': {perfil: perfiles.get(f'{perfil}__id') for perfil in PERFILES},
+    }
+
+
+def asignar_perfiles(user, snapshot):
+    """
+    Deja en la caché de relaciones del usuario sus perfiles según los ids del snapshot, para que
+    request.user.evaluador (y los demás) no consulten la base de datos. Los perfiles solo tienen
+    id y usuario, así que la instancia queda completa; uno inexistente lanza DoesNotExist como siempre.
+    """
+    from .models import Usuario
+
+    for perfil in PERFILES:
+        relacion = Usuario._meta.get_field(perfil)
+        perfil_id = snapshot['perfiles'][perfil]
+        instancia = relacion.related_model(pk=perfil_id, usuario=user) if perfil_id else None
+        relacion.set_cached_value(user, instancia)
+
+
+def guardar_snapshot(request, user):
+    snapshot = construir_snapshot(user)
+    request.session[SESION_ROLES] = snapshot
+    return snapshot
+
+
+def obtener_snapshot(request):
+    """Retorna el snapshot de la sesión, recalculándolo solo si los roles del usuario cambiaron."""
+    snapshot = request.session.get(SESION_ROLES)
+    if not snapshot or snapshot.get('version') != request.user.roles_version:
+        snapshot = guardar_snapshot(request, request.user)
+    return snapshot
@@ -0,0 +1,29 @@
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Usuario, RolUsuario
+from .sesion import PERFILES
+
+
+@receiver(post_save, sender=RolUsuario)
+@receiver(post_delete, sender=RolUsuario)
+def invalidar_roles_sesion(sender, instance, **kwargs):
+    # Las sesiones comparan esta versión con la de su snapshot y lo recalculan si difiere
+    Usuario.objects.filter(pk=instance.usuario_id).update(roles_version=F('roles_version') + 1)
+    # Mantener sincronizada la instancia en memoria para que un save() posterior no revierta la versión
+    if RolUsuario.usuario.is_cached(instance):
+        instance.usuario.roles_version += 1
+
+
+def invalidar_perfiles_sesion(sender, instance, created=True, **kwargs):
+    # El snapshot también guarda los ids de los perfiles: crearlos o borrarlos lo invalida
+    if created and instance.usuario_id:
+        Usuario.objects.filter(pk=instance.usuario_id).update(roles_version=F('roles_version') + 1)
+        if sender.usuario.is_cached(instance):
+            instance.usuario.roles_version += 1
+
+
+for perfil in PERFILES:
+    modelo_perfil = Usuario._meta.get_field(perfil).related_model
+    post_save.connect(invalidar_perfiles_sesion, sender=modelo_perfil)
+    post_delete.connect(invalidar_perfiles_sesion, sender=modelo_perfil)
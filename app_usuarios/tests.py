@@ -1,3 +1,51 @@
-from django.test import TestCase
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import RequestFactory, TestCase
+from app_evaluadores.models import Evaluador
+from app_participantes.models import Participante
+from .middleware import RolSesionMiddleware
+from .models import Rol, RolUsuario, Usuario
+from .permisos import es_evaluador
 
-# Create your tests here.
+
+class SnapshotRolesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(username='eva', email='eva@example.com', password='x')
+        cls.evaluador = Evaluador.objects.create(usuario=cls.usuario)
+        RolUsuario.objects.create(usuario=cls.usuario, rol=Rol.objects.create(nombre='evaluador'))
+
+    def setUp(self):
+        self.session = SessionStore()
+
+    def solicitud(self):
+        """Petición con un usuario recién cargado de la base de datos, como la arma AuthenticationMiddleware."""
+        request = RequestFactory().get('/')
+        request.user = Usuario.objects.get(pk=self.usuario.pk)
+        request.session = self.session
+        RolSesionMiddleware(lambda request: None).process_request(request)
+        return request
+
+    def test_permisos_y_perfiles_sin_consultas(self):
+        self.solicitud()
+        request = self.solicitud()
+        with self.assertNumQueries(0):
+            self.assertTrue(es_evaluador(request.user))
+            self.assertEqual(request.user.evaluador, self.evaluador)
+            self.assertEqual(request.user.evaluador.usuario, request.user)
+            self.assertIsNone(getattr(request.user, 'participante', None))
+            self.assertFalse(hasattr(request.user, 'administrador'))
+
+    def test_crear_o_borrar_un_perfil_invalida_el_snapshot(self):
+        self.solicitud()
+        participante = Participante.objects.create(usuario=self.usuario)
+        self.assertEqual(self.solicitud().user.participante, participante)
+        participante.delete()
+        self.assertIsNone(getattr(self.solicitud().user, 'participante', None))
+
+    def test_rol_retirado(self):
+        self.solicitud()
+        self.session['rol_sesion'] = 'evaluador'
+        RolUsuario.objects.filter(usuario=self.usuario).delete()
+        request = self.solicitud()
+        self.assertNotIn('rol_sesion', self.session)
+        self.assertFalse(es_evaluador(request.user))
@@ -4,4 +4,5 @@ from . import views
 urlpatterns = [
     path('login/', views.login_view, name='login'),
     path('cambiar-contrasena/', views.cambiar_contrasena, name='cambiar_contrasena'),
+    path('certificados/<str:codigo>/descargar/', views.descargar_certificado, name='descargar_certificado'),
 ]
\ No newline at end of file
@@ -4,9 +4,13 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.hashers import check_password
 from django.contrib import messages
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from app_administradores.models import CertificadoEmitido
 from app_participantes.models import ParticipanteEvento
 from app_asistentes.models import AsistenteEvento
 from app_evaluadores.models import EvaluadorEvento
+from .sesion import construir_snapshot, SESION_ROLES
 
 def login_view(request):
     if request.method == 'POST':
@@ -15,35 +19,39 @@ def login_view(request):
         rol = request.POST.get('rol')
         user = authenticate(request, email=email, password=password)
         if user is not None:
+            # Roles e ids de perfiles en un solo snapshot; queda guardado en la sesión
+            snapshot = construir_snapshot(user)
+            perfiles = snapshot['perfiles']
             # Verificar si el usuario tiene el rol seleccionado
-            if not user.roles.filter(rol__nombre=rol).exists():
+            if rol not in snapshot['roles']:
                 messages.error(request, f"No tienes asignado el rol seleccionado.")
                 return redirect('login')
             # Validar confirmación según el rol
             if rol == 'asistente':
-                if not hasattr(user, 'asistente'):
+                if not perfiles['asistente']:
                     messages.error(request, "Tu cuenta no está registrada como asistente.")
                     return redirect('login')
-                if not AsistenteEvento.objects.filter(asistente=user.asistente, confirmado=True).exists():
+                if not AsistenteEvento.objects.filter(asistente_id=perfiles['asistente'], confirmado=True).exists():
                     messages.error(request, "Aún no has confirmado tu inscripción como asistente.")
                     return redirect('login')
             elif rol == 'participante':
-                if not hasattr(user, 'participante'):
+                if not perfiles['participante']:
                     messages.error(request, "Tu cuenta no está registrada como participante.")
                     return redirect('login')
-                if not ParticipanteEvento.objects.filter(participante=user.participante, confirmado=True).exists():
+                if not ParticipanteEvento.objects.filter(participante_id=perfiles['participante'], confirmado=True).exists():
                     messages.error(request, "Aún no has confirmado tu inscripción como participante.")
                     return redirect('login')
             elif rol == 'evaluador':
-                if not hasattr(user, 'evaluador'):
+                if not perfiles['evaluador']:
                     messages.error(request, "Tu cuenta no está registrada como evaluador.")
                     return redirect('login')
-                if not EvaluadorEvento.objects.filter(evaluador=user.evaluador, confirmado=True).exists():
+                if not EvaluadorEvento.objects.filter(evaluador_id=perfiles['evaluador'], confirmado=True).exists():
                     messages.error(request, "Aún no has confirmado tu inscripción como evaluador.")
                     return redirect('login')
             # Guardar el rol elegido en la sesión
             request.session['rol_sesion'] = rol
             login(request, user)
+            request.session[SESION_ROLES] = snapshot
             return redirect_por_rol(rol)
         else:
             messages.error(request, "Correo o contraseña incorrectos.")
@@ -92,4 +100,18 @@ def cambiar_contrasena(request):
                 EvaluadorEvento.objects.filter(evaluador=user).update(eva_eve_clave=nueva)
             messages.success(request, 'La contraseña ha sido actualizada correctamente.')
             return redirect('ver_eventos')
-    return render(request, 'cambiar_contrasena.html')
\ No newline at end of file
+    return render(request, 'cambiar_contrasena.html')
+
+
+@login_required
+def descargar_certificado(request, codigo):
+    """Descarga un certificado emitido al usuario, leído directamente del almacenamiento."""
+    certificado = get_object_or_404(CertificadoEmitido, codigo=codigo, usuario=request.user)
+    if not certificado.archivo:
+        raise Http404("El certificado aún no se ha generado.")
+    return FileResponse(
+        certificado.archivo.open('rb'),
+        as_attachment=True,
+        filename=f'certificado_{certificado.tipo}_{certificado.datos.get("DOCUMENTO", certificado.codigo)}.pdf',
+        content_type='application/pdf',
+    )
@@ -17,8 +17,18 @@ until python manage.py migrate --noinput; do
   fi
 done
 
+echo "▶️ Creando la tabla de caché (si no existe)..."
+python manage.py createcachetable
+
 echo "▶️ Ejecutando collectstatic..."
 python manage.py collectstatic --noinput || echo "⚠️ collectstatic falló, pero seguimos."
 
-echo "🚀 Arrancando Gunicorn..."
-exec gunicorn pr_eventsoft.wsgi:application --bind 0.0.0.0:${PORT} --workers 3
+# Directorio compartido para agregar métricas de todos los workers de gunicorn
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/eventsoft_metricas}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# supervisord arranca gunicorn y los jobs de las colas (finalización de eventos, recálculo de
+# puntajes, correos, campañas, certificados y limpieza de sus ZIP) y los reinicia si alguno termina
+export PORT APP_DIR="$(pwd)"
+echo "🚀 Arrancando Gunicorn y los jobs en segundo plano..."
+exec supervisord -c "$(dirname "$0")/supervisord.conf"
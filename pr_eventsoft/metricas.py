@@ -0,0 +1,143 @@
+"""
+Métricas por vista en formato de texto Prometheus.
+
+MetricasMiddleware mide cada request por nombre de URL: latencia, consultas y tiempo
+de base de datos, tiempo de render de plantillas y tamaño de la respuesta.
+Con gunicorn (varios workers) se debe definir PROMETHEUS_MULTIPROC_DIR antes de
+arrancar; cada worker escribe sus valores en ese directorio y /metrics los agrega.
+"""
+import os
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import DjangoTemplates, Template
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+REQUESTS = Counter(
+    'eventsoft_requests_total', 'Requests atendidos', ['vista', 'metodo', 'estado'],
+)
+LATENCIA = Histogram(
+    'eventsoft_request_duration_seconds', 'Latencia del request', ['vista', 'metodo'], buckets=BUCKETS_SEGUNDOS,
+)
+CONSULTAS = Histogram(
+    'eventsoft_db_queries', 'Consultas SQL por request', ['vista'], buckets=BUCKETS_CONSULTAS,
+)
+TIEMPO_DB = Histogram(
+    'eventsoft_db_duration_seconds', 'Tiempo en base de datos por request', ['vista'], buckets=BUCKETS_SEGUNDOS,
+)
+TIEMPO_PLANTILLAS = Histogram(
+    'eventsoft_template_render_seconds', 'Tiempo de render de plantillas por request', ['vista'],
+    buckets=BUCKETS_SEGUNDOS,
+)
+TAMANO_RESPUESTA = Histogram(
+    'eventsoft_response_size_bytes', 'Tamaño del cuerpo de la respuesta', ['vista'], buckets=BUCKETS_BYTES,
+)
+
+# Acumuladores del request en curso (None fuera de un request medido)
+_medicion = ContextVar('medicion_request', default=None)
+
+
+class _Medicion:
+    __slots__ = ('consultas', 'tiempo_db', 'tiempo_plantillas')
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.tiempo_plantillas = 0.0
+
+
+def _medir_consulta(execute, sql, params, many, context):
+    medicion = _medicion.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.consultas += 1
+        medicion.tiempo_db += time.perf_counter() - inicio
+
+
+def _nombre_vista(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'sin_resolver'
+    return match.view_name or 'sin_nombre'
+
+
+class MetricasMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicion = _Medicion()
+        token = _medicion.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(_medir_consulta))
+                response = self.get_response(request)
+        finally:
+            _medicion.reset(token)
+
+        duracion = time.perf_counter() - inicio
+        vista = _nombre_vista(request)
+        if vista == 'metricas':
+            return response
+        REQUESTS.labels(vista, request.method, str(response.status_code)).inc()
+        LATENCIA.labels(vista, request.method).observe(duracion)
+        CONSULTAS.labels(vista).observe(medicion.consultas)
+        TIEMPO_DB.labels(vista).observe(medicion.tiempo_db)
+        TIEMPO_PLANTILLAS.labels(vista).observe(medicion.tiempo_plantillas)
+        if response.streaming:
+            tamano = response.get('Content-Length')
+            if tamano:
+                TAMANO_RESPUESTA.labels(vista).observe(int(tamano))
+        else:
+            TAMANO_RESPUESTA.labels(vista).observe(len(response.content))
+        return response
+
+
+class _TemplateMedido(Template):
+    def render(self, context=None, request=None):
+        medicion = _medicion.get()
+        if medicion is None:
+            return super().render(context, request)
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicion.tiempo_plantillas += time.perf_counter() - inicio
+
+
+class DjangoTemplatesMedidos(DjangoTemplates):
+    """Backend de plantillas de Django que suma el tiempo de render al request en curso."""
+
+    def from_string(self, template_code):
+        return _TemplateMedido(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return _TemplateMedido(template.template, self)
+
+
+def metricas(request):
+    token = getattr(settings, 'METRICAS_TOKEN', None)
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,89 @@
+"""
+Recursos (imágenes, hojas de estilo, fuentes) de los PDF generados con WeasyPrint, leídos del
+disco en lugar de pedirlos por HTTP a nuestro propio servidor. Las URL de STATIC_URL y MEDIA_URL
+se resuelven a archivos locales con una caché en memoria; cualquier otra URL remota se rechaza.
+"""
+import mimetypes
+import os
+from functools import lru_cache
+from urllib.parse import unquote, urlsplit
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+from weasyprint import urls as weasyprint_urls
+
+# Base de las URL relativas de las plantillas; no corresponde a ningún servidor real
+BASE_URL = 'http://eventsoft.local/'
+MAX_RECURSOS_EN_CACHE = 128
+
+
+@lru_cache(maxsize=1)
+def _carpetas_permitidas():
+    """Carpetas de archivos estáticos y de media, las únicas que se pueden leer con file:."""
+    carpetas = [settings.MEDIA_ROOT, getattr(settings, 'STATIC_ROOT', None)]
+    for finder in finders.get_finders():
+        carpetas += [storage.location for storage in getattr(finder, 'storages', {}).values()]
+    return tuple(os.path.realpath(str(carpeta)) for carpeta in carpetas if carpeta)
+
+
+def _prefijo(url_base):
+    return '/' + urlsplit(url_base).path.strip('/') + '/'
+
+
+def ruta_local(url):
+    """Archivo local al que apunta la URL, o None si no es de STATIC_URL, MEDIA_URL o esas carpetas."""
+    partes = urlsplit(url)
+    ruta = unquote(partes.path)
+    try:
+        if partes.scheme == 'file':
+            ruta = os.path.realpath(ruta)
+            if any(ruta == carpeta or ruta.startswith(carpeta + os.sep) for carpeta in _carpetas_permitidas()):
+                return ruta
+        elif partes.scheme in ('http', 'https') and partes.netloc == urlsplit(BASE_URL).netloc:
+            if ruta.startswith(_prefijo(settings.STATIC_URL)):
+                return finders.find(ruta[len(_prefijo(settings.STATIC_URL)):])
+            if ruta.startswith(_prefijo(settings.MEDIA_URL)):
+                return safe_join(settings.MEDIA_ROOT, ruta[len(_prefijo(settings.MEDIA_URL)):])
+    except SuspiciousFileOperation:
+        pass
+    return None
+
+
+@lru_cache(maxsize=MAX_RECURSOS_EN_CACHE)
+def _contenido(ruta, mtime):
+    with open(ruta, 'rb') as archivo:
+        return archivo.read()
+
+
+def leer_recurso(url):
+    """(contenido, tipo MIME) del recurso local. ValueError si la URL es remota o el archivo no existe."""
+    ruta = ruta_local(url)
+    if not ruta or not os.path.isfile(ruta):
+        raise ValueError(f'Recurso no disponible para el PDF (solo se permiten archivos locales): {url}')
+    tipo, _ = mimetypes.guess_type(ruta)
+    return _contenido(ruta, os.path.getmtime(ruta)), tipo or 'application/octet-stream'
+
+
+if hasattr(weasyprint_urls, 'URLFetcher'):
+    class _ObtenedorLocal(weasyprint_urls.URLFetcher):
+        def fetch(self, url, headers=None):
+            if url.startswith('data:'):
+                return super().fetch(url, headers)
+            contenido, tipo = leer_recurso(url)
+            return weasyprint_urls.URLFetcherResponse(url, contenido, {'Content-Type': tipo})
+
+    def url_fetcher():
+        """url_fetcher para HTML(...) y CSS(...) de WeasyPrint."""
+        return _ObtenedorLocal()
+else:
+    # Versiones anteriores de WeasyPrint: el fetcher es una función que retorna un dict
+    def _obtener_recurso(url, timeout=10, ssl_context=None):
+        if url.startswith('data:'):
+            return weasyprint_urls.default_url_fetcher(url)
+        contenido, tipo = leer_recurso(url)
+        return {'string': contenido, 'mime_type': tipo, 'redirected_url': url}
+
+    def url_fetcher():
+        """url_fetcher para HTML(...) y CSS(...) de WeasyPrint."""
+        return _obtener_recurso
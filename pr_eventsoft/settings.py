@@ -34,13 +34,14 @@ INSTALLED_APPS = [
     'app_asistentes',
     'app_admin',
     'app_usuarios',
+    'app_notificaciones',
 ]
 
 MIDDLEWARE = [
+    'pr_eventsoft.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'app_eventos.middleware.ActualizarEventosFinalizadosMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'app_usuarios.middleware.RolSesionMiddleware',
@@ -52,7 +53,7 @@ ROOT_URLCONF = 'pr_eventsoft.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'pr_eventsoft.metricas.DjangoTemplatesMedidos',
         'DIRS': ['templates','app_administradores/templates/app_administradores','app_eventos/templates/app_eventos','app_admin/templates/app_admin','app_asistentes/templates/app_asistentes','app_evaluadores/templates/app_evaluadores', 'app_participantes/templates/app_participantes','app_usuarios/templates/app_usuarios'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -82,6 +83,26 @@ DATABASES = {
     }
 }
 
+# Caché compartida por los workers de gunicorn y los comandos en segundo plano: guarda la versión
+# de puntajes de cada evento y las claves de los dispositivos de ingreso, que deben verse igual en
+# todos los procesos. Con REDIS_URL se usa Redis (requiere el paquete redis); si no, una tabla de
+# la base de datos creada con createcachetable.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'eventsoft_cache',
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -128,6 +149,10 @@ STATICFILES_DIRS = [
 ]
 
 
+# Métricas Prometheus (/metrics). Si se define, se exige "Authorization: Bearer <token>"
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -136,10 +161,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+# Las vistas solo encolan los correos en CorreoSaliente; el comando enviar_correos los entrega
+# con OUTBOX_EMAIL_BACKEND (por ejemplo, SMTP local de servidor_smtp_local para pruebas)
+EMAIL_BACKEND = 'app_notificaciones.backends.OutboxBackend'
+OUTBOX_EMAIL_BACKEND = os.environ.get('OUTBOX_EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = 'correosdjango073@gmail.com'
 EMAIL_HOST_PASSWORD = 'rxxd fsng xrba qtmm '
 DEFAULT_FROM_EMAIL = 'correosdjango073@gmail.com'
\ No newline at end of file
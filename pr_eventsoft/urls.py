@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 from django.contrib import admin
+from pr_eventsoft.metricas import metricas
 
 
 
@@ -15,6 +16,7 @@ urlpatterns = [
     path('admin-evento/', include('app_administradores.urls')),
     path('evento/', include('app_eventos.urls')),
     path('usuario/', include('app_usuarios.urls')),
+    path('metrics', metricas, name='metricas'),
     
 ]
 